@@ -30,7 +30,7 @@ if [ ! -d "$MEMORY_DIR/nodes" ] || [ ! -f "$QUERY_PY" ]; then
 fi
 
 # Check if graph has nodes
-NODE_COUNT=$(python3 -c "import json; print(json.load(open('$MEMORY_DIR/graph.json')).get('node_count', 0))" 2>/dev/null || echo "0")
+NODE_COUNT=$(CLAUDE_MEMORY_DIR="$MEMORY_DIR" python3 "$TOOLS_DIR/lib/graph.py" count 2>/dev/null || echo "0")
 if [ "$NODE_COUNT" = "0" ]; then
     exit 0
 fi
@@ -58,6 +58,19 @@ for FILE in $FILE_MATCHES; do
     fi
 done
 
+# Nodes whose content resembles the prompt (TF-IDF, no shared tag needed)
+RESULT=$(CLAUDE_MEMORY_DIR="$MEMORY_DIR" python3 "$QUERY_PY" \
+    --memory-dir "$MEMORY_DIR" \
+    --command prompt \
+    --query "$PROMPT" \
+    --format summary \
+    --limit 3 \
+    --status active 2>/dev/null || echo "")
+
+if [ -n "$RESULT" ]; then
+    CONTEXT="$CONTEXT$RESULT"$'\n'
+fi
+
 # Extract keywords (simple approach - words 4+ chars)
 KEYWORDS=$(echo "$PROMPT" | tr '[:upper:]' '[:lower:]' | grep -oE '\b[a-z]{4,}\b' | sort -u | head -5 || echo "")
 
@@ -125,8 +125,8 @@ $DECISIONS
 $RECENT_FILES
 EOF
 
-# Rebuild graph in background
-CLAUDE_MEMORY_DIR="$MEMORY_DIR" python3 "$GRAPH_PY" rebuild >/dev/null 2>&1 &
+# Index the session node in background (incremental; no full rebuild needed)
+CLAUDE_MEMORY_DIR="$MEMORY_DIR" python3 "$GRAPH_PY" update "$NODE_PATH" >/dev/null 2>&1 &
 
 echo "Session persisted: $NODE_ID"
 
@@ -26,7 +26,14 @@ if [ ! -f "$MEMORY_DIR/graph.json" ]; then
     exit 0
 fi
 
-NODE_COUNT=$(python3 -c "import json; print(json.load(open('$MEMORY_DIR/graph.json')).get('node_count', 0))" 2>/dev/null || echo "0")
+# Opt-in: keep graph.json in sync with hand edits for the rest of the
+# session. One watcher per memory dir; it exits when the session does.
+if [ "${CLAUDE_MEMORY_WATCH:-0}" = "1" ]; then
+    CLAUDE_MEMORY_DIR="$MEMORY_DIR" nohup python3 "$TOOLS_DIR/lib/graph.py" watch \
+        --quiet --owner-pid "$PPID" >/dev/null 2>&1 &
+fi
+
+NODE_COUNT=$(CLAUDE_MEMORY_DIR="$MEMORY_DIR" python3 "$TOOLS_DIR/lib/graph.py" count 2>/dev/null || echo "0")
 if [ "$NODE_COUNT" = "0" ]; then
     exit 0
 fi
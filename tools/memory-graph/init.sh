@@ -34,7 +34,14 @@ cat > "$MEMORY_DIR/config.json" << 'EOF'
   "retention": {
     "max_nodes": 500,
     "session_archive_days": 7,
-    "prune_strategy": "least_connected_oldest"
+    "prune_strategy": "least_connected_oldest",
+    "max_age_days": {"file-summary": 30, "subagent": 30, "discovery": 180},
+    "min_access_count": {"file-summary": 3},
+    "keep_linked_to_active_tasks": true,
+    "action": "pack"
+  },
+  "dedupe": {
+    "threshold": 0.75
   }
 }
 EOF
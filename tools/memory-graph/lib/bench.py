@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""
+Hook Benchmark - Measure memory hook latency against synthetic graphs
+
+Builds synthetic memory directories (1k/10k/100k nodes by default), replays
+realistic hook payloads through the memory hooks and the capture/query/graph
+entry points, and reports p50/p95/p99 wall time plus bytes written per call.
+Runs that exceed a configured latency budget exit non-zero.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Add lib directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from graph import MemoryGraph
+from profiling import percentile
+from generate import CorpusSpec, generate_corpus, synthetic_file_path, BASE_TAGS, DEFAULT_TYPE_MIX
+
+LIB_DIR = os.path.dirname(os.path.abspath(__file__))
+TOOL_DIR = os.path.dirname(LIB_DIR)
+# tools/memory-graph -> hooks/ (source) or .claude/tools/memory-graph -> .claude/hooks/ (installed)
+HOOKS_DIR = os.path.join(os.path.dirname(os.path.dirname(TOOL_DIR)), "hooks")
+DEFAULT_BUDGETS = os.path.join(TOOL_DIR, "bench-budgets.json")
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_TARGETS = [
+    "hook:post-tool-use",
+    "hook:prompt-submit",
+    "hook:session-start",
+    "capture:file",
+    "query:recent",
+    "query:type",
+    "query:tag",
+    "query:search",
+    "query:id",
+    "graph:stats",
+    "graph:load",
+    "graph:update",
+    "visualize:render",
+    "visualize:focus",
+    "visualize:sample",
+]
+# Too slow to repeat at scale; opt in with --targets
+OPTIONAL_TARGETS = ["graph:rebuild", "graph:reindex"]
+
+PROMPTS = [
+    "Fix the auth bug in src/pkg3/module_{n}.py before the release",
+    "Why does the cache config break the parser tests?",
+    "Refactor src/pkg1/module_{n}.ts to use the query layer",
+    "Add docs for the session hooks and the build pipeline",
+    "Review the database migration in src/pkg5/module_{n}.go",
+]
+SOURCE_FILES = 200
+
+
+# === Synthetic Corpus ===
+
+def build_corpus(memory_dir: str, project_dir: str, size: int, seed: int = 42) -> None:
+    """Generate a `size`-node corpus plus the project files it refers to."""
+    generate_corpus(memory_dir, CorpusSpec(nodes=size, seed=seed, project_root=project_dir))
+
+    # Real source files so hook payloads point at something that exists
+    for i in range(SOURCE_FILES):
+        src = synthetic_file_path(project_dir, i)
+        os.makedirs(os.path.dirname(src), exist_ok=True)
+        with open(src, 'w', encoding='utf-8') as f:
+            f.write(f'"""Module {i}"""\n\n\ndef handler_{i}():\n    return {i}\n')
+
+
+def prepare_corpus(work_dir: str, size: int, seed: int) -> Tuple[str, str]:
+    """Build (or reuse) the corpus for one size. Returns (memory_dir, project_dir)."""
+    base = os.path.join(work_dir, f"corpus-{size}")
+    memory_dir = os.path.join(base, "project", ".claude", "memory")
+    project_dir = os.path.join(base, "project")
+    marker = os.path.join(base, ".complete")
+
+    if not os.path.exists(marker):
+        shutil.rmtree(base, ignore_errors=True)
+        build_corpus(memory_dir, project_dir, size, seed)
+        with open(marker, 'w') as f:
+            f.write(str(seed))
+
+    return memory_dir, project_dir
+
+
+# === Targets ===
+
+class Context:
+    """Per-corpus state shared by target builders."""
+
+    def __init__(self, memory_dir: str, project_dir: str, seed: int):
+        self.memory_dir = memory_dir
+        self.project_dir = project_dir
+        self.rng = random.Random(seed)
+
+        graph = MemoryGraph(memory_dir)
+        nodes = graph.cache.get("nodes", {})
+        self.node_ids = sorted(nodes.keys())
+        self.node_paths = [nodes[nid]["path"] for nid in self.node_ids]
+        self.tags = sorted(graph.cache.get("tags", {}).keys()) or BASE_TAGS
+        self.types = sorted(graph.cache.get("types", {}).keys()) or list(DEFAULT_TYPE_MIX)
+
+    def source_file(self) -> str:
+        return synthetic_file_path(self.project_dir, self.rng.randrange(SOURCE_FILES))
+
+    def node_id(self) -> str:
+        return self.rng.choice(self.node_ids) if self.node_ids else "missing"
+
+    def node_path(self) -> str:
+        return self.rng.choice(self.node_paths) if self.node_paths else ""
+
+
+def _python(script: str, *args: str) -> List[str]:
+    return [sys.executable, os.path.join(LIB_DIR, script), *args]
+
+
+def _hook(name: str, *args: str) -> List[str]:
+    return ["bash", os.path.join(HOOKS_DIR, name), *args]
+
+
+def _query(ctx: Context, command: str, query: str = "", limit: str = "5") -> List[str]:
+    return _python("query.py", "--memory-dir", ctx.memory_dir, "--command", command,
+                   "--query", query, "--format", "summary", "--limit", limit)
+
+
+def _post_tool_use_payload(ctx: Context, i: int) -> str:
+    """Rotate through the tool calls post-tool-use.sh reacts to."""
+    kind = i % 4
+    if kind == 0:
+        payload = {"tool_name": "Read", "tool_input": {"file_path": ctx.source_file()},
+                   "tool_response": {"content": "..."}}
+    elif kind == 1:
+        payload = {"tool_name": "Edit", "tool_input": {"file_path": ctx.source_file(),
+                   "old_string": "return", "new_string": "return"}, "tool_response": {}}
+    elif kind == 2:
+        payload = {"tool_name": "TodoWrite", "tool_input": {"todos": [
+            {"content": f"Benchmark task {ctx.rng.randrange(50)}", "status": "in_progress"},
+            {"content": f"Benchmark task {ctx.rng.randrange(50)}", "status": "completed"},
+        ]}, "tool_response": {}}
+    else:
+        payload = {"tool_name": "Task", "tool_input": {"subagent_type": "Explore"},
+                   "tool_response": {"result": f"Explored module {ctx.rng.randrange(SOURCE_FILES)}"}}
+    return json.dumps(payload)
+
+
+def _prompt_payload(ctx: Context, i: int) -> str:
+    prompt = PROMPTS[i % len(PROMPTS)].format(n=ctx.rng.randrange(SOURCE_FILES))
+    return json.dumps({"prompt": prompt})
+
+
+# name -> builder(ctx, iteration) -> (argv, stdin)
+TargetBuilder = Callable[[Context, int], Tuple[List[str], Optional[str]]]
+
+TARGETS: Dict[str, TargetBuilder] = {
+    "hook:post-tool-use": lambda ctx, i: (_hook("post-tool-use.sh"), _post_tool_use_payload(ctx, i)),
+    "hook:prompt-submit": lambda ctx, i: (_hook("prompt-submit-memory.sh"), _prompt_payload(ctx, i)),
+    "hook:session-start": lambda ctx, i: (_hook("session-start-memory.sh"), None),
+    "capture:file": lambda ctx, i: (_python("capture.py", "--memory-dir", ctx.memory_dir, "file",
+                                            ctx.source_file(), "--action", "read"), None),
+    "query:recent": lambda ctx, i: (_query(ctx, "recent"), None),
+    "query:type": lambda ctx, i: (_query(ctx, "type", ctx.rng.choice(ctx.types)), None),
+    "query:tag": lambda ctx, i: (_query(ctx, "tag", ctx.rng.choice(ctx.tags)), None),
+    "query:search": lambda ctx, i: (_query(ctx, "search", ctx.rng.choice(ctx.tags)), None),
+    "query:id": lambda ctx, i: (_query(ctx, "id", ctx.node_id()), None),
+    "graph:stats": lambda ctx, i: (_python("graph.py", "stats"), None),
+    "graph:load": lambda ctx, i: (_python("graph.py", "load"), None),
+    "graph:update": lambda ctx, i: (_python("graph.py", "update", ctx.node_path()), None),
+    "graph:rebuild": lambda ctx, i: (_python("graph.py", "rebuild"), None),
+    "graph:reindex": lambda ctx, i: (_python("graph.py", "reindex"), None),
+    "visualize:render": lambda ctx, i: (_python("visualize.py", ctx.memory_dir), None),
+    "visualize:focus": lambda ctx, i: (_python("visualize.py", ctx.memory_dir, "--focus", ctx.node_id(),
+                                               "--depth", "2"), None),
+    "visualize:sample": lambda ctx, i: (_python("visualize.py", ctx.memory_dir, "--sample", "60",
+                                                "--seed", str(i)), None),
+}
+
+
+# === Measurement ===
+
+def snapshot(root: str) -> Dict[str, Tuple[int, int]]:
+    """Map every file under root to (size, mtime_ns)."""
+    state = {}
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        st = entry.stat(follow_symlinks=False)
+                        state[entry.path] = (st.st_size, st.st_mtime_ns)
+        except OSError:
+            continue
+    return state
+
+
+def bytes_written(before: Dict[str, Tuple[int, int]], after: Dict[str, Tuple[int, int]]) -> int:
+    """Sum sizes of files created or rewritten between two snapshots."""
+    return sum(size for path, (size, mtime) in after.items()
+               if before.get(path) != (size, mtime))
+
+
+def _group_alive(pgid: int) -> bool:
+    """True if any non-zombie process remains in the process group."""
+    if os.path.isdir("/proc"):
+        for pid in os.listdir("/proc"):
+            if not pid.isdigit():
+                continue
+            try:
+                with open(f"/proc/{pid}/stat", 'r') as f:
+                    stat = f.read()
+            except OSError:
+                continue
+            # Fields after the parenthesised command: state ppid pgrp ...
+            fields = stat[stat.rfind(')') + 2:].split()
+            if len(fields) > 2 and int(fields[2]) == pgid and fields[0] != 'Z':
+                return True
+        return False
+    try:
+        os.killpg(pgid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+
+
+def run_once(argv: List[str], stdin: Optional[str], env: Dict[str, str], cwd: str,
+             timeout: float = 120.0) -> Tuple[float, float, int, int]:
+    """
+    Run one target invocation.
+
+    Returns (wall_ms, total_ms, returncode, max_rss_kb): wall is time until
+    the process exits (what Claude waits on), total also includes background
+    work the hook forked off (captures run with `&`). Peak RSS covers the
+    process and the children it waited for.
+    """
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        argv, cwd=cwd, env=env, start_new_session=True,
+        stdin=subprocess.PIPE if stdin is not None else subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    # Blocking wait: Popen.wait(timeout=...) polls with up to 50ms sleeps,
+    # which would quantize the measurements
+    killer = threading.Timer(timeout, proc.kill)
+    killer.start()
+    try:
+        if stdin is not None:
+            try:
+                proc.stdin.write(stdin.encode())
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+        # wait4 rather than proc.wait() to get the child's rusage
+        _, status, usage = os.wait4(proc.pid, 0)
+        # (os.waitstatus_to_exitcode needs Python 3.9)
+        proc.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+    finally:
+        killer.cancel()
+    wall = (time.perf_counter() - start) * 1000
+
+    deadline = time.perf_counter() + timeout
+    while _group_alive(proc.pid) and time.perf_counter() < deadline:
+        time.sleep(0.005)
+    total = (time.perf_counter() - start) * 1000
+
+    # ru_maxrss is KB on Linux, bytes on macOS
+    max_rss_kb = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    return wall, total, proc.returncode, max_rss_kb
+
+
+class Runner:
+    """
+    Run target invocations from a small helper process.
+
+    On Linux a child starts with its parent's peak RSS as its own ru_maxrss,
+    so spawning from the bench process (which holds corpus state) would
+    inflate every RSS figure. The helper is started before any corpus is
+    loaded and stays small.
+    """
+
+    def __init__(self):
+        self.proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--runner"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+        )
+
+    def run(self, argv: List[str], stdin: Optional[str], env: Dict[str, str],
+            cwd: str) -> Tuple[float, float, int, int]:
+        request = {"argv": argv, "stdin": stdin, "env": env, "cwd": cwd}
+        self.proc.stdin.write(json.dumps(request) + "\n")
+        self.proc.stdin.flush()
+        return tuple(json.loads(self.proc.stdout.readline()))
+
+    def close(self) -> None:
+        self.proc.stdin.close()
+        self.proc.wait()
+
+
+def runner_loop() -> None:
+    """Serve Runner requests: one JSON request per line in, one result out."""
+    for line in sys.stdin:
+        request = json.loads(line)
+        result = run_once(request["argv"], request["stdin"], request["env"], request["cwd"])
+        sys.stdout.write(json.dumps(result) + "\n")
+        sys.stdout.flush()
+
+
+def bench_target(name: str, ctx: Context, runner: Runner, iterations: int, warmup: int = 1) -> Dict:
+    """Benchmark a single target against one corpus."""
+    builder = TARGETS[name]
+    env = dict(os.environ)
+    env["CLAUDE_MEMORY_DIR"] = ctx.memory_dir
+    env.setdefault("CLAUDE_SESSION_ID", "bench")
+
+    walls: List[float] = []
+    totals: List[float] = []
+    written: List[int] = []
+    rss: List[int] = []
+    failures = 0
+
+    for i in range(warmup + iterations):
+        argv, stdin = builder(ctx, i)
+        before = snapshot(ctx.memory_dir)
+        wall, total, code, max_rss_kb = runner.run(argv, stdin, env, ctx.project_dir)
+        after = snapshot(ctx.memory_dir)
+        if i < warmup:
+            continue
+        walls.append(wall)
+        totals.append(total)
+        written.append(bytes_written(before, after))
+        rss.append(max_rss_kb)
+        if code != 0:
+            failures += 1
+
+    return {
+        "target": name,
+        "iterations": iterations,
+        "failures": failures,
+        "p50_ms": round(percentile(walls, 50), 2),
+        "p95_ms": round(percentile(walls, 95), 2),
+        "p99_ms": round(percentile(walls, 99), 2),
+        "max_ms": round(max(walls) if walls else 0.0, 2),
+        "total_p95_ms": round(percentile(totals, 95), 2),
+        "bytes_written": int(sum(written) / len(written)) if written else 0,
+        "max_rss_kb": max(rss) if rss else 0,
+    }
+
+
+# === Budgets ===
+
+def load_budgets(path: Optional[str]) -> Dict:
+    """Load the budget file ({"percentile": "p95", "targets": {...}})."""
+    if not path or not os.path.exists(path):
+        return {"percentile": "p95", "targets": {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def budget_for(budgets: Dict, target: str, size: int) -> Optional[float]:
+    """Resolve the budget (ms) for a target at a corpus size."""
+    entry = budgets.get("targets", {}).get(target, budgets.get("default_ms"))
+    if isinstance(entry, dict):
+        entry = entry.get(str(size), entry.get("default"))
+    return float(entry) if entry is not None else None
+
+
+def check_budgets(results: List[Dict], budgets: Dict, override_ms: Optional[float]) -> List[str]:
+    """Return one message per result that failed a run or exceeds its budget."""
+    key = f"{budgets.get('percentile', 'p95')}_ms"
+    violations = []
+    for result in results:
+        # A target that crashes finishes fast; failed runs never pass the gate
+        if result["failures"] > 0:
+            violations.append(
+                f"{result['target']} @ {result['size']} nodes: "
+                f"{result['failures']}/{result['iterations']} runs failed"
+            )
+        limit = override_ms if override_ms is not None else budget_for(budgets, result["target"], result["size"])
+        if limit is None:
+            continue
+        if result[key] > limit:
+            violations.append(
+                f"{result['target']} @ {result['size']} nodes: "
+                f"{key[:-3]} {result[key]}ms > budget {limit}ms"
+            )
+    return violations
+
+
+def print_table(results: List[Dict]) -> None:
+    """Print results as a plain-text table (times in ms)."""
+    header = (f"{'size':>7}  {'target':<20} {'p50':>8} {'p95':>8} {'p99':>8} "
+              f"{'total p95':>10} {'bytes/call':>11} {'rss MB':>7} {'fail':>5}")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['size']:>7}  {r['target']:<20} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+              f"{r['p99_ms']:>8.1f} {r['total_p95_ms']:>10.1f} {r['bytes_written']:>11} "
+              f"{r['max_rss_kb'] / 1024:>7.1f} {r['failures']:>5}")
+
+
+def main():
+    if sys.argv[1:] == ["--runner"]:
+        runner_loop()
+        return
+
+    parser = argparse.ArgumentParser(description="Benchmark memory hooks against synthetic graphs")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Comma-separated corpus sizes (node counts)")
+    parser.add_argument("--targets", default="all",
+                        help=f"Comma-separated targets or 'all'. Available: {', '.join(TARGETS)}")
+    parser.add_argument("--iterations", type=int, default=20,
+                        help="Measured runs per target")
+    parser.add_argument("--warmup", type=int, default=1,
+                        help="Unmeasured runs per target")
+    parser.add_argument("--seed", type=int, default=42,
+                        help="Seed for corpus and payload generation")
+    parser.add_argument("--work-dir", default=None,
+                        help="Directory for corpora (reused across runs; default: temp dir)")
+    parser.add_argument("--keep", action="store_true",
+                        help="Keep the temporary work directory")
+    parser.add_argument("--budget", default=DEFAULT_BUDGETS,
+                        help="Budget file (JSON)")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Apply a single budget to every target (overrides --budget)")
+    parser.add_argument("--json", action="store_true",
+                        help="Print results as JSON")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    if args.targets == "all":
+        targets = DEFAULT_TARGETS
+    else:
+        targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+        unknown = [t for t in targets if t not in TARGETS]
+        if unknown:
+            print(f"Unknown targets: {', '.join(unknown)}", file=sys.stderr)
+            sys.exit(2)
+
+    # Skip hook targets when the hooks aren't alongside the tool
+    runnable = []
+    for t in targets:
+        if t.startswith("hook:") and not os.path.isdir(HOOKS_DIR):
+            print(f"Skipping {t}: hooks not found at {HOOKS_DIR}", file=sys.stderr)
+            continue
+        runnable.append(t)
+
+    temp_dir = None
+    work_dir = args.work_dir
+    if not work_dir:
+        temp_dir = tempfile.mkdtemp(prefix="memory-graph-bench-")
+        work_dir = temp_dir
+    os.makedirs(work_dir, exist_ok=True)
+
+    results: List[Dict] = []
+    runner = Runner()
+    try:
+        for size in sizes:
+            print(f"Preparing corpus: {size} nodes...", file=sys.stderr)
+            memory_dir, project_dir = prepare_corpus(work_dir, size, args.seed)
+            ctx = Context(memory_dir, project_dir, args.seed)
+            for target in runnable:
+                print(f"  {target}...", file=sys.stderr)
+                result = bench_target(target, ctx, runner, args.iterations, args.warmup)
+                result["size"] = size
+                results.append(result)
+    finally:
+        runner.close()
+        if temp_dir and not args.keep:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    budgets = load_budgets(args.budget)
+    violations = check_budgets(results, budgets, args.budget_ms)
+
+    if args.json:
+        print(json.dumps({"results": results, "violations": violations}, indent=2))
+    else:
+        print_table(results)
+        if violations:
+            print("")
+            print("Budget exceeded:")
+            for v in violations:
+                print(f"  {v}")
+
+    sys.exit(1 if violations else 0)
+
+
+if __name__ == "__main__":
+    main()
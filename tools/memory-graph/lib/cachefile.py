@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Cache File - Indexed on-disk layout for graph.json
+
+graph.json stays a valid JSON document, but every entry of the nodes, tags,
+types, minhash, symbols and imports sections is written on its own line. A
+sorted sidecar (graph.idx) maps each entry to its byte offset and length, so
+readers can memory-map both files and decode single records instead of
+loading the whole graph.
+
+graph.idx layout:
+    line 1      JSON header: the graph.json size/mtime/inode it describes,
+                node_count, updated_at, version, graph_version, recent,
+                the stats block (lib/graphstats.py), the end of the
+                top-level scalars, and per-section entry counts and byte
+                ranges
+    lines 2..n  <kind><json-encoded key>\\t<offset>\\t<length>, sorted
+                by kind, then by the decoded key in str order (kind:
+                n = node, t = tag, y = type, m = MinHash band,
+                s = symbol name, i = imported node)
+
+Keys are ordered as decoded strings, not as their JSON bytes (which escape
+control and non-ASCII characters), so index scans page in the same order as
+the loaded store.
+
+An index whose header does not match the graph.json it is opened against is
+ignored, and callers fall back to a full json.load.
+"""
+
+import os
+import json
+import mmap
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+INDEX_FORMAT = 3
+SECTION_KINDS = {"nodes": b"n", "tags": b"t", "types": b"y", "minhash": b"m",
+                 "symbols": b"s", "imports": b"i"}
+
+_decoder = json.JSONDecoder()
+
+
+def index_path(cache_path: str) -> str:
+    """Sidecar index path for a graph.json path."""
+    root, _ = os.path.splitext(cache_path)
+    return root + ".idx"
+
+
+def _encode(value: Any) -> bytes:
+    return json.dumps(value).encode('utf-8')
+
+
+def write_cache(cache_path: str, cache: Dict) -> int:
+    """
+    Write graph.json and its index, each via temp file + rename.
+
+    graph.json is replaced first; a reader that sees the new cache with the
+    old index rejects the index and does a full load. Returns bytes written.
+    """
+    entries: List[Tuple[bytes, str, bytes, int, int]] = []
+    spans: Dict[str, List[int]] = {}
+    sections = [key for key in SECTION_KINDS if key in cache]
+    keys = [key for key in cache if key not in SECTION_KINDS] + sections
+
+    tmp_cache = f"{cache_path}.{os.getpid()}.tmp"
+    pos = 0
+    with open(tmp_cache, 'wb') as f:
+        def emit(data: bytes) -> None:
+            nonlocal pos
+            f.write(data)
+            pos += len(data)
+
+        emit(b'{\n')
+        meta_end = pos
+        for i, key in enumerate(keys):
+            trailer = b',\n' if i < len(keys) - 1 else b'\n'
+            if key not in SECTION_KINDS:
+                emit(b'  ' + _encode(key) + b': ' + _encode(cache[key]) + trailer)
+                meta_end = pos
+                continue
+
+            kind = SECTION_KINDS[key]
+            items = cache[key]
+            emit(b'  ' + _encode(key) + b': {\n')
+            section_start = pos
+            last = len(items) - 1
+            # Store-backed views hand over ready-encoded (often unchanged) bytes
+            if hasattr(items, "encoded_items"):
+                pairs = items.encoded_items()
+            else:
+                pairs = ((k, _encode(v)) for k, v in items.items())
+            for j, (entry_key, body) in enumerate(pairs):
+                encoded_key = _encode(entry_key)
+                emit(b'    ' + encoded_key + b': ')
+                entries.append((kind, entry_key, encoded_key, pos, len(body)))
+                emit(body + (b',\n' if j < last else b'\n'))
+            spans[key] = [section_start, pos]
+            emit(b'  }' + trailer)
+        emit(b'}\n')
+
+    st = os.stat(tmp_cache)
+    header = {
+        "format": INDEX_FORMAT,
+        "cache_size": st.st_size,
+        "cache_mtime_ns": st.st_mtime_ns,
+        "cache_ino": st.st_ino,
+        "version": cache.get("version", ""),
+        "graph_version": cache.get("graph_version", 0),
+        "updated_at": cache.get("updated_at", ""),
+        "node_count": cache.get("node_count", 0),
+        "recent": cache.get("recent", []),
+        "stats": cache.get("stats"),
+        "meta_end": meta_end,
+        "counts": {key: len(cache[key]) for key in sections},
+        "sections": spans,
+    }
+    entries.sort()
+
+    idx_file = index_path(cache_path)
+    tmp_idx = f"{idx_file}.{os.getpid()}.tmp"
+    with open(tmp_idx, 'wb') as f:
+        f.write(_encode(header) + b'\n')
+        f.write(b''.join(b'%s%s\t%d\t%d\n' % (kind, encoded_key, offset, length)
+                         for kind, _, encoded_key, offset, length in entries))
+        idx_size = f.tell()
+
+    os.replace(tmp_cache, cache_path)
+    os.replace(tmp_idx, idx_file)
+    return pos + idx_size
+
+
+def _check_header(header_line: bytes, st: os.stat_result) -> Optional[Dict]:
+    """Decoded index header if it describes the graph.json with stat st."""
+    header = json.loads(header_line)
+    if (header.get("format") != INDEX_FORMAT
+            or header.get("cache_size") != st.st_size
+            or header.get("cache_mtime_ns") != st.st_mtime_ns
+            or header.get("cache_ino") != st.st_ino
+            or st.st_size == 0):
+        return None
+    return header
+
+
+def read_header(cache_path: str) -> Optional[Dict]:
+    """Index header for cache_path (node_count, graph_version, ...), None if stale."""
+    try:
+        with open(index_path(cache_path), 'rb') as idx_f:
+            return _check_header(idx_f.readline(), os.stat(cache_path))
+    except (OSError, ValueError):
+        return None
+
+
+class CacheIndex:
+    """Read-only, memory-mapped view of graph.json through graph.idx."""
+
+    def __init__(self, header: Dict, index_map: mmap.mmap, cache_map: mmap.mmap, start: int):
+        self.header = header
+        self._index = index_map
+        self._cache = cache_map
+        self._start = start
+
+    @classmethod
+    def open(cls, cache_path: str) -> Optional["CacheIndex"]:
+        """Open the index for cache_path, or None if missing or stale."""
+        try:
+            with open(index_path(cache_path), 'rb') as idx_f, open(cache_path, 'rb') as cache_f:
+                header_line = idx_f.readline()
+                header = _check_header(header_line, os.fstat(cache_f.fileno()))
+                if header is None:
+                    return None
+                index_map = mmap.mmap(idx_f.fileno(), 0, access=mmap.ACCESS_READ)
+                cache_map = mmap.mmap(cache_f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        return cls(header, index_map, cache_map, len(header_line))
+
+    def _line(self, lo: int, mid: int) -> Tuple[int, int, bytes, str, bytes]:
+        """(start, end, kind, key, rest) of the entry line around mid."""
+        mm = self._index
+        start = mm.rfind(b'\n', lo, mid)
+        start = lo if start < 0 else start + 1
+        end = mm.find(b'\n', start)
+        if end < 0:
+            end = len(mm)
+        key, rest = mm[start + 1:end].split(b'\t', 1)
+        return start, end, mm[start:start + 1], json.loads(key), rest
+
+    def _find(self, kind: bytes, target: str) -> Optional[Tuple[int, int]]:
+        """Binary search the sorted entry lines for (kind, target)."""
+        lo, hi = self._start, len(self._index)
+        while lo < hi:
+            start, end, line_kind, key, rest = self._line(lo, (lo + hi) // 2)
+            if line_kind == kind and key == target:
+                offset, length = rest.split(b'\t')
+                return int(offset), int(length)
+            if (line_kind, key) < (kind, target):
+                lo = end + 1
+            else:
+                hi = start
+        return None
+
+    def _seek_after(self, kind: bytes, target: Optional[str]) -> int:
+        """Offset of the first entry line of kind sorting after target (None: the first)."""
+        lo, hi = self._start, len(self._index)
+        while lo < hi:
+            start, end, line_kind, key, _ = self._line(lo, (lo + hi) // 2)
+            if line_kind < kind or (line_kind == kind and target is not None and key <= target):
+                lo = end + 1
+            else:
+                hi = start
+        return lo
+
+    def scan_sorted(self, section: str, after: Optional[str] = None) -> Iterator[Tuple[str, int, int]]:
+        """
+        Yield (key, offset, length) of a section's entries in key order,
+        starting after `after`; one binary search, then a sequential read.
+        """
+        kind = SECTION_KINDS[section]
+        mm = self._index
+        pos = self._seek_after(kind, after)
+        while pos < len(mm) and mm[pos:pos + 1] == kind:
+            end = mm.find(b'\n', pos)
+            if end < 0:
+                end = len(mm)
+            key, offset, length = mm[pos + 1:end].split(b'\t')
+            yield json.loads(key), int(offset), int(length)
+            pos = end + 1
+
+    def value_at(self, offset: int, length: int) -> Any:
+        return json.loads(self._cache[offset:offset + length])
+
+    def get(self, section: str, key: str) -> Optional[Any]:
+        """Decode one entry of a section (nodes/tags/types/minhash/symbols/imports), or None."""
+        found = self._find(SECTION_KINDS[section], key)
+        if found is None:
+            return None
+        offset, length = found
+        return json.loads(self._cache[offset:offset + length])
+
+    def _next_element(self, pos: int, first: int, end: int) -> int:
+        """
+        Start of the first element of a posting array (written as
+        ["a", "b", ...], elements from first to end) at or after pos; end if
+        there is none. A '", "' whose quote is escaped lies inside an ID and
+        is skipped.
+        """
+        if pos <= first:
+            return first
+        mm = self._cache
+        sep = mm.find(b'", "', max(pos - 3, 0), end)
+        while sep >= 0:
+            quote = sep
+            while mm[quote - 1] == 0x5c:  # '\\'
+                quote -= 1
+            if (sep - quote) % 2 == 0 and sep + 3 >= pos:
+                return sep + 3
+            sep = mm.find(b'", "', sep + 1, end)
+        return end
+
+    def _element(self, start: int, end: int) -> Tuple[str, int]:
+        """(ID, start of the next element) for the posting element at start."""
+        stop = self._next_element(start + 1, start, end)
+        raw = self._cache[start:stop - 2 if stop < end else end]
+        return json.loads(raw), stop
+
+    def posting_after(self, section: str, label: str, after: Optional[str] = None) -> Iterator[str]:
+        """
+        Node IDs of one posting in ID order, starting after `after`. Postings
+        are written sorted, so the start is a binary search over the raw
+        array bytes and each ID is decoded only when reached: a page costs
+        O(page + log posting), not a decode of the whole posting.
+        """
+        found = self._find(SECTION_KINDS[section], label)
+        if found is None:
+            return
+        offset, length = found
+        first, end = offset + 1, offset + length - 1  # inside the brackets
+        lo = first
+        if lo >= end:
+            return
+        if after is not None:
+            hi = end
+            while lo < hi:
+                start = self._next_element((lo + hi) // 2, first, hi)
+                if start >= hi:
+                    hi = (lo + hi) // 2  # no element starts in the upper half
+                    continue
+                node_id, following = self._element(start, end)
+                if node_id <= after:
+                    lo = following
+                else:
+                    hi = start
+        while lo < end:
+            node_id, lo = self._element(lo, end)
+            yield node_id
+
+    def posting_sample(self, section: str, label: str, k: int, rng) -> List[str]:
+        """
+        Up to k distinct IDs of one posting at random positions: random byte
+        offsets aligned to the next element, so a draw decodes O(k) IDs
+        whatever the posting's length. Longer IDs are slightly favoured.
+        """
+        found = self._find(SECTION_KINDS[section], label)
+        if found is None:
+            return []
+        offset, length = found
+        first, end = offset + 1, offset + length - 1
+        if first >= end:
+            return []
+        picked: Dict[str, None] = {}
+        for _ in range(k * 3):  # Collisions on short postings end the draw early
+            if len(picked) >= k:
+                break
+            start = self._next_element(rng.randrange(first, end), first, end)
+            picked[self._element(start if start < end else first, end)[0]] = None
+        return list(picked)
+
+    def iter_section(self, section: str) -> Iterator[Tuple[str, Any]]:
+        """Yield (key, value) entries of a section in graph.json order."""
+        start, end = self.header["sections"].get(section, (0, 0))
+        decode = _decoder.raw_decode
+        mm = self._cache
+        while start < end:
+            line_end = mm.find(b'\n', start, end)
+            if line_end < 0:
+                line_end = end
+            line = mm[start:line_end].decode('utf-8')
+            key, pos = decode(line, line.index('"'))
+            value, _ = decode(line, line.index(':', pos) + 2)
+            yield key, value
+            start = line_end + 1
+
+    def scan_section(self, section: str) -> Iterator[Tuple[str, int, int]]:
+        """Yield (key, offset, length) of each entry's value, without decoding it."""
+        start, end = self.header["sections"].get(section, (0, 0))
+        mm = self._cache
+        find = mm.find
+        pos = start
+        while pos < end:
+            line_end = find(b'\n', pos, end)
+            if line_end < 0:
+                line_end = end
+            key_end = find(b'": ', pos, line_end)
+            raw_key = mm[pos + 5:key_end]
+            if b'\\' in raw_key:
+                # Escaped key: let the decoder find where it really ends
+                line = mm[pos:line_end].decode('utf-8')
+                key, key_stop = _decoder.raw_decode(line, line.index('"'))
+                key_end = pos + len(line[:key_stop].encode('utf-8')) - 1
+            else:
+                key = raw_key.decode('utf-8')
+            value_start = key_end + 3
+            value_end = line_end - 1 if mm[line_end - 1] == 0x2c else line_end  # ','
+            yield key, value_start, value_end - value_start
+            pos = line_end + 1
+
+    def load_meta(self) -> Dict:
+        """Decode only the top-level scalars (version, updated_at, recent, ...)."""
+        head = self._cache[:self.header["meta_end"]].rstrip(b',\n')
+        return json.loads(head + b'}')
+
+    @property
+    def source(self) -> mmap.mmap:
+        """The mapped graph.json snapshot."""
+        return self._cache
+
+    def load_all(self) -> Dict:
+        """Decode the whole cache from the mapped snapshot."""
+        return json.loads(self._cache[:])
+
+    def close(self) -> None:
+        self._index.close()
+        self._cache.close()
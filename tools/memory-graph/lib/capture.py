@@ -10,19 +10,34 @@ import hashlib
 import re
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Callable, Iterable, Optional, Dict, List, Sequence, Set, Tuple, Union
 
 # Add lib directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from parser import create_node
+from parser import bump_access_count, create_node
 from graph import MemoryGraph
+from dedupe import find_similar, load_threshold
+from summarize import SummaryCache, detect_language, format_sections, node_content_hash, summarize_file
+from profiling import add_bytes, profiled, set_memory_dir, span
+import packfile
 
+DEFAULT_SUMMARIZE_LANGUAGES = ["typescript", "javascript", "python", "go"]
+SUMMARY_PLACEHOLDER = "(To be filled by Claude after reading the file)"
 
-def sync_graph_cache(memory_dir: str, node_path: str) -> None:
-    """Update the graph cache after creating/updating a node."""
+
+@profiled("capture.sync")
+def sync_graph_cache(memory_dir: str, node_paths: Union[str, Iterable[str]],
+                     graph: Optional[MemoryGraph] = None) -> None:
+    """
+    Update the graph cache after creating/updating nodes. A capture collects
+    every node file it wrote and syncs them here with one graph.json save.
+    """
+    if isinstance(node_paths, str):
+        node_paths = [node_paths]
     try:
-        graph = MemoryGraph(memory_dir)
-        graph.update_single_node(node_path)
+        if graph is None:
+            graph = MemoryGraph(memory_dir)
+        graph.apply_changes(node_paths)
     except Exception:
         # Don't fail the capture if graph sync fails
         pass
@@ -66,11 +81,18 @@ def clear_current_task(memory_dir: str) -> None:
             pass
 
 
-def add_link_to_node(memory_dir: str, node_type: str, node_id: str, link_target: str) -> bool:
-    """Add a link from one node to another (updates the 'related' field)."""
-    node_path = get_node_path(memory_dir, node_type, node_id)
+def add_link_to_node(memory_dir: str, node_type: str, node_id: str, link_target: str,
+                     graph: Optional[MemoryGraph] = None,
+                     touched: Optional[Set[str]] = None) -> bool:
+    """
+    Add a link from one node to another (updates the 'related' field).
+
+    If touched is given, the rewritten node path is added to it and the
+    caller syncs the cache; otherwise the cache is synced here.
+    """
+    node_path = locate_node(memory_dir, node_type, node_id, graph)
 
-    if not os.path.exists(node_path):
+    if node_path is None:
         return False
 
     try:
@@ -110,9 +132,12 @@ def add_link_to_node(memory_dir: str, node_type: str, node_id: str, link_target:
 
             with open(node_path, 'w', encoding='utf-8') as f:
                 f.write(content)
+                add_bytes(written=f.tell())
 
-            # Sync graph cache
-            sync_graph_cache(memory_dir, node_path)
+            if touched is not None:
+                touched.add(node_path)
+            else:
+                sync_graph_cache(memory_dir, node_path, graph)
             return True
     except Exception:
         pass
@@ -174,17 +199,58 @@ def get_node_path(memory_dir: str, node_type: str, node_id: str) -> str:
     return os.path.join(memory_dir, "nodes", subdir, f"{node_id}.md")
 
 
-def node_exists(memory_dir: str, node_type: str, node_id: str) -> bool:
-    """Check if a node already exists."""
+def packed_node_path(memory_dir: str, node_id: str,
+                     graph: Optional[MemoryGraph] = None) -> Optional[str]:
+    """Virtual path of node_id if the graph holds it as a live pack member."""
+    if not os.path.exists(packfile.pack_path(memory_dir)):
+        return None
+    if graph is None:
+        graph = MemoryGraph(memory_dir)
+    data = graph.get_node(node_id)
+    path = data.get("path", "") if data else ""
+    if packfile.split_path(path) is None or not packfile.node_exists(path):
+        return None
+    return path
+
+
+def node_exists(memory_dir: str, node_type: str, node_id: str,
+                graph: Optional[MemoryGraph] = None) -> bool:
+    """Check if a node already exists, as a loose file or in the pack."""
     path = get_node_path(memory_dir, node_type, node_id)
-    return os.path.exists(path)
+    return os.path.exists(path) or packed_node_path(memory_dir, node_id, graph) is not None
 
 
-def update_node_timestamp(memory_dir: str, node_type: str, node_id: str) -> bool:
-    """Update the 'updated' timestamp in an existing node."""
+def locate_node(memory_dir: str, node_type: str, node_id: str,
+                graph: Optional[MemoryGraph] = None) -> Optional[str]:
+    """
+    Loose file of an existing node, or None. A packed node (e.g. cold-stored
+    by retention) is unpacked first, so it is updated in place rather than
+    shadowed by a fresh file.
+    """
     path = get_node_path(memory_dir, node_type, node_id)
+    if os.path.exists(path):
+        return path
+    if graph is None:
+        graph = MemoryGraph(memory_dir)
+    packed = packed_node_path(memory_dir, node_id, graph)
+    if packed is None:
+        return None
+    packfile.unpack_nodes(graph, [node_id])
+    path = os.path.join(graph.nodes_dir, packfile.split_path(packed)[1])
+    return path if os.path.exists(path) else None
+
 
-    if not os.path.exists(path):
+def update_node_timestamp(memory_dir: str, node_type: str, node_id: str,
+                          transform: Optional[Callable[[str], str]] = None,
+                          graph: Optional[MemoryGraph] = None) -> bool:
+    """
+    Update the 'updated' timestamp and bump 'access_count' in an existing node.
+    transform, if given, edits the node text in the same write. The cache is
+    left to the caller.
+    """
+    path = locate_node(memory_dir, node_type, node_id, graph)
+
+    if path is None:
         return False
 
     try:
@@ -200,48 +266,82 @@ def update_node_timestamp(memory_dir: str, node_type: str, node_id: str) -> bool
             flags=re.MULTILINE
         )
 
+        # Access count feeds the retention policy (graph.py gc)
+        content = bump_access_count(content)
+        if transform:
+            content = transform(content)
+
         with open(path, 'w', encoding='utf-8') as f:
             f.write(content)
+            add_bytes(written=f.tell())
 
         return True
     except Exception:
         return False
 
 
-def capture_file_access(
-    memory_dir: str,
-    file_path: str,
-    action: str = "read"
-) -> Dict:
+def merge_similar(memory_dir: str, node_type: str, text: str,
+                  related: Sequence[str] = (),
+                  graph: Optional[MemoryGraph] = None,
+                  touched: Optional[Set[str]] = None) -> Optional[Dict]:
     """
-    Capture a file access event and create/update a file-summary node.
+    Fold a near-duplicate capture into the existing node instead of creating
+    a new one: bump its access_count and add any new links. touched works as
+    in add_link_to_node.
 
-    Args:
-        memory_dir: Path to memory directory
-        file_path: Path to the file being accessed
-        action: Type of access (read, edit, write)
-
-    Returns:
-        Dict with status and node_id
+    Returns the capture result, or None if nothing is similar enough.
     """
-    node_id = file_path_to_node_id(file_path)
-    node_type = "file-summary"
+    try:
+        if graph is None:
+            graph = MemoryGraph(memory_dir)
+        match = find_similar(graph, node_type, text, load_threshold(memory_dir))
+    except Exception:
+        return None
+    if not match:
+        return None
+
+    node_id, score = match
+    if not update_node_timestamp(memory_dir, node_type, node_id, graph=graph):
+        return None
+    paths = {get_node_path(memory_dir, node_type, node_id)}
+    for target in related:
+        add_link_to_node(memory_dir, node_type, node_id, target, graph, paths)
+    if touched is not None:
+        touched.update(paths)
+    else:
+        sync_graph_cache(memory_dir, paths, graph)
+    return {"status": "merged", "node_id": node_id, "similarity": round(score, 2)}
 
-    # Check if node exists
-    if node_exists(memory_dir, node_type, node_id):
-        # Just update timestamp
-        update_node_timestamp(memory_dir, node_type, node_id)
 
-        # Auto-link to current task if one is active
-        current_task = get_current_task(memory_dir)
-        if current_task:
-            # Link file → task (bidirectional)
-            add_link_to_node(memory_dir, "file-summary", node_id, current_task)
-            add_link_to_node(memory_dir, "task", current_task, node_id)
+def summarize_languages(memory_dir: str) -> List[str]:
+    """"capture": {"auto_summarize_languages": [...]} from config.json, else the default."""
+    try:
+        with open(os.path.join(memory_dir, "config.json"), 'r', encoding='utf-8') as f:
+            return list(json.load(f).get("capture", {}).get("auto_summarize_languages",
+                                                            DEFAULT_SUMMARIZE_LANGUAGES))
+    except (OSError, ValueError, AttributeError, TypeError):
+        return DEFAULT_SUMMARIZE_LANGUAGES
 
-        return {"status": "updated", "node_id": node_id}
 
-    # Create new node
+def summarize_captured_file(memory_dir: str, file_path: str) -> Optional[Dict]:
+    """Cached heuristic summary of file_path, if it exists and its language is auto-summarized."""
+    if detect_language(file_path) not in summarize_languages(memory_dir) or not os.path.isfile(file_path):
+        return None
+    try:
+        with span("capture.summarize"):
+            return summarize_file(file_path, memory_dir)
+    except (OSError, ValueError, RecursionError):
+        return None
+
+
+def import_node_ids(summary: Dict) -> List[str]:
+    """File-summary node IDs of the files a summary's relative imports resolve to."""
+    return [file_path_to_node_id(path) for path in summary.get("local_imports", [])]
+
+
+def file_summary_node(file_path: str, action: str, summary: Optional[Dict],
+                      access_count: int = 1) -> Tuple[str, str]:
+    """(node_id, node text) of a new file-summary node for file_path."""
     # Extract file name and extension for tags
     basename = os.path.basename(file_path)
     ext = os.path.splitext(basename)[1].lstrip('.')
@@ -258,50 +358,206 @@ def capture_file_access(
     if parent_dir and parent_dir not in ['.', '..']:
         tags.append(sanitize_id(parent_dir))
 
-    # Create minimal content - Claude will fill in details later
-    title = file_path
-    content = f"""File accessed via {action} operation.
+    extra_frontmatter = {
+        "file_path": file_path,
+        "session_id": get_session_id(),
+        "last_action": action,
+        "access_count": access_count
+    }
+
+    # Heuristic summary where the language is supported (cached by content
+    # hash); otherwise minimal content - Claude will fill in details later
+    if summary:
+        content = f"""File accessed via {action} operation.
 
 ## Purpose
-(To be filled by Claude after reading the file)
+{summary["description"] or SUMMARY_PLACEHOLDER}
+
+{format_sections(summary)}"""
+        extra_frontmatter.update({
+            "language": summary["language"],
+            "line_count": summary["line_count"],
+            "content_hash": summary["content_hash"],
+            "imports": import_node_ids(summary),
+        })
+    else:
+        content = f"""File accessed via {action} operation.
+
+## Purpose
+{SUMMARY_PLACEHOLDER}
 
 ## Key Elements
 (To be filled by Claude)
 """
 
-    extra_frontmatter = {
-        "file_path": file_path,
-        "session_id": get_session_id(),
-        "last_action": action
-    }
-
-    node_content = create_node(
+    node_id = file_path_to_node_id(file_path)
+    return node_id, create_node(
         node_id=node_id,
-        node_type=node_type,
-        title=title,
+        node_type="file-summary",
+        title=file_path,
         content=content,
         tags=tags,
         related=[],
         extra_frontmatter=extra_frontmatter
     )
 
+
+def _set_frontmatter(text: str, key: str, value) -> str:
+    """Set key in the node's frontmatter, adding it before the closing ---."""
+    end = text.find('\n---', 3)
+    if end < 0:
+        return text
+    head, body = text[:end], text[end:]
+    head, found = re.subn(rf'^{key}:.*$', f'{key}: {value}', head, count=1, flags=re.MULTILINE)
+    if not found:
+        head += f'\n{key}: {value}'
+    return head + body
+
+
+def _replace_section(text: str, heading: str, section: str) -> str:
+    """Replace the "## heading" section (up to the next ## heading) with section, or append it."""
+    pattern = re.compile(rf'^## {re.escape(heading)}\n.*?(?=^## |\Z)', re.MULTILINE | re.DOTALL)
+    if pattern.search(text):
+        return pattern.sub(lambda _: section, text, count=1)
+    if not section:
+        return text
+    return text.rstrip('\n') + '\n\n' + section
+
+
+def refresh_file_summary(text: str, summary: Dict) -> str:
+    """
+    Existing file-summary node text with the extracted parts replaced:
+    Key Exports, Dependencies, the summary frontmatter fields, and Purpose
+    or the Key Elements placeholder only while they are still placeholders.
+    Anything else (notes, links, tags) is kept.
+    """
+    sections = format_sections(summary)
+    for heading in ("Key Exports", "Dependencies"):
+        match = re.search(rf'^## {heading}\n.*?(?=^## |\Z)', sections, re.MULTILINE | re.DOTALL)
+        text = _replace_section(text, heading, match.group(0) if match else "")
+    if summary["description"]:
+        text = text.replace(f"## Purpose\n{SUMMARY_PLACEHOLDER}\n", f"## Purpose\n{summary['description']}\n", 1)
+    text = text.replace("## Key Elements\n(To be filled by Claude)\n", "", 1)
+
+    for key in ("language", "line_count", "content_hash"):
+        text = _set_frontmatter(text, key, summary[key])
+    text = _set_frontmatter(text, "imports", f"[{', '.join(import_node_ids(summary))}]")
+    now = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    return re.sub(r'^(updated:\s*)[\d\-T:Z]+', f'\\g<1>{now}', text, count=1, flags=re.MULTILINE)
+
+
+def _listed_symbols(text: str) -> List[Tuple[str, str]]:
+    """(kind, name) pairs listed under the node's "## Key Exports"."""
+    match = re.search(r'^## Key Exports\n(.*?)(?=^## |\Z)', text, re.MULTILINE | re.DOTALL)
+    return re.findall(r'^- `(\S+) ([^`]+)`', match.group(1), re.MULTILINE) if match else []
+
+
+def refresh_captured_summary(memory_dir: str, file_path: str, text: str) -> Tuple[str, Optional[Dict]]:
+    """
+    (text, diff) for a file-summary node: when file_path's content hash
+    differs from the node's content_hash, the summary sections are refreshed
+    from the (cached) summarizer and diff lists the symbols added and removed.
+    An unchanged file costs one hash and returns (text, None).
+    """
+    old_hash = node_content_hash(text)
+    summary = None
+    if detect_language(file_path) in summarize_languages(memory_dir) and os.path.isfile(file_path):
+        try:
+            with span("capture.summarize"):
+                summary = summarize_file(file_path, memory_dir, unless_hash=old_hash)
+        except (OSError, ValueError, RecursionError):
+            pass
+    if summary is None:
+        return text, None
+
+    # Old symbol set: the summary cached for the old content, else the node's own list
+    old_summary = SummaryCache(memory_dir).get(old_hash, summary["language"]) if old_hash else None
+    if old_summary:
+        before = [(s["kind"], s["name"]) for s in old_summary.get("symbols", [])]
+    else:
+        before = _listed_symbols(text)
+    after = [(s["kind"], s["name"]) for s in summary["symbols"]]
+    before_set, after_set = set(before), set(after)
+    diff = {
+        "added": [f"{kind} {name}" for kind, name in after if (kind, name) not in before_set],
+        "removed": [f"{kind} {name}" for kind, name in before if (kind, name) not in after_set],
+    }
+    return refresh_file_summary(text, summary), diff
+
+
+def capture_file_access(
+    memory_dir: str,
+    file_path: str,
+    action: str = "read"
+) -> Dict:
+    """
+    Capture a file access event and create/update a file-summary node.
+
+    Args:
+        memory_dir: Path to memory directory
+        file_path: Path to the file being accessed
+        action: Type of access (read, edit, write)
+
+    Returns:
+        Dict with status and node_id
+    """
+    node_id = file_path_to_node_id(file_path)
+    node_type = "file-summary"
+    # One graph per capture; every node written is synced in one save
+    graph = MemoryGraph(memory_dir)
+    touched: Set[str] = set()
+
+    # Check if node exists
+    if node_exists(memory_dir, node_type, node_id, graph):
+        # Update timestamp and access count; if the file's content changed
+        # since it was summarized, refresh the summary sections in the same write
+        diffs: List[Dict] = []
+
+        def refresh(text: str) -> str:
+            text, diff = refresh_captured_summary(memory_dir, file_path, text)
+            if diff is not None:
+                diffs.append(diff)
+            return text
+
+        if update_node_timestamp(memory_dir, node_type, node_id, transform=refresh, graph=graph):
+            touched.add(get_node_path(memory_dir, node_type, node_id))
+
+        # Auto-link to current task if one is active
+        current_task = get_current_task(memory_dir)
+        if current_task:
+            # Link file → task (bidirectional)
+            add_link_to_node(memory_dir, "file-summary", node_id, current_task, graph, touched)
+            add_link_to_node(memory_dir, "task", current_task, node_id, graph, touched)
+        sync_graph_cache(memory_dir, touched, graph)
+
+        result = {"status": "updated", "node_id": node_id}
+        if diffs:
+            result["summary"] = diffs[0]
+        return result
+
+    # Create new node
+    _, node_content = file_summary_node(file_path, action, summarize_captured_file(memory_dir, file_path))
+
     # Write node file
     node_path = get_node_path(memory_dir, node_type, node_id)
     os.makedirs(os.path.dirname(node_path), exist_ok=True)
 
     with open(node_path, 'w', encoding='utf-8') as f:
         f.write(node_content)
+        add_bytes(written=f.tell())
 
-    # Sync graph cache
-    sync_graph_cache(memory_dir, node_path)
+    touched.add(node_path)
 
     # Auto-link to current task if one is active
     current_task = get_current_task(memory_dir)
     if current_task:
         # Link file → task
-        add_link_to_node(memory_dir, "file-summary", node_id, current_task)
+        add_link_to_node(memory_dir, "file-summary", node_id, current_task, graph, touched)
         # Link task → file
-        add_link_to_node(memory_dir, "task", current_task, node_id)
+        add_link_to_node(memory_dir, "task", current_task, node_id, graph, touched)
+
+    # Sync graph cache
+    sync_graph_cache(memory_dir, touched, graph)
 
     return {"status": "created", "node_id": node_id}
 
@@ -325,9 +581,10 @@ def capture_task(
     # Create ID from task content
     node_id = f"task-{sanitize_id(task_content)}"
     node_type = "task"
+    graph = MemoryGraph(memory_dir)
 
     # Check if node exists
-    if node_exists(memory_dir, node_type, node_id):
+    if node_exists(memory_dir, node_type, node_id, graph):
         # Update timestamp and potentially status
         node_path = get_node_path(memory_dir, node_type, node_id)
         try:
@@ -350,6 +607,10 @@ def capture_task(
 
             with open(node_path, 'w', encoding='utf-8') as f:
                 f.write(content)
+                add_bytes(written=f.tell())
+
+            # Keep task_status current in the cache (retention reads it)
+            sync_graph_cache(memory_dir, node_path, graph)
 
             # Update current task tracking for auto-linking
             if task_status == "in_progress":
@@ -397,9 +658,10 @@ def capture_task(
 
     with open(node_path, 'w', encoding='utf-8') as f:
         f.write(node_content)
+        add_bytes(written=f.tell())
 
     # Sync graph cache
-    sync_graph_cache(memory_dir, node_path)
+    sync_graph_cache(memory_dir, node_path, graph)
 
     # Set current task for auto-linking if in_progress
     if task_status == "in_progress":
@@ -431,8 +693,11 @@ def capture_discovery(
     node_id = f"discovery-{category}-{content_hash}"
     node_type = "discovery"
 
+    graph = MemoryGraph(memory_dir)
+    touched: Set[str] = set()
+
     # Check if exists (unlikely with hash, but check anyway)
-    if node_exists(memory_dir, node_type, node_id):
+    if node_exists(memory_dir, node_type, node_id, graph):
         return {"status": "exists", "node_id": node_id}
 
     tags = ["discovery", category]
@@ -448,6 +713,14 @@ def capture_discovery(
     if current_task and current_task not in related:
         related.append(current_task)
 
+    # Reworded versions of a known insight add to it rather than a new node
+    merged = merge_similar(memory_dir, node_type, insight, related, graph, touched)
+    if merged:
+        if current_task:
+            add_link_to_node(memory_dir, "task", current_task, merged["node_id"], graph, touched)
+        sync_graph_cache(memory_dir, touched, graph)
+        return merged
+
     title = f"{category.title()}: {insight[:60]}"
     content = f"""## Discovery
 {insight}
@@ -479,13 +752,16 @@ def capture_discovery(
 
     with open(node_path, 'w', encoding='utf-8') as f:
         f.write(node_content)
+        add_bytes(written=f.tell())
 
-    # Sync graph cache
-    sync_graph_cache(memory_dir, node_path)
+    touched.add(node_path)
 
     # Link current task to this discovery (bidirectional)
     if current_task:
-        add_link_to_node(memory_dir, "task", current_task, node_id)
+        add_link_to_node(memory_dir, "task", current_task, node_id, graph, touched)
+
+    # Sync graph cache
+    sync_graph_cache(memory_dir, touched, graph)
 
     return {"status": "created", "node_id": node_id}
 
@@ -514,8 +790,9 @@ def capture_error(
     content_hash = hashlib.md5(error_message.encode()).hexdigest()[:8]
     node_id = f"error-{sanitize_id(error_type)}-{content_hash}"
     node_type = "error"
+    graph = MemoryGraph(memory_dir)
 
-    if node_exists(memory_dir, node_type, node_id):
+    if node_exists(memory_dir, node_type, node_id, graph):
         return {"status": "exists", "node_id": node_id}
 
     tags = ["error", sanitize_id(error_type)]
@@ -562,9 +839,10 @@ def capture_error(
 
     with open(node_path, 'w', encoding='utf-8') as f:
         f.write(node_content)
+        add_bytes(written=f.tell())
 
     # Sync graph cache
-    sync_graph_cache(memory_dir, node_path)
+    sync_graph_cache(memory_dir, node_path, graph)
 
     return {"status": "created", "node_id": node_id}
 
@@ -590,8 +868,11 @@ def capture_subagent(
     node_id = f"subagent-{sanitize_id(agent_type)}-{content_hash}"
     node_type = "subagent"
 
+    graph = MemoryGraph(memory_dir)
+    touched: Set[str] = set()
+
     # Check if this exact result already exists
-    if node_exists(memory_dir, node_type, node_id):
+    if node_exists(memory_dir, node_type, node_id, graph):
         return {"status": "exists", "node_id": node_id}
 
     tags = ["subagent", sanitize_id(agent_type)]
@@ -602,6 +883,13 @@ def capture_subagent(
     if current_task:
         related.append(current_task)
 
+    merged = merge_similar(memory_dir, node_type, summary, related, graph, touched)
+    if merged:
+        if current_task:
+            add_link_to_node(memory_dir, "task", current_task, merged["node_id"], graph, touched)
+        sync_graph_cache(memory_dir, touched, graph)
+        return merged
+
     title = f"Agent: {agent_type}"
     content = f"""## Subagent Result
 **Agent Type:** {agent_type}
@@ -633,13 +921,16 @@ Session: {get_session_id()}
 
     with open(node_path, 'w', encoding='utf-8') as f:
         f.write(node_content)
+        add_bytes(written=f.tell())
 
-    # Sync graph cache
-    sync_graph_cache(memory_dir, node_path)
+    touched.add(node_path)
 
     # Link current task to this subagent result (bidirectional)
     if current_task:
-        add_link_to_node(memory_dir, "task", current_task, node_id)
+        add_link_to_node(memory_dir, "task", current_task, node_id, graph, touched)
+
+    # Sync graph cache
+    sync_graph_cache(memory_dir, touched, graph)
 
     return {"status": "created", "node_id": node_id}
 
@@ -690,20 +981,23 @@ if __name__ == "__main__":
     args = parser.parse_args()
 
     memory_dir = os.environ.get("CLAUDE_MEMORY_DIR", args.memory_dir)
+    set_memory_dir(memory_dir)
 
-    if args.command == "file":
-        result = capture_file_access(memory_dir, args.file_path, args.action)
-    elif args.command == "task":
-        result = capture_task(memory_dir, args.content, args.status)
-    elif args.command == "discovery":
-        result = capture_discovery(memory_dir, args.category, args.insight, args.related)
-    elif args.command == "error":
-        result = capture_error(memory_dir, args.error_type, args.message,
-                              args.context, args.related)
-    elif args.command == "subagent":
-        result = capture_subagent(memory_dir, args.agent_type, args.summary)
-    else:
+    if not args.command:
         parser.print_help()
         sys.exit(1)
 
+    with span(f"capture.{args.command}"):
+        if args.command == "file":
+            result = capture_file_access(memory_dir, args.file_path, args.action)
+        elif args.command == "task":
+            result = capture_task(memory_dir, args.content, args.status)
+        elif args.command == "discovery":
+            result = capture_discovery(memory_dir, args.category, args.insight, args.related)
+        elif args.command == "error":
+            result = capture_error(memory_dir, args.error_type, args.message,
+                                  args.context, args.related)
+        elif args.command == "subagent":
+            result = capture_subagent(memory_dir, args.agent_type, args.summary)
+
     print(json.dumps(result))
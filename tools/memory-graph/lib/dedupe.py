@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Dedupe - MinHash near-duplicate detection for captured insights
+
+Discovery and subagent nodes get a MinHash signature of their payload text
+(word 2-gram shingles, NUM_PERM 8-bit minimums, hex-encoded in the node's
+cache entry as "minhash"). The signature is cut into BANDS bands whose hashes
+are kept as postings in graph.json's "minhash" section, maintained through
+the secondary index hook like any other derived index. Two texts with
+Jaccard similarity s share at least one band with probability
+1 - (1 - s^ROWS)^BANDS (about 0.98 at s = 0.75), so finding candidates is a
+handful of indexed lookups rather than a scan.
+
+capture.py merges a new discovery/subagent result into the most similar
+existing node at or above the threshold. `graph.py dedupe` does the same
+for an existing corpus: each near-duplicate group keeps its oldest node and
+marks the rest superseded, linking them to it.
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+import random
+import argparse
+from typing import Dict, List, Optional, Set, Tuple
+
+import packfile
+from parser import bump_access_count
+
+# Node type -> the "## Section" holding the text to compare. Other sections
+# (session IDs, categories) would only add noise.
+DEDUPE_TYPES = {"discovery": "Discovery", "subagent": "Summary"}
+
+NUM_PERM = 120
+BANDS = 20
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 2
+DEFAULT_THRESHOLD = 0.75
+SECTION = "minhash"
+
+_rng = random.Random(0x6d696e68)  # Fixed: signatures must be stable across runs
+_MASKS = [_rng.getrandbits(32) for _ in range(NUM_PERM)]
+_HEX = 2  # hex digits per signature value
+
+
+def shingles(text: str) -> Set[bytes]:
+    """128-bit hashes of the word n-grams of normalized text."""
+    words = re.findall(r'\w+', text.lower())
+    if len(words) < SHINGLE_WORDS:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = [" ".join(words[i:i + SHINGLE_WORDS])
+                 for i in range(len(words) - SHINGLE_WORDS + 1)]
+    return {hashlib.blake2b(gram.encode('utf-8'), digest_size=16).digest() for gram in grams}
+
+
+def signature(text: str) -> Optional[str]:
+    """
+    Hex MinHash signature of text, None if it has no words.
+
+    Each shingle hash gives four independent 32-bit values; permutation i is
+    value i % 4 XORed with a random mask. min(map(mask.__xor__, ...)) runs
+    at C speed, several times faster than (a*x + b) mod p per permutation.
+    """
+    hashes = shingles(text)
+    if not hashes:
+        return None
+    columns = [[int.from_bytes(h[i:i + 4], 'little') for h in hashes] for i in range(0, 16, 4)]
+    return "".join(f"{min(map(mask.__xor__, columns[i % 4])) & 0xff:02x}"
+                   for i, mask in enumerate(_MASKS))
+
+
+def similarity(sig_a: str, sig_b: str) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    if not sig_a or len(sig_a) != len(sig_b):
+        return 0.0
+    same = sum(1 for i in range(0, len(sig_a), _HEX) if sig_a[i:i + _HEX] == sig_b[i:i + _HEX])
+    return same / NUM_PERM
+
+
+def band_labels(sig: str) -> List[str]:
+    """LSH bucket labels: band number + that band's slice of the signature."""
+    width = ROWS * _HEX
+    return [f"{band}:{sig[band * width:(band + 1) * width]}" for band in range(BANDS)]
+
+
+def section_text(content: str, heading: str) -> str:
+    """Body of a "## heading" section, or the whole content if absent."""
+    match = re.search(rf'^## {re.escape(heading)}\s*$(.*?)(?=^## |\Z)',
+                      content, re.MULTILINE | re.DOTALL)
+    return match.group(1).strip() if match else content
+
+
+def node_signature(node_type: str, content: str) -> Optional[str]:
+    """Signature for a node of a deduplicated type, else None."""
+    heading = DEDUPE_TYPES.get(node_type)
+    if heading is None:
+        return None
+    return signature(section_text(content, heading))
+
+
+def update_band_index(graph, node_id: str, old: Optional[Dict], new: Optional[Dict]) -> None:
+    """Secondary index hook: keep the minhash band postings in step."""
+    old_sig = old.get(SECTION) if old else None
+    new_sig = new.get(SECTION) if new else None
+    if old_sig == new_sig:
+        return
+    store = graph.store
+    if old_sig:
+        for label in band_labels(old_sig):
+            store.remove_posting(SECTION, label, node_id)
+    if new_sig:
+        for label in band_labels(new_sig):
+            store.add_posting(SECTION, label, node_id)
+
+
+def load_threshold(memory_dir: str) -> float:
+    """"dedupe": {"threshold": ...} from config.json, else the default."""
+    try:
+        with open(os.path.join(memory_dir, "config.json"), 'r', encoding='utf-8') as f:
+            return float(json.load(f).get("dedupe", {}).get("threshold", DEFAULT_THRESHOLD))
+    except (OSError, ValueError, AttributeError):
+        return DEFAULT_THRESHOLD
+
+
+def find_similar(graph, node_type: str, text: str,
+                 threshold: float = DEFAULT_THRESHOLD) -> Optional[Tuple[str, float]]:
+    """(node_id, similarity) of the closest active node of node_type, if any."""
+    sig = signature(text) if node_type in DEDUPE_TYPES else None
+    if not sig:
+        return None
+    candidates: Set[str] = set()
+    for label in band_labels(sig):
+        candidates.update(graph.get_posting(SECTION, label))
+
+    best = None
+    for node_id in sorted(candidates):
+        data = graph.get_node(node_id)
+        if not data or data.get("type") != node_type or data.get("status", "active") != "active":
+            continue
+        score = similarity(sig, data.get(SECTION, ""))
+        if score >= threshold and (best is None or score > best[1]):
+            best = (node_id, score)
+    return best
+
+
+def find_duplicates(graph, threshold: float = DEFAULT_THRESHOLD) -> List[Tuple[str, List[Tuple[str, float]]]]:
+    """
+    Near-duplicate groups among active nodes, as (kept, [(duplicate, similarity)]).
+    The oldest node of a group is kept.
+    """
+    store = graph.store
+    parent: Dict[str, str] = {}
+
+    def root(node_id: str) -> str:
+        while parent.get(node_id, node_id) != node_id:
+            node_id = parent[node_id]
+        return node_id
+
+    nodes: Dict[str, Dict] = {}
+    for label in list(store.posting_labels(SECTION)):
+        bucket = store.postings(SECTION, label) or []
+        if len(bucket) < 2:
+            continue
+        for node_id in bucket:
+            if node_id not in nodes:
+                nodes[node_id] = store.get(node_id) or {}
+        for i, a in enumerate(bucket):
+            for b in bucket[i + 1:]:
+                if root(a) == root(b):
+                    continue
+                da, db = nodes[a], nodes[b]
+                if da.get("type") != db.get("type") or \
+                        da.get("status", "active") != "active" or db.get("status", "active") != "active":
+                    continue
+                if similarity(da.get(SECTION, ""), db.get(SECTION, "")) >= threshold:
+                    parent[root(b)] = root(a)
+
+    groups: Dict[str, List[str]] = {}
+    for node_id in parent:
+        groups.setdefault(root(node_id), []).append(node_id)
+    result = []
+    for members in groups.values():
+        members = sorted(set(members) | {root(members[0])},
+                         key=lambda nid: (nodes[nid].get("created", ""), nid))
+        kept = members[0]
+        sig = nodes[kept].get(SECTION, "")
+        result.append((kept, [(nid, similarity(sig, nodes[nid].get(SECTION, "")))
+                              for nid in members[1:]]))
+    return sorted(result)
+
+
+def _supersede(path: str, kept: str) -> bool:
+    """Mark a duplicate node superseded and link it to the node kept."""
+    # A pack member cannot be rewritten in place (dedupe unpacks them first)
+    content = packfile.read_node_text(path) if packfile.split_path(path) is None else None
+    if content is None:
+        return False
+    content, count = re.subn(r'^status:.*$', 'status: superseded', content, count=1, flags=re.MULTILINE)
+    if not count:
+        content = re.sub(r'^(type:.*)$', '\\g<1>\nstatus: superseded', content, count=1, flags=re.MULTILINE)
+    content = content.rstrip('\n') + f"\n\nSuperseded by [[{kept}]]\n"
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
+
+
+def _add_access(path: str, count: int) -> bool:
+    """Add count to a node's access_count (missing counts as 1)."""
+    content = packfile.read_node_text(path) if packfile.split_path(path) is None else None
+    if content is None:
+        return False
+    content = bump_access_count(content, count)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
+
+
+def dedupe(graph, threshold: float = DEFAULT_THRESHOLD, dry_run: bool = False) -> Dict:
+    """Batch pass over the graph; returns a summary of the groups found."""
+    with graph.mutation_lock():
+        store = graph.store
+        # Nodes indexed before signatures existed get one now
+        unsigned = [data["path"] for node_id, data in store.nodes.items()
+                    if data.get("type") in DEDUPE_TYPES and SECTION not in data and data.get("path")]
+        if unsigned and not dry_run:
+            graph.apply_changes(unsigned)
+
+        groups = find_duplicates(graph, threshold)
+        summary = {
+            "dry_run": dry_run,
+            "threshold": threshold,
+            "groups": [{"kept": kept, "duplicates": [{"id": nid, "similarity": round(score, 2)}
+                                                     for nid, score in dups]}
+                       for kept, dups in groups],
+            "superseded": sum(len(dups) for _, dups in groups),
+            "unsigned": len(unsigned),
+        }
+        if dry_run or not groups:
+            return summary
+
+        # Packed members are read-only; restore them as loose files first
+        involved = [kept for kept, _ in groups] + [nid for _, dups in groups for nid, _ in dups]
+        packed = [nid for nid in involved if packfile.split_path(store.get(nid)["path"]) is not None]
+        if packed:
+            packfile.unpack_nodes(graph, packed)
+
+        changed = []
+        superseded = 0
+        for kept, dups in groups:
+            done = [nid for nid, _ in dups if _supersede(store.get(nid)["path"], kept)]
+            changed.extend(store.get(nid)["path"] for nid in done)
+            superseded += len(done)
+            kept_path = store.get(kept)["path"]
+            if done and _add_access(kept_path, len(done)):
+                changed.append(kept_path)
+        graph.apply_changes(changed)
+        summary["superseded"] = superseded
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="graph.py dedupe",
+                                     description="Supersede near-duplicate discovery/subagent nodes")
+    parser.add_argument("--memory-dir", default=os.environ.get("CLAUDE_MEMORY_DIR", ".claude/memory"))
+    parser.add_argument("--threshold", type=float, default=None,
+                        help=f"Minimum estimated similarity (default: config or {DEFAULT_THRESHOLD})")
+    parser.add_argument("--dry-run", action="store_true", help="Report without changing anything")
+    parser.add_argument("--json", action="store_true", help="Print the full summary as JSON")
+    args = parser.parse_args(argv)
+
+    from graph import MemoryGraph
+    threshold = args.threshold if args.threshold is not None else load_threshold(args.memory_dir)
+    summary = dedupe(MemoryGraph(args.memory_dir), threshold, dry_run=args.dry_run)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        verb = "Would supersede" if args.dry_run else "Superseded"
+        print(f"{verb} {summary['superseded']} node(s) in {len(summary['groups'])} group(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
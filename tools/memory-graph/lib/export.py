@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Export - Stream the memory graph to DOT, GraphML or an edge CSV (graph.py export)
+
+Output is written record by record: one pass over the nodes (decoded one at
+a time from the index) writes the node lines and remembers the IDs that
+passed the filters, then a pass over the linked records writes the edges
+between them; a type/tag selection keeps its own links from the first pass
+instead, so a small export never scans the whole graph. Memory holds the
+selected IDs (and their links) and one record, never the whole graph or the
+whole output.
+
+Filters combine: --type and --tag accept several values (any match),
+--status one; a node must pass all of them, and an edge is exported only
+when both ends are.
+"""
+
+import os
+import sys
+import csv
+import argparse
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+FORMATS = ("dot", "graphml", "csv-edges")
+# Node attributes carried into DOT/GraphML
+ATTRIBUTES = ("type", "status", "tags", "created", "updated", "path")
+
+
+def select_nodes(graph, types: Optional[List[str]] = None, tags: Optional[List[str]] = None,
+                 status: str = "all") -> Iterator[Tuple[str, Dict]]:
+    """(node_id, data) in ID order for nodes passing the filters."""
+    candidates = None
+    if types:
+        candidates = {nid for t in types for nid in graph.get_by_type(t)}
+    if tags:
+        tagged = {nid for t in tags for nid in graph.get_by_tag(t)}
+        candidates = tagged if candidates is None else candidates & tagged
+
+    if candidates is None:
+        records = graph.iter_nodes()
+    else:
+        records = ((nid, graph.get_node(nid)) for nid in sorted(candidates))
+    for node_id, data in records:
+        if data and (status == "all" or data.get("status", "active") == status):
+            yield node_id, data
+
+
+def _attribute(data: Dict, key: str) -> str:
+    value = data.get(key, "")
+    if isinstance(value, list):
+        return ";".join(value)
+    return "" if value is None else str(value)
+
+
+def _dot_quote(value: str) -> str:
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+
+
+def write_dot(out: TextIO, nodes: Iterator[Tuple[str, Dict]], edges) -> Tuple[int, int]:
+    out.write("digraph memory {\n  node [shape=box];\n")
+    node_count = 0
+    for node_id, data in nodes:
+        attrs = ", ".join(f"{key}={_dot_quote(_attribute(data, key))}" for key in ATTRIBUTES)
+        out.write(f"  {_dot_quote(node_id)} [{attrs}];\n")
+        node_count += 1
+    edge_count = 0
+    for source, target in edges():
+        out.write(f"  {_dot_quote(source)} -> {_dot_quote(target)};\n")
+        edge_count += 1
+    out.write("}\n")
+    return node_count, edge_count
+
+
+def write_graphml(out: TextIO, nodes: Iterator[Tuple[str, Dict]], edges) -> Tuple[int, int]:
+    out.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+              '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+    for key in ATTRIBUTES:
+        out.write(f'  <key id="{key}" for="node" attr.name="{key}" attr.type="string"/>\n')
+    out.write('  <graph id="memory" edgedefault="directed">\n')
+    node_count = 0
+    for node_id, data in nodes:
+        out.write(f'    <node id={quoteattr(node_id)}>')
+        out.write("".join(f'<data key="{key}">{escape(_attribute(data, key))}</data>' for key in ATTRIBUTES))
+        out.write('</node>\n')
+        node_count += 1
+    edge_count = 0
+    for source, target in edges():
+        out.write(f'    <edge source={quoteattr(source)} target={quoteattr(target)}/>\n')
+        edge_count += 1
+    out.write('  </graph>\n</graphml>\n')
+    return node_count, edge_count
+
+
+def write_csv_edges(out: TextIO, nodes: Iterator[Tuple[str, Dict]], edges) -> Tuple[int, int]:
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(["source", "target", "source_type", "target_type"])
+    types = {node_id: data.get("type", "") for node_id, data in nodes}
+    edge_count = 0
+    for source, target in edges():
+        writer.writerow([source, target, types[source], types[target]])
+        edge_count += 1
+    return len(types), edge_count
+
+
+WRITERS = {"dot": write_dot, "graphml": write_graphml, "csv-edges": write_csv_edges}
+
+
+def export(graph, out: TextIO, fmt: str, types: Optional[List[str]] = None,
+           tags: Optional[List[str]] = None, status: str = "all") -> Tuple[int, int]:
+    """Stream the filtered graph to out. Returns (nodes, edges) written."""
+    # A type/tag selection is usually small: keep its links from the node
+    # pass instead of scanning every record again for edges
+    keep_links = bool(types or tags)
+    selected: Dict[str, Optional[List[str]]] = {}
+
+    def nodes() -> Iterator[Tuple[str, Dict]]:
+        for node_id, data in select_nodes(graph, types, tags, status):
+            selected[node_id] = data.get("links_to", []) if keep_links else None
+            yield node_id, data
+
+    def edges() -> Iterator[Tuple[str, str]]:
+        # Called once the node pass is done, so `selected` is complete
+        links = selected.items() if keep_links else graph.iter_links()
+        for source, targets in links:
+            if source in selected:
+                for target in targets:
+                    if target in selected:
+                        yield source, target
+
+    return WRITERS[fmt](out, nodes(), edges)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="graph.py export",
+                                     description="Export the memory graph for external tools")
+    parser.add_argument("--memory-dir", default=os.environ.get("CLAUDE_MEMORY_DIR", ".claude/memory"))
+    parser.add_argument("--format", choices=FORMATS, default="dot", help="Output format (default: dot)")
+    parser.add_argument("--type", action="append", dest="types", metavar="TYPE",
+                        help="Only nodes of this type (repeatable)")
+    parser.add_argument("--tag", action="append", dest="tags", metavar="TAG",
+                        help="Only nodes with this tag (repeatable)")
+    parser.add_argument("--status", default="all", help="Only nodes with this status (default: all)")
+    parser.add_argument("--output", "-o", default=None, help="Write to a file instead of stdout")
+    args = parser.parse_args(argv)
+
+    from graph import MemoryGraph
+    graph = MemoryGraph(args.memory_dir)
+    try:
+        if args.output:
+            tmp = f"{args.output}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8', newline='') as f:
+                counts = export(graph, f, args.format, args.types, args.tags, args.status)
+            os.replace(tmp, args.output)
+        else:
+            counts = export(graph, sys.stdout, args.format, args.types, args.tags, args.status)
+            sys.stdout.flush()
+    except BrokenPipeError:
+        # The reader (e.g. head) stopped early
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    print(f"Exported {counts[0]} node(s), {counts[1]} edge(s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
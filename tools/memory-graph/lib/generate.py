@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Corpus Generator - Build large, realistic synthetic memory graphs for scale testing
+
+Nodes are written with parser.create_node using the same IDs, paths and body
+templates as the capture module. The equivalent graph.json is emitted directly
+from the generated nodes (no re-parse), so cold-rebuild and query benchmarks
+can be set up quickly. Output is fully determined by the spec and its seed.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import hashlib
+import argparse
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Tuple
+
+# Add lib directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import parser as node_parser
+from parser import create_node, Node, NodeMetadata
+from graph import MemoryGraph
+from capture import file_path_to_node_id, get_node_path, sanitize_id
+
+DEFAULT_TYPE_MIX = {
+    "file-summary": 0.6,
+    "task": 0.1,
+    "discovery": 0.1,
+    "subagent": 0.08,
+    "decision": 0.04,
+    "error": 0.05,
+    "session": 0.03,
+}
+
+# Realistic head of the tag distribution; the long tail is topic-N
+BASE_TAGS = [
+    "read", "md", "task", "py", "ts", "edit", "json", "write", "discovery",
+    "subagent", "in_progress", "completed", "src", "auth", "api", "config",
+    "tests", "hooks", "pattern", "insight", "explore", "cache", "parser",
+    "query", "graph", "security", "database", "frontend", "backend", "docs",
+]
+EXTENSIONS = ["py", "ts", "md", "go", "json", "tsx", "sh"]
+ACTIONS = ["read", "read", "read", "edit", "write"]
+CATEGORIES = ["pattern", "insight", "decision", "architecture", "bug", "optimization"]
+AGENTS = ["Explore", "Plan", "code-reviewer", "debugger", "architecture-explorer"]
+ERROR_TYPES = ["TypeError", "ImportError", "KeyError", "build-failure", "test-failure"]
+WORDS = [
+    "the", "module", "handles", "request", "cache", "graph", "node", "token",
+    "config", "parser", "session", "returns", "validates", "before", "after",
+    "index", "query", "update", "error", "value", "uses", "pattern", "when",
+    "file", "tests", "call", "path", "load", "save", "state", "user", "api",
+]
+
+
+@dataclass
+class CorpusSpec:
+    """Parameters for a synthetic corpus."""
+    nodes: int = 1000
+    seed: int = 42
+    type_mix: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_TYPE_MIX))
+    tag_vocab: int = 300           # Distinct Zipf-distributed tags
+    zipf: float = 1.1              # Zipf exponent (higher = more skewed)
+    tags_per_node: Tuple[int, int] = (1, 4)
+    link_density: float = 1.5      # Mean outgoing links per node
+    body_bytes: int = 600          # Mean body size (log-normal)
+    days: float = 90.0             # Timestamp spread ending at `end`
+    end: str = "2026-01-01T00:00:00Z"
+    archived_ratio: float = 0.05
+    project_root: str = "/project"
+
+
+def synthetic_file_path(project_root: str, i: int) -> str:
+    """Source path for the i-th file-summary node."""
+    ext = EXTENSIONS[i % len(EXTENSIONS)]
+    return os.path.join(project_root, "src", f"pkg{i % 10}", f"module_{i}.{ext}")
+
+
+def _canonical_timestamp(ts: str) -> str:
+    """The string parse_node produces for a frontmatter timestamp."""
+    # PyYAML turns ISO timestamps into datetimes, which parse_node isoformats
+    if node_parser.yaml:
+        dt = datetime.strptime(ts, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+        return dt.isoformat()
+    return ts
+
+
+class _ZipfSampler:
+    """Draw distinct tags with Zipf-distributed popularity."""
+
+    def __init__(self, rng: random.Random, vocab: int, exponent: float):
+        self.rng = rng
+        self.tags = (BASE_TAGS + [f"topic-{k}" for k in range(max(0, vocab - len(BASE_TAGS)))])[:vocab]
+        total = 0.0
+        self.cum_weights = []
+        for rank in range(1, len(self.tags) + 1):
+            total += 1.0 / (rank ** exponent)
+            self.cum_weights.append(total)
+
+    def sample(self, k: int) -> List[str]:
+        k = min(k, len(self.tags))
+        chosen: List[str] = []
+        while len(chosen) < k:
+            tag = self.rng.choices(self.tags, cum_weights=self.cum_weights)[0]
+            if tag not in chosen:
+                chosen.append(tag)
+        return chosen
+
+
+def _poisson(rng: random.Random, lam: float) -> int:
+    """Knuth's Poisson sampler (fine for the small means used here)."""
+    if lam <= 0:
+        return 0
+    limit, k, p = pow(2.718281828459045, -lam), 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= limit:
+            return k
+        k += 1
+
+
+def _body(rng: random.Random, target_bytes: int, head: str) -> str:
+    """Capture-style body padded with filler prose to roughly target_bytes."""
+    words: List[str] = []
+    size = len(head)
+    while size < target_bytes:
+        word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    filler = ' '.join(words)
+    return f"{head}\n## Notes\n{filler}\n" if filler else head
+
+
+def _make_node(rng: random.Random, spec: CorpusSpec, i: int,
+               node_type: str) -> Tuple[str, str, List[str], Dict, str]:
+    """Return (node_id, title, tags, extra_frontmatter, body head) for one node."""
+    if node_type == "file-summary":
+        file_path = synthetic_file_path(spec.project_root, i)
+        action = rng.choice(ACTIONS)
+        ext = os.path.splitext(file_path)[1].lstrip('.')
+        tags = [ext, action, sanitize_id(os.path.basename(os.path.dirname(file_path)))]
+        head = (f"File accessed via {action} operation.\n\n"
+                f"## Purpose\nSynthetic module {i}.\n")
+        return (file_path_to_node_id(file_path), file_path, tags,
+                {"file_path": file_path, "session_id": "synthetic", "last_action": action}, head)
+
+    if node_type == "task":
+        status = rng.choice(["in_progress", "completed", "completed"])
+        text = f"Synthetic task {i}: {' '.join(rng.sample(WORDS, 4))}"
+        head = f"## Task\n{text}\n\n## Status\n{status}\n"
+        return (f"task-{sanitize_id(text)}", text[:80], ["task", status],
+                {"session_id": "synthetic", "task_status": status}, head)
+
+    if node_type == "discovery":
+        category = rng.choice(CATEGORIES)
+        insight = f"Insight {i}: {' '.join(rng.sample(WORDS, 8))}"
+        content_hash = hashlib.md5(insight.encode()).hexdigest()[:8]
+        head = f"## Discovery\n{insight}\n\n## Category\n{category}\n"
+        return (f"discovery-{category}-{content_hash}", f"{category.title()}: {insight[:60]}",
+                ["discovery", category], {"session_id": "synthetic", "category": category}, head)
+
+    if node_type == "subagent":
+        agent = rng.choice(AGENTS)
+        summary = f"Agent finding {i}: {' '.join(rng.sample(WORDS, 8))}"
+        content_hash = hashlib.md5(summary.encode()).hexdigest()[:8]
+        head = f"## Subagent Result\n**Agent Type:** {agent}\n\n## Summary\n{summary}\n"
+        return (f"subagent-{sanitize_id(agent)}-{content_hash}", f"Agent: {agent}",
+                ["subagent", sanitize_id(agent)], {"session_id": "synthetic", "agent_type": agent}, head)
+
+    if node_type == "error":
+        error_type = rng.choice(ERROR_TYPES)
+        message = f"{error_type} at step {i}: {' '.join(rng.sample(WORDS, 5))}"
+        content_hash = hashlib.md5(message.encode()).hexdigest()[:8]
+        head = f"## Error\n**Type:** {error_type}\n\n**Message:**\n```\n{message}\n```\n"
+        return (f"error-{sanitize_id(error_type)}-{content_hash}", f"Error: {error_type}",
+                ["error", sanitize_id(error_type)],
+                {"session_id": "synthetic", "error_type": error_type, "resolved": False}, head)
+
+    if node_type == "session":
+        head = "## Summary\n(Synthetic session)\n"
+        return (f"session-{i:06d}", f"Session {i}", ["session"], {"session_id": f"s{i}"}, head)
+
+    # decision and any custom type
+    slug = sanitize_id(' '.join(rng.sample(WORDS, 3)))
+    head = f"## Context\nSynthetic {node_type} {i}.\n\n## Decision\n{' '.join(rng.sample(WORDS, 6))}\n"
+    return (f"{node_type}-{i:05d}-{slug}", f"{node_type.title()} {i}", [node_type], {}, head)
+
+
+def iter_corpus(memory_dir: str, spec: CorpusSpec) -> Iterator[Tuple[Node, float]]:
+    """Write the corpus node by node, yielding the parsed-equivalent (node, mtime)."""
+    rng = random.Random(spec.seed)
+    zipf = _ZipfSampler(rng, spec.tag_vocab, spec.zipf)
+    types = list(spec.type_mix.keys())
+    type_weights = list(spec.type_mix.values())
+    end = datetime.strptime(spec.end, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+    span_seconds = max(spec.days, 0) * 86400
+
+    ids: List[str] = []
+    edges: List[str] = []  # Link targets so far, for preferential attachment
+    seen = set()
+
+    for i in range(spec.nodes):
+        node_type = rng.choices(types, type_weights)[0]
+        node_id, title, tags, extra, head = _make_node(rng, spec, i, node_type)
+        if node_id in seen:
+            continue
+        seen.add(node_id)
+
+        # Type tags first, then Zipf tags, no duplicates
+        low, high = spec.tags_per_node
+        for tag in zipf.sample(rng.randint(low, high)):
+            if tag not in tags:
+                tags.append(tag)
+
+        # Links to earlier nodes: half preferential (hubs emerge), half uniform
+        links: List[str] = []
+        if ids:
+            for _ in range(_poisson(rng, spec.link_density)):
+                target = rng.choice(edges) if edges and rng.random() < 0.5 else rng.choice(ids)
+                if target not in links:
+                    links.append(target)
+        edges.extend(links)
+
+        created_dt = end - timedelta(seconds=rng.uniform(0, span_seconds))
+        updated_dt = created_dt + timedelta(seconds=rng.uniform(0, (end - created_dt).total_seconds()))
+        created = created_dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+        updated = updated_dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+        status = "archived" if rng.random() < spec.archived_ratio else "active"
+
+        target_bytes = int(rng.lognormvariate(0, 0.5) * spec.body_bytes)
+        body = _body(rng, target_bytes, head)
+        if links:
+            # Body wiki-links parse the same with or without PyYAML
+            body += "\n## Related\n" + '\n'.join(f"- [[{t}]]" for t in links) + "\n"
+
+        text = create_node(
+            node_id=node_id,
+            node_type=node_type,
+            title=title,
+            content=body,
+            tags=tags,
+            related=[],
+            extra_frontmatter=extra,
+            created=created,
+            updated=updated,
+            status=status,
+        )
+        node_path = get_node_path(memory_dir, node_type, node_id)
+        os.makedirs(os.path.dirname(node_path), exist_ok=True)
+        with open(node_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+        ids.append(node_id)
+
+        metadata = NodeMetadata(
+            id=node_id,
+            type=node_type,
+            created=_canonical_timestamp(created),
+            updated=_canonical_timestamp(updated),
+            path=node_path,
+            tags=tags,
+            related=[],
+            status=status,
+            file_path=extra.get("file_path"),
+            session_id=extra.get("session_id"),
+            task_status=extra.get("task_status"),
+        )
+        yield Node(metadata=metadata, content=body, links=links), os.path.getmtime(node_path)
+
+
+def generate_corpus(memory_dir: str, spec: CorpusSpec, emit_graph: bool = True) -> int:
+    """Write a synthetic corpus; optionally emit graph.json directly. Returns node count."""
+    os.makedirs(os.path.join(memory_dir, "nodes"), exist_ok=True)
+
+    if emit_graph:
+        return MemoryGraph(memory_dir).build_from_nodes(iter_corpus(memory_dir, spec))
+
+    count = 0
+    for _ in iter_corpus(memory_dir, spec):
+        count += 1
+    return count
+
+
+def parse_type_mix(value: str) -> Dict[str, float]:
+    """Parse 'file-summary=0.6,task=0.2' into a weight map."""
+    mix = {}
+    for part in value.split(','):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition('=')
+        mix[name.strip()] = float(weight) if weight else 1.0
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("Type mix must contain at least one positive weight")
+    return mix
+
+
+def parse_range(value: str) -> Tuple[int, int]:
+    """Parse 'N' or 'LOW-HIGH'."""
+    low, _, high = value.partition('-')
+    return int(low), int(high or low)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic memory graph corpus")
+    parser.add_argument("memory_dir", help="Target memory directory")
+    parser.add_argument("--nodes", type=int, default=1000, help="Number of nodes")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--type-mix", default=None,
+                        help="Weights per type, e.g. 'file-summary=0.6,task=0.2,decision=0.2'")
+    parser.add_argument("--tag-vocab", type=int, default=300, help="Distinct tags")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent for tag popularity")
+    parser.add_argument("--tags-per-node", default="1-4", help="Extra tags per node (N or LOW-HIGH)")
+    parser.add_argument("--links", type=float, default=1.5, help="Mean outgoing links per node")
+    parser.add_argument("--body-bytes", type=int, default=600, help="Mean body size in bytes")
+    parser.add_argument("--days", type=float, default=90.0, help="Timestamp spread in days")
+    parser.add_argument("--end", default="2026-01-01T00:00:00Z", help="Latest timestamp (UTC)")
+    parser.add_argument("--archived-ratio", type=float, default=0.05, help="Fraction of archived nodes")
+    parser.add_argument("--project-root", default="/project", help="Root for synthetic file paths")
+    parser.add_argument("--no-graph", action="store_true",
+                        help="Only write nodes; leave graph.json to a cold rebuild")
+    parser.add_argument("--force", action="store_true",
+                        help="Remove existing nodes/ and graph.json first")
+    args = parser.parse_args()
+
+    nodes_dir = os.path.join(args.memory_dir, "nodes")
+    if os.path.isdir(nodes_dir) and any(os.scandir(nodes_dir)):
+        if not args.force:
+            print(f"{nodes_dir} is not empty (use --force to replace it)", file=sys.stderr)
+            sys.exit(1)
+        shutil.rmtree(nodes_dir)
+        cache_path = os.path.join(args.memory_dir, "graph.json")
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+
+    spec = CorpusSpec(
+        nodes=args.nodes,
+        seed=args.seed,
+        type_mix=parse_type_mix(args.type_mix) if args.type_mix else dict(DEFAULT_TYPE_MIX),
+        tag_vocab=args.tag_vocab,
+        zipf=args.zipf,
+        tags_per_node=parse_range(args.tags_per_node),
+        link_density=args.links,
+        body_bytes=args.body_bytes,
+        days=args.days,
+        end=args.end,
+        archived_ratio=args.archived_ratio,
+        project_root=args.project_root,
+    )
+
+    start = time.perf_counter()
+    count = generate_corpus(args.memory_dir, spec, emit_graph=not args.no_graph)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "nodes": count,
+        "memory_dir": args.memory_dir,
+        "graph_emitted": not args.no_graph,
+        "seconds": round(elapsed, 2),
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,13 +6,99 @@ Graph Cache Builder - Build and query the memory graph
 import os
 import sys
 import json
-from typing import Dict, List, Optional, Set
+import time
+from bisect import bisect_right
+from contextlib import contextmanager
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from datetime import datetime, timezone
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:  # Windows: mutations are not serialized across processes
+    fcntl = None
+
 # Add lib directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from parser import parse_node, Node
+import profiling
+from profiling import profiled, span, set_memory_dir
+from cachefile import CacheIndex, write_cache
+from store import NodeStore, SECTIONS, NO_LINKS
+import dedupe
+import graphstats
+import importgraph
+import symbols
+import vectors
+from vectors import VectorIndex, node_text, text_vector
+import packfile
+from packfile import read_node_text, node_mtime
+
+# Derived indexes kept in step with node changes. Each is called as
+# fn(graph, node_id, old, new) after the built-in indexes are updated; old/new
+# are graph.json-shaped node dicts, None for an add/delete respectively.
+# Indexes stored outside graph.json can also ask to be told when a full build
+# starts (on_build) and when the cache has been saved (on_save).
+SecondaryIndex = Callable[["MemoryGraph", str, Optional[Dict], Optional[Dict]], None]
+SECONDARY_INDEXES: List[SecondaryIndex] = []
+BUILD_HOOKS: List[Callable[["MemoryGraph"], None]] = []
+SAVE_HOOKS: List[Callable[["MemoryGraph"], None]] = []
+
+
+def register_secondary_index(fn: SecondaryIndex,
+                             on_build: Optional[Callable[["MemoryGraph"], None]] = None,
+                             on_save: Optional[Callable[["MemoryGraph"], None]] = None) -> SecondaryIndex:
+    """Register a secondary index hook (usable as a decorator)."""
+    if fn not in SECONDARY_INDEXES:
+        SECONDARY_INDEXES.append(fn)
+        if on_build:
+            BUILD_HOOKS.append(on_build)
+        if on_save:
+            SAVE_HOOKS.append(on_save)
+    return fn
+
+
+# MinHash band postings for near-duplicate lookups (lib/dedupe.py)
+register_secondary_index(dedupe.update_band_index)
+# Definition names of file-summary nodes (lib/symbols.py)
+register_secondary_index(symbols.update_symbol_index)
+# Reverse "imports" edges between file-summary nodes (lib/importgraph.py)
+register_secondary_index(importgraph.update_import_index)
+# TF-IDF content vectors for similarity queries (lib/vectors.py)
+register_secondary_index(vectors.update_vector_index,
+                         on_build=vectors.begin_vector_build,
+                         on_save=vectors.save_vector_index)
+
+
+def node_record(node: Node, mtime: float) -> Dict:
+    """Cache entry for a parsed node (backlinks are filled in by the caller)."""
+    record = {
+        "path": node.metadata.path,
+        "type": node.metadata.type,
+        "tags": node.metadata.tags,
+        "links_to": node.links,
+        "backlinks": [],
+        "created": node.metadata.created,
+        "updated": node.metadata.updated,
+        "status": node.metadata.status,
+        "mtime": mtime
+    }
+    # Retention inputs; omitted when unset to keep entries small
+    if node.metadata.access_count:
+        record["access_count"] = node.metadata.access_count
+    if node.metadata.task_status:
+        record["task_status"] = node.metadata.task_status
+    signature = dedupe.node_signature(node.metadata.type, node.content)
+    if signature:
+        record[dedupe.SECTION] = signature
+    listed = symbols.node_symbols(node.metadata.type, node.content)
+    if listed:
+        record[symbols.SECTION] = listed
+        record["file_path"] = node.metadata.file_path or ""
+    if node.metadata.imports:
+        record[importgraph.SECTION] = node.metadata.imports
+    return record
 
 
 class MemoryGraph:
@@ -22,56 +108,232 @@ class MemoryGraph:
         self.memory_dir = memory_dir
         self.nodes_dir = os.path.join(memory_dir, "nodes")
         self.cache_path = os.path.join(memory_dir, "graph.json")
-        self.cache: Dict = {}
+        self.lock_path = os.path.join(memory_dir, "graph.lock")
+        self._cache: Optional[Dict] = None
+        self._loaded_stat: Optional[Tuple[int, int, int]] = None
+        self._lock_depth = 0
+        self._index: Optional[CacheIndex] = None
+        self._store: Optional[NodeStore] = None
+        self._vectors: Optional[VectorIndex] = None
+        self._bodies: Dict[str, str] = {}  # Parsed bodies for the hooks of the current delta
+        set_memory_dir(memory_dir)
         self.load_cache()
 
+    @property
+    def cache(self) -> Dict:
+        """Full cache dict; decoded on first access when opened lazily."""
+        if self._cache is None:
+            self._load_full()
+        return self._cache
+
+    @cache.setter
+    def cache(self, value: Dict) -> None:
+        self._cache = value
+
+    @property
+    def store(self) -> NodeStore:
+        """Compact node table behind cache["nodes"/"tags"/"types"]."""
+        if self._cache is None:
+            self._load_full()
+        return self._store
+
+    @property
+    def vectors(self) -> VectorIndex:
+        """TF-IDF index over node content (opened on first use)."""
+        if self._vectors is None:
+            self._vectors = VectorIndex(self.memory_dir)
+        return self._vectors
+
+    def take_body(self, node_id: str) -> Optional[str]:
+        """
+        Body of node_id as just parsed for the delta being applied, or None
+        (e.g. a reindex from cached records). Handed out once, so hooks such
+        as the vector index need not read the node file again.
+        """
+        return self._bodies.pop(node_id, None)
+
     def load_cache(self) -> None:
-        """Load existing cache from disk."""
-        if os.path.exists(self.cache_path):
-            try:
-                with open(self.cache_path, 'r', encoding='utf-8') as f:
-                    self.cache = json.load(f)
-            except (json.JSONDecodeError, IOError):
+        """
+        Open the cache from disk.
+
+        With a valid graph.idx only the index header is read and records are
+        decoded on access; otherwise graph.json is loaded in full.
+        """
+        self._cache = None
+        self._vectors = None
+        self._loaded_stat = self._cache_stat()
+        with span("load_index"):
+            self._index = CacheIndex.open(self.cache_path)
+        if self._index is None:
+            self._load_full()
+
+    def _cache_stat(self) -> Optional[Tuple[int, int, int]]:
+        """Identity of graph.json on disk (inode, size, mtime), None if missing."""
+        try:
+            st = os.stat(self.cache_path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
+    def _load_full(self) -> None:
+        """
+        Materialize the full cache.
+
+        From an index this only scans keys and byte spans of the mapped
+        snapshot; records are decoded when touched. Without one, graph.json
+        is decoded and converted.
+        """
+        with span("load_cache") as prof:
+            if self._index is not None:
+                index = self._index
+                store = NodeStore.from_spans(
+                    index.source, index.scan_section("nodes"),
+                    {section: index.scan_section(section) for section in SECTIONS})
+                self._set_cache(index.load_meta(), store)
+                prof["bytes_read"] = index.header["cache_size"]
+            elif os.path.exists(self.cache_path):
+                try:
+                    with open(self.cache_path, 'r', encoding='utf-8') as f:
+                        cache = json.load(f)
+                        prof["bytes_read"] = f.tell()
+                    self._set_cache(cache, NodeStore.from_cache(cache))
+                except (json.JSONDecodeError, IOError):
+                    self._init_empty_cache()
+            else:
                 self._init_empty_cache()
-        else:
-            self._init_empty_cache()
+
+    def _set_cache(self, meta: Dict, store: NodeStore) -> None:
+        """Install a store; cache keeps the graph.json shape via its views."""
+        self._store = store
+        store.load_dangling(meta.get("dangling", {}))
+        self._cache = {key: value for key, value in meta.items()
+                       if key not in ("nodes", "dangling") + SECTIONS}
+        self._cache["nodes"] = store.nodes
+        self._cache["tags"] = store.tags
+        self._cache["types"] = store.types
+        self._cache["minhash"] = store.minhash
+        self._cache["symbols"] = store.symbols
+        self._cache["imports"] = store.imports
+
+    @property
+    def _lazy(self) -> bool:
+        """True while reads can still be served from the index."""
+        return self._cache is None and self._index is not None
+
+    def _lookup(self, section: str, key: str) -> Optional[object]:
+        """Read one nodes/tags/types entry without forcing a full load."""
+        if self._lazy:
+            return self._index.get(section, key)
+        return self.cache.get(section, {}).get(key)
+
+    def _iter_section(self, section: str) -> Iterator[Tuple[str, object]]:
+        """Iterate a section in cache order, decoding lazily when possible."""
+        if self._lazy:
+            return self._index.iter_section(section)
+        return iter(self.cache.get(section, {}).items())
 
     def _init_empty_cache(self) -> None:
-        """Initialize empty cache structure."""
-        self.cache = {
+        """Initialize empty cache structure (a rebuild keeps the graph version)."""
+        if self._cache is not None or self._index is not None:
+            graph_version = self.graph_version
+        else:
+            graph_version = 0
+        self._set_cache({
             "version": "1.0.0",
+            "graph_version": graph_version,
             "updated_at": "",
             "node_count": 0,
-            "nodes": {},
-            "tags": {},
-            "types": {},
             "recent": []
-        }
+        }, NodeStore())
+
+    @property
+    def graph_version(self) -> int:
+        """Counter bumped by every save; anything derived from the graph can key on it."""
+        if self._lazy:
+            return self._index.header.get("graph_version", 0)
+        return self.cache.get("graph_version", 0)
 
     def save_cache(self) -> None:
         """Save cache to disk."""
+        self.cache["graph_version"] = self.graph_version + 1
         self.cache["updated_at"] = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        self.cache["dangling"] = self._store.dangling()
+        if "stats" in self.cache:
+            graphstats.settle(self.cache["stats"], self._store)
+        else:
+            # Caches written before the stats block get one on their next save
+            self.cache["stats"] = graphstats.compute(self._store)
 
         # Ensure directory exists
         os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
 
-        with open(self.cache_path, 'w', encoding='utf-8') as f:
-            json.dump(self.cache, f, indent=2)
-
+        # Written to temp files and renamed so concurrent readers (hooks run
+        # captures in the background) never see a half-written cache
+        with span("save_cache") as prof:
+            prof["bytes_written"] = write_cache(self.cache_path, self.cache)
+        self._loaded_stat = self._cache_stat()
+        for hook in SAVE_HOOKS:
+            hook(self)
+
+        # The index is stale now; the in-memory cache is current. Untouched
+        # store records still read from the old mapped snapshot (a replaced
+        # file stays readable while mapped), so the map is left for the
+        # store to release rather than closed here.
+        self._index = None
+
+    @profiled("rebuild")
     def rebuild(self) -> int:
         """Rebuild entire cache by scanning all nodes. Returns node count."""
-        nodes = {}
-        tags: Dict[str, List[str]] = {}
-        types: Dict[str, List[str]] = {}
+        with self.mutation_lock(reload=False):
+            if not os.path.exists(self.nodes_dir):
+                self._init_empty_cache()
+                self.save_cache()
+                return 0
 
-        if not os.path.exists(self.nodes_dir):
-            self._init_empty_cache()
-            self.save_cache()
-            return 0
+            return self.build_from_nodes(self._scan_nodes())
+
+    @contextmanager
+    def mutation_lock(self, reload: bool = True) -> Iterator[None]:
+        """
+        Serialize read-modify-write of graph.json across processes.
 
-        # Scan all node files
+        Hooks update the cache from background processes; without the lock
+        two writers can each apply their delta to the same snapshot and one
+        change is lost. If graph.json changed since we loaded it, reload
+        before mutating. Reentrant, so tools that move node files (pack,
+        gc) can hold it across their own apply_changes calls.
+        """
+        if fcntl is None or self._lock_depth:
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+            return
+        os.makedirs(self.memory_dir, exist_ok=True)
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                if reload:
+                    self.reload_if_changed()
+                yield
+            finally:
+                self._lock_depth -= 1
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def reload_if_changed(self) -> bool:
+        """Reload if another process rewrote graph.json since we loaded it."""
+        if self._cache_stat() == self._loaded_stat:
+            return False
+        self.load_cache()
+        return True
+
+    def _scan_nodes(self) -> Iterator[Tuple[Node, float]]:
+        """Parse every node under nodes/ and in the pack, yielding (node, mtime)."""
         for root, dirs, files in os.walk(self.nodes_dir):
-            for file in files:
+            dirs.sort()  # Stable node order in graph.json across filesystems
+            for file in sorted(files):
                 if not file.endswith('.md'):
                     continue
 
@@ -81,63 +343,80 @@ class MemoryGraph:
                 if not node:
                     continue
 
-                node_id = node.metadata.id
-
                 try:
                     mtime = os.path.getmtime(file_path)
                 except OSError:
                     mtime = 0
 
-                # Add to nodes
-                nodes[node_id] = {
-                    "path": file_path,
-                    "type": node.metadata.type,
-                    "tags": node.metadata.tags,
-                    "links_to": node.links,
-                    "backlinks": [],  # Computed below
-                    "created": node.metadata.created,
-                    "updated": node.metadata.updated,
-                    "status": node.metadata.status,
-                    "mtime": mtime
-                }
-
-                # Add to tags index
-                for tag in node.metadata.tags:
-                    if tag not in tags:
-                        tags[tag] = []
-                    if node_id not in tags[tag]:
-                        tags[tag].append(node_id)
-
-                # Add to types index
-                node_type = node.metadata.type
-                if node_type not in types:
-                    types[node_type] = []
-                if node_id not in types[node_type]:
-                    types[node_type].append(node_id)
-
-        # Compute backlinks
-        for node_id, node_data in nodes.items():
-            for link_target in node_data["links_to"]:
-                if link_target in nodes:
-                    if node_id not in nodes[link_target]["backlinks"]:
-                        nodes[link_target]["backlinks"].append(node_id)
+                yield node, mtime
 
-        # Compute recent (sorted by updated time, descending)
-        def get_updated(nid: str) -> str:
-            return nodes[nid].get("updated", "") or ""
+        for file_path in packfile.live_paths(self.memory_dir):
+            node = parse_node(file_path)
+            if node:
+                yield node, node_mtime(file_path)
+
+    def build_from_nodes(self, parsed: Iterable[Tuple[Node, float]]) -> int:
+        """
+        Replace the cache with one built from already-parsed nodes.
 
-        recent = sorted(nodes.keys(), key=get_updated, reverse=True)[:20]
+        rebuild() feeds this from disk; generators can feed it directly to
+        emit graph.json without re-parsing. Returns node count.
+        """
+        return self._build((node.metadata.id, self._parsed_record(node, mtime))
+                           for node, mtime in parsed)
+
+    def _parsed_record(self, node: Node, mtime: float) -> Dict:
+        """node_record(), keeping the body for take_body()."""
+        self._bodies[node.metadata.id] = node.content
+        return node_record(node, mtime)
+
+    @profiled("reindex")
+    def reindex(self) -> int:
+        """
+        Rebuild every index from the cached node records, without parsing
+        node files. Returns node count.
+        """
+        with self.mutation_lock():
+            cached = self.store
+            return self._build((node_id, cached.get(node_id)) for node_id in cached.node_ids())
+
+    def _build(self, records: Iterable[Tuple[str, Dict]]) -> int:
+        """Replace the cache with one built from (node_id, node dict) records."""
+        self._init_empty_cache()
+        store = self.store
+        for hook in BUILD_HOOKS:
+            hook(self)
+
+        for node_id, data in records:
+            # Add to nodes
+            data["backlinks"] = []  # Computed below
+            store.put(node_id, data)
+
+            # Add to tags and types indexes
+            for tag in data.get("tags", []):
+                store.add_posting("tags", tag, node_id)
+            store.add_posting("types", data.get("type", ""), node_id)
+
+            for secondary in SECONDARY_INDEXES:
+                secondary(self, node_id, None, data)
+        self._bodies.clear()
+
+        # Compute backlinks (links to missing nodes are kept as dangling)
+        for node_id in store.node_ids():
+            for link_target in store.links_to(node_id):
+                store.link(node_id, link_target)
+
+        # Compute recent (sorted by updated time, descending)
+        recent = sorted(store.node_ids(), key=store.updated, reverse=True)[:20]
 
-        # Update cache
-        self.cache["nodes"] = nodes
-        self.cache["tags"] = tags
-        self.cache["types"] = types
         self.cache["recent"] = recent
-        self.cache["node_count"] = len(nodes)
+        self.cache["node_count"] = len(store)
+        self.cache["stats"] = graphstats.compute(store)
 
         self.save_cache()
-        return len(nodes)
+        return len(store)
 
+    @profiled("update_node")
     def update_single_node(self, file_path: str) -> bool:
         """
         Update cache for a single node file (incremental update).
@@ -145,88 +424,233 @@ class MemoryGraph:
 
         Returns True if node was added/updated, False if invalid.
         """
-        node = parse_node(file_path)
-        if not node:
-            return False
+        updated, _ = self.apply_changes([file_path])
+        return bool(updated)
 
-        node_id = node.metadata.id
-        nodes = self.cache.get("nodes", {})
-        tags = self.cache.get("tags", {})
-        types = self.cache.get("types", {})
+    @profiled("delete_node")
+    def delete_node(self, node_ids: Iterable[str]) -> int:
+        """
+        Remove nodes from the cache (the node files are left alone).
 
-        try:
-            mtime = os.path.getmtime(file_path)
-        except OSError:
-            mtime = 0
-
-        # Check if this is a new node or update
-        is_new = node_id not in nodes
-
-        # Update node data
-        nodes[node_id] = {
-            "path": file_path,
-            "type": node.metadata.type,
-            "tags": node.metadata.tags,
-            "links_to": node.links,
-            "backlinks": nodes.get(node_id, {}).get("backlinks", []),
-            "created": node.metadata.created,
-            "updated": node.metadata.updated,
-            "status": node.metadata.status,
-            "mtime": mtime
-        }
-
-        # Update tags index
-        for tag in node.metadata.tags:
-            if tag not in tags:
-                tags[tag] = []
-            if node_id not in tags[tag]:
-                tags[tag].append(node_id)
-
-        # Update types index
-        node_type = node.metadata.type
-        if node_type not in types:
-            types[node_type] = []
-        if node_id not in types[node_type]:
-            types[node_type].append(node_id)
-
-        # Recompute backlinks for this node's targets
-        for link_target in node.links:
-            if link_target in nodes:
-                if node_id not in nodes[link_target]["backlinks"]:
-                    nodes[link_target]["backlinks"].append(node_id)
-
-        # Update recent list
-        recent = self.cache.get("recent", [])
-        if node_id in recent:
-            recent.remove(node_id)
-        recent.insert(0, node_id)
-        self.cache["recent"] = recent[:20]
-
-        # Update counts
-        self.cache["nodes"] = nodes
-        self.cache["tags"] = tags
-        self.cache["types"] = types
-        self.cache["node_count"] = len(nodes)
+        Accepts one ID or several; returns how many were in the cache.
+        """
+        if isinstance(node_ids, str):
+            node_ids = [node_ids]
+        _, removed = self.apply_changes(deleted=node_ids)
+        return removed
 
-        self.save_cache()
-        return True
+    def apply_changes(self, file_paths: Iterable[str] = (),
+                      deleted: Iterable[str] = ()) -> Tuple[Dict[str, str], int]:
+        """
+        Apply a batch of node file updates and node deletions with one
+        lock and one save. Deletions are applied first.
+
+        Returns ({file_path: node_id} for files indexed, number deleted).
+        """
+        parsed = []
+        for file_path in file_paths:
+            node = parse_node(file_path)
+            if not node:
+                continue
+            parsed.append((file_path, node, node_mtime(file_path)))
+
+        updated: Dict[str, str] = {}
+        with self.mutation_lock():
+            store = self.store
+            removed = 0
+            for node_id in deleted:
+                if node_id in store:
+                    self._apply_delta(node_id, None)
+                    removed += 1
+
+            for file_path, node, mtime in parsed:
+                node_id = node.metadata.id
+                self._apply_delta(node_id, self._parsed_record(node, mtime))
+                updated[file_path] = node_id
+            self._bodies.clear()
+
+            if not updated and not removed:
+                return updated, 0
+
+            # Update recent list
+            recent = [node_id for node_id in self.cache.get("recent", []) if node_id in store]
+            if removed and len(recent) < 20:
+                # Refill from the full table only when a deletion opened a slot
+                recent = sorted(store.node_ids(), key=store.updated, reverse=True)[:20]
+            for node_id in updated.values():
+                if node_id in recent:
+                    recent.remove(node_id)
+                recent.insert(0, node_id)
+            self.cache["recent"] = recent[:20]
+            self.cache["node_count"] = len(store)
+
+            self.save_cache()
+        return updated, removed
+
+    def _apply_delta(self, node_id: str, new: Optional[Dict]) -> None:
+        """
+        Move the indexes from the cached entry for node_id to `new`.
+
+        Diffs tags, type and links of the old entry against the new one and
+        applies exact removes and adds to the tag/type postings, backlinks,
+        dangling links and the stats block, then notifies the secondary
+        indexes. new=None deletes the node; links pointing at it become
+        dangling again.
+        """
+        store = self.store
+        old = store.get(node_id)
+
+        old_tags = old.get("tags", []) if old else []
+        new_tags = new.get("tags", []) if new else []
+        for tag in old_tags:
+            if tag not in new_tags:
+                store.remove_posting("tags", tag, node_id)
+        for tag in new_tags:
+            if tag not in old_tags:
+                store.add_posting("tags", tag, node_id)
+
+        old_type = old.get("type") if old else None
+        new_type = new.get("type") if new else None
+        if old_type != new_type:
+            if old_type is not None:
+                store.remove_posting("types", old_type, node_id)
+            if new_type is not None:
+                store.add_posting("types", new_type, node_id)
+
+        old_links = old.get("links_to", []) if old else []
+        new_links = new.get("links_to", []) if new else []
+        for target in old_links:
+            if target not in new_links:
+                store.unlink(node_id, target)
+        for target in new_links:
+            if target not in old_links:
+                store.link(node_id, target)
+
+        if new is None:
+            incoming = store.backlinks(node_id)
+            store.delete(node_id)
+            for source in incoming:
+                store.link(source, node_id)
+        else:
+            # Existing node keeps its backlinks; a new one claims links that
+            # were waiting for it
+            new["backlinks"] = store.backlinks(node_id) if old else store.claim_dangling(node_id)
+            store.put(node_id, new)
+
+        stats = self.cache.get("stats")
+        if stats is not None:
+            graphstats.apply_delta(stats, store, node_id, old, new)
+
+        for secondary in SECONDARY_INDEXES:
+            secondary(self, node_id, old, new)
+
+    def iter_links(self) -> Iterator[Tuple[str, List[str]]]:
+        """(source, link targets) for nodes with outgoing links, in cache order."""
+        if not self._lazy:
+            yield from self.store.links()
+            return
+        source = self._index.source
+        for node_id, offset, length in self._index.scan_section("nodes"):
+            raw = source[offset:offset + length]
+            if NO_LINKS in raw:
+                continue
+            targets = json.loads(raw).get("links_to", [])
+            if targets:
+                yield node_id, targets
+
+    def iter_nodes(self, after: Optional[str] = None) -> Iterator[Tuple[str, Dict]]:
+        """(node_id, data) in node ID order, decoded one record at a time."""
+        return self._iter_sorted(after)
+
+    def iter_node_ids(self, after: Optional[str] = None) -> Iterator[str]:
+        """Node IDs in sorted order, starting after `after` (a paging cursor)."""
+        return (node_id for node_id, _ in self._iter_sorted(after, decode=False))
+
+    def _iter_sorted(self, after: Optional[str] = None,
+                     decode: bool = True) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """
+        (node_id, data) in node ID order after `after`. From the index this
+        is one binary search plus a sequential read, so resuming deep into
+        the graph costs nothing for the skipped nodes.
+        """
+        if self._lazy:
+            index = self._index
+            for node_id, offset, length in index.scan_sorted("nodes", after):
+                yield node_id, index.value_at(offset, length) if decode else None
+            return
+        store = self.store
+        node_ids = sorted(store.node_ids())
+        start = bisect_right(node_ids, after) if after is not None else 0
+        for i in range(start, len(node_ids)):
+            yield node_ids[i], store.get(node_ids[i]) if decode else None
 
     def get_node(self, node_id: str) -> Optional[Dict]:
         """Get node metadata from cache."""
-        return self.cache.get("nodes", {}).get(node_id)
+        return self._lookup("nodes", node_id)
 
     def get_by_type(self, node_type: str) -> List[str]:
         """Get all node IDs of a specific type."""
-        return self.cache.get("types", {}).get(node_type, [])
+        return self._lookup("types", node_type) or []
 
     def get_by_tag(self, tag: str) -> List[str]:
         """Get all node IDs with a specific tag."""
-        return self.cache.get("tags", {}).get(tag, [])
+        return self._lookup("tags", tag) or []
+
+    def get_posting(self, section: str, label: str) -> List[str]:
+        """Node IDs filed under a label of any postings section (e.g. minhash)."""
+        return self._lookup(section, label) or []
+
+    def iter_posting(self, section: str, label: str, after: Optional[str] = None) -> Iterator[str]:
+        """
+        IDs filed under a label in ID order, starting after `after` (a paging
+        cursor). From the index this seeks into the stored posting instead
+        of decoding all of it.
+        """
+        if self._lazy:
+            return self._index.posting_after(section, label, after)
+        return self.store.posting_after(section, label, after)
+
+    def sample_posting(self, section: str, label: str, k: int, rng) -> List[str]:
+        """
+        Up to k distinct IDs drawn at random from a posting (rng: a
+        random.Random). Costs O(k) decodes, not a read of the posting.
+        """
+        if self._lazy:
+            return self._index.posting_sample(section, label, k, rng)
+        return self.store.posting_sample(section, label, k, rng)
+
+    def find_symbol(self, name: str) -> List[Dict]:
+        """Definitions named name across file-summary nodes (see lib/symbols.py)."""
+        return symbols.find_symbol(self, name)
+
+    def get_dependents(self, node_id: str) -> List[str]:
+        """File-summary nodes whose file imports node_id's (see lib/importgraph.py)."""
+        return importgraph.dependents(self, node_id)
+
+    def get_similar(self, node_id: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """Nodes with the most similar content, as (node_id, score)."""
+        node = self.get_node(node_id)
+        if not node or not node.get("path"):
+            return []
+        vector = text_vector(node_text(node["path"]))
+        return self.vectors.search(vector, limit, exclude=[node_id])
+
+    def get_similar_to_text(self, text: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """Nodes whose content best matches free text (e.g. a prompt)."""
+        return self.vectors.search(text_vector(text), limit)
 
     def get_recent(self, limit: int = 5) -> List[str]:
         """Get most recently updated node IDs."""
+        if self._lazy:
+            return self._index.header.get("recent", [])[:limit]
         return self.cache.get("recent", [])[:limit]
 
+    def get_node_count(self) -> int:
+        """Number of nodes in the cache."""
+        if self._lazy:
+            return self._index.header.get("node_count", 0)
+        return self.cache.get("node_count", 0)
+
     def get_related(self, node_id: str, limit: int = 5) -> List[str]:
         """Get related nodes (links + backlinks + tag overlap)."""
         node = self.get_node(node_id)
@@ -268,38 +692,53 @@ class MemoryGraph:
         sorted_related = sorted(related, key=connection_strength, reverse=True)
         return sorted_related[:limit]
 
-    def search(self, query: str, limit: int = 10) -> List[str]:
-        """Full-text search in node content."""
-        results = []
+    def search(self, query: str, limit: int = 10, after: Optional[str] = None) -> List[str]:
+        """Full-text search in node content, in node ID order (after a cursor)."""
+        return list(islice(self.iter_search(query, after), limit))
+
+    def iter_search(self, query: str, after: Optional[str] = None) -> Iterator[str]:
+        """Matching node IDs, reading node files only as results are consumed."""
         query_lower = query.lower()
 
-        for node_id, node_data in self.cache.get("nodes", {}).items():
+        for node_id, node_data in self._iter_sorted(after):
             file_path = node_data.get("path")
-            if not file_path or not os.path.exists(file_path):
+            content = read_node_text(file_path) if file_path else None
+            if content is None:
                 continue
+            profiling.add_bytes(read=len(content))
 
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read().lower()
-
-                if query_lower in content:
-                    results.append(node_id)
-
-                if len(results) >= limit:
-                    break
-            except IOError:
-                continue
-
-        return results
+            if query_lower in content.lower():
+                yield node_id
 
     def get_stats(self) -> Dict:
-        """Get graph statistics."""
-        return {
-            "node_count": self.cache.get("node_count", 0),
-            "tag_count": len(self.cache.get("tags", {})),
-            "type_count": len(self.cache.get("types", {})),
-            "updated_at": self.cache.get("updated_at", "never")
-        }
+        """
+        Get graph statistics: counts plus the aggregates of the stats block
+        (edges, degree histogram, per-type/status counts, hubs, top tags).
+        """
+        if self._lazy:
+            header = self._index.header
+            stats = {
+                "node_count": header.get("node_count", 0),
+                "tag_count": header.get("counts", {}).get("tags", 0),
+                "type_count": header.get("counts", {}).get("types", 0),
+                "updated_at": header.get("updated_at", "never"),
+                "graph_version": header.get("graph_version", 0)
+            }
+            block = header.get("stats")
+        else:
+            stats = {
+                "node_count": self.cache.get("node_count", 0),
+                "tag_count": len(self.cache.get("tags", {})),
+                "type_count": len(self.cache.get("types", {})),
+                "updated_at": self.cache.get("updated_at", "never"),
+                "graph_version": self.cache.get("graph_version", 0)
+            }
+            block = self.cache.get("stats")
+        if block is None:
+            # Cache from before the stats block: count now, store on next save
+            block = graphstats.compute(self.store)
+        stats.update(graphstats.summary(block))
+        return stats
 
 
 if __name__ == "__main__":
@@ -309,21 +748,74 @@ if __name__ == "__main__":
         print("Commands:")
         print("  rebuild              Rebuild the graph cache")
         print("  update <file>        Update cache for a single node file")
+        print("  delete <id>...       Remove nodes from the cache")
+        print("  reindex              Rebuild indexes from cached nodes (no re-parse)")
+        print("  gc [--dry-run] [--action pack|archive]")
+        print("                       Archive cold nodes per config.json retention policy")
+        print("  pack <id>... | --type T | --status S [--compact]")
+        print("                       Move nodes into pack/nodes.pack")
+        print("  unpack <id>... | --all")
+        print("                       Restore packed nodes as files under nodes/")
+        print("  dedupe [--dry-run] [--threshold T]")
+        print("                       Supersede near-duplicate discovery/subagent nodes")
+        print("  export [--format dot|graphml|csv-edges] [--type T] [--tag T] [--status S] [-o FILE]")
+        print("                       Stream the graph to a file or stdout")
+        print("  watch [--poll] [--once]")
+        print("                       Keep the cache in sync with edits under nodes/")
         print("  stats                Show graph statistics")
+        print("  count                Print the node count")
+        print("  load                 Load the full cache; print load time and peak RSS")
         print("  recent [N]           Get N most recent nodes (default: 5)")
         print("  type <type>          Get nodes by type")
         print("  tag <tag>            Get nodes by tag")
         print("  related <id> [N]     Get N related nodes (default: 5)")
+        print("  similar <id> [N]     Get N nodes with similar content (default: 5)")
         print("  search <query> [N]   Search nodes (default: 10)")
         print("  node <id>            Get node metadata")
+        print("  profile-report [file] [--json]")
+        print("                       Aggregate CLAUDE_MEMORY_PROFILE metrics")
         sys.exit(1)
 
     # Get memory dir from environment or default
     memory_dir = os.environ.get("CLAUDE_MEMORY_DIR", ".claude/memory")
-    graph = MemoryGraph(memory_dir)
-
     command = sys.argv[1]
 
+    if command == "profile-report":
+        # Reads the metrics file only; no need to load the graph
+        args = [a for a in sys.argv[2:] if a != "--json"]
+        metrics_file = args[0] if args else profiling.metrics_path(memory_dir)
+        report = profiling.aggregate(profiling.load_metrics(metrics_file))
+        if not report:
+            print(f"No profile data in {metrics_file} (set {profiling.ENV_VAR}=1)", file=sys.stderr)
+            sys.exit(1)
+        if "--json" in sys.argv[2:]:
+            print(json.dumps(report, indent=2))
+        else:
+            print(profiling.format_report(report))
+        sys.exit(0)
+
+    if command == "gc":
+        from retention import main as gc_main
+        sys.exit(gc_main(["--memory-dir", memory_dir] + sys.argv[2:]))
+
+    if command in ("pack", "unpack"):
+        sys.exit(packfile.main(["--memory-dir", memory_dir] + sys.argv[1:]))
+
+    if command == "dedupe":
+        from dedupe import main as dedupe_main
+        sys.exit(dedupe_main(["--memory-dir", memory_dir] + sys.argv[2:]))
+
+    if command == "export":
+        from export import main as export_main
+        sys.exit(export_main(["--memory-dir", memory_dir] + sys.argv[2:]))
+
+    if command == "watch":
+        # Long-running; parses its own options
+        from watch import main as watch_main
+        sys.exit(watch_main(["--memory-dir", memory_dir] + sys.argv[2:]))
+
+    graph = MemoryGraph(memory_dir)
+
     if command == "rebuild":
         count = graph.rebuild()
         print(f"Rebuilt graph with {count} nodes")
@@ -340,6 +832,33 @@ if __name__ == "__main__":
             print(f"Failed to update: {node_file}", file=sys.stderr)
             sys.exit(1)
 
+    elif command == "reindex":
+        count = graph.reindex()
+        print(f"Reindexed graph with {count} nodes")
+
+    elif command == "delete":
+        if len(sys.argv) < 3:
+            print("Usage: graph.py delete <id> [id...]", file=sys.stderr)
+            sys.exit(1)
+        removed = graph.delete_node(sys.argv[2:])
+        print(f"Deleted {removed} node(s)")
+        if removed == 0:
+            sys.exit(1)
+
+    elif command == "count":
+        print(graph.get_node_count())
+
+    elif command == "load":
+        import resource  # Unix only; needed by this command alone
+        start = time.perf_counter()
+        node_count = len(graph.cache["nodes"])
+        load_ms = (time.perf_counter() - start) * 1000
+        print(json.dumps({
+            "node_count": node_count,
+            "load_ms": round(load_ms, 1),
+            "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        }, indent=2))
+
     elif command == "stats":
         stats = graph.get_stats()
         print(json.dumps(stats, indent=2))
@@ -370,6 +889,14 @@ if __name__ == "__main__":
         limit = int(sys.argv[3]) if len(sys.argv) > 3 else 5
         print(json.dumps(graph.get_related(node_id, limit), indent=2))
 
+    elif command == "similar":
+        if len(sys.argv) < 3:
+            print("Usage: graph.py similar <id> [limit]", file=sys.stderr)
+            sys.exit(1)
+        node_id = sys.argv[2]
+        limit = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+        print(json.dumps(graph.get_similar(node_id, limit), indent=2))
+
     elif command == "search":
         if len(sys.argv) < 3:
             print("Usage: graph.py search <query> [limit]", file=sys.stderr)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Graph Stats - Aggregate counts kept in step with every mutation
+
+graph.json carries a "stats" block (also copied into the graph.idx header):
+edge count, degree histogram, per-type and per-status node counts, and the
+most linked nodes and most used tags. MemoryGraph builds it once per full
+build and then moves it by each node delta, so `graph.py stats` and the
+visualizers read it without touching node records.
+
+Edges are links whose target is in the graph; a node's degree counts its
+resolved outgoing links plus its backlinks.
+
+Top-k lists are kept as candidates plus a floor: every key not listed is
+known to have a value <= floor. Deltas update listed keys and admit keys
+that rise above the floor; the list is trimmed to KEEP, raising the floor.
+The first `count` candidates are exact while the count-th value is still at
+or above the floor (an unlisted key tied at the floor may stand in for a
+listed one of equal value). When losses push it below (hubs deleted, say),
+the list is recomputed from the store, which is rare.
+"""
+
+import heapq
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from store import NodeStore
+
+KEEP = 32        # Candidates kept per top-k list
+HUB_COUNT = 10   # Entries reported by summary()
+TAG_COUNT = 10
+
+
+def _top(values: Iterable[Tuple[str, int]]) -> Dict:
+    """Top-k block from (key, value) pairs of every key."""
+    ranked = heapq.nsmallest(KEEP + 1, ((-value, key) for key, value in values if value > 0))
+    floor = -ranked[KEEP][0] if len(ranked) > KEEP else 0
+    return {"items": [[key, -neg] for neg, key in ranked[:KEEP]], "floor": floor}
+
+
+def _top_update(top: Dict, key: str, value: int) -> None:
+    """Record key's new value (0 drops it)."""
+    items = top["items"]
+    for i, (listed, _) in enumerate(items):
+        if listed == key:
+            del items[i]
+            break
+    else:
+        if value <= top["floor"]:
+            return
+    if value > 0:
+        items.append([key, value])
+        items.sort(key=lambda kv: (-kv[1], kv[0]))
+    while len(items) > KEEP:
+        top["floor"] = max(top["floor"], items.pop()[1])
+
+
+def _exact(top: Dict, count: int) -> bool:
+    """True if the first `count` candidates are the true top `count`."""
+    items = top["items"]
+    if len(items) < count:
+        return top["floor"] == 0
+    return items[count - 1][1] >= top["floor"]
+
+
+def _bump(counts: Dict[str, int], key: str, delta: int) -> None:
+    value = counts.get(key, 0) + delta
+    if value > 0:
+        counts[key] = value
+    else:
+        counts.pop(key, None)
+
+
+def degrees(store: NodeStore) -> Dict[str, int]:
+    """Degree of every linked node (one pass; unlinked records are not decoded)."""
+    degree: Dict[str, int] = {}
+    for source, links in store.links():
+        for target in links:
+            if target in store:
+                degree[source] = degree.get(source, 0) + 1
+                degree[target] = degree.get(target, 0) + 1
+    return degree
+
+
+def degree_of(store: NodeStore, node_id: str) -> int:
+    """Current degree of one node."""
+    out = sum(1 for target in store.links_to(node_id) if target in store)
+    return out + len(store.backlinks(node_id))
+
+
+def compute(store: NodeStore) -> Dict:
+    """Stats block for the whole store."""
+    degree = degrees(store)
+    histogram: Dict[str, int] = {}
+    for value in degree.values():
+        _bump(histogram, str(value), 1)
+    unlinked = len(store) - len(degree)
+    if unlinked:
+        histogram["0"] = unlinked
+
+    types = {label: store.posting_size("types", label) for label in store.posting_labels("types")}
+    statuses: Dict[str, int] = {}
+    for node_id in store.node_ids():
+        _bump(statuses, store.status(node_id), 1)
+
+    return {
+        "edges": sum(degree.values()) // 2,
+        "degree_histogram": histogram,
+        "types": types,
+        "statuses": statuses,
+        "hubs": _top(degree.items()),
+        "tags": _top((label, store.posting_size("tags", label)) for label in store.posting_labels("tags")),
+    }
+
+
+def _resolved(store: NodeStore, node_id: str, data: Optional[Dict]) -> List[str]:
+    """data's link targets that are in the store (node_id itself counts as present)."""
+    if not data:
+        return []
+    return [t for t in data.get("links_to", []) if t == node_id or t in store]
+
+
+def apply_delta(stats: Dict, store: NodeStore, node_id: str,
+                old: Optional[Dict], new: Optional[Dict]) -> None:
+    """
+    Move stats from old to new for one node (None = absent), after the store
+    has been updated. Only node_id's own presence changed, so presence of
+    every other node reads the same before and after.
+    """
+    out_old, out_new = _resolved(store, node_id, old), _resolved(store, node_id, new)
+    in_old = old.get("backlinks", []) if old else []
+    in_new = new.get("backlinks", []) if new else []
+    self_old, self_new = node_id in out_old, node_id in out_new
+    stats["edges"] += (len(out_new) + len(in_new) - self_new) - (len(out_old) + len(in_old) - self_old)
+
+    histogram = stats["degree_histogram"]
+    if old:
+        _bump(histogram, str(len(out_old) + len(in_old)), -1)
+        _bump(stats["types"], old.get("type", ""), -1)
+        _bump(stats["statuses"], old.get("status", "active"), -1)
+    if new:
+        _bump(histogram, str(len(out_new) + len(in_new)), 1)
+        _bump(stats["types"], new.get("type", ""), 1)
+        _bump(stats["statuses"], new.get("status", "active"), 1)
+    _top_update(stats["hubs"], node_id, len(out_new) + len(in_new))
+
+    # Neighbours whose degree moved: targets gained or lost, and the nodes
+    # linking here when this node appears or disappears
+    moved: Dict[str, int] = {}
+    for target in set(out_old).symmetric_difference(out_new):
+        moved[target] = moved.get(target, 0) + (1 if target in out_new else -1)
+    if (old is None) != (new is None):
+        for source in (in_new if new else in_old):
+            moved[source] = moved.get(source, 0) + (1 if new else -1)
+    moved.pop(node_id, None)
+    for other, delta in moved.items():
+        if not delta:
+            continue
+        current = degree_of(store, other)
+        _bump(histogram, str(current - delta), -1)
+        _bump(histogram, str(current), 1)
+        _top_update(stats["hubs"], other, current)
+
+    old_tags = set(old.get("tags", [])) if old else set()
+    new_tags = set(new.get("tags", [])) if new else set()
+    for tag in old_tags.symmetric_difference(new_tags):
+        _top_update(stats["tags"], tag, store.posting_size("tags", tag))
+
+
+def settle(stats: Dict, store: NodeStore) -> None:
+    """Recompute any top-k list whose reported entries are no longer exact."""
+    if not _exact(stats["hubs"], HUB_COUNT):
+        stats["hubs"] = _top(degrees(store).items())
+    if not _exact(stats["tags"], TAG_COUNT):
+        stats["tags"] = _top((label, store.posting_size("tags", label))
+                             for label in store.posting_labels("tags"))
+
+
+def summary(stats: Dict) -> Dict:
+    """Reportable view of a stats block (top lists cut to their exact part)."""
+    return {
+        "edge_count": stats["edges"],
+        "degree_histogram": dict(sorted(stats["degree_histogram"].items(), key=lambda kv: int(kv[0]))),
+        "types": dict(sorted(stats["types"].items())),
+        "statuses": dict(sorted(stats["statuses"].items())),
+        "hubs": stats["hubs"]["items"][:HUB_COUNT],
+        "top_tags": stats["tags"]["items"][:TAG_COUNT],
+    }
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Import Graph - Typed "imports" edges between file-summary nodes (query.py --command dependents)
+
+When a file is summarized, its relative imports are resolved to files in the
+same tree (summarize.resolve_imports) and written to the node's frontmatter
+as `imports: [file-..., ...]`, the target file-summary node IDs. The graph
+cache keeps that list in the node's record, apart from the untyped wiki
+links, and this secondary index files the importer under each target in the
+"imports" postings section of graph.json.
+
+The postings are the reverse edges, so "what imports this file?" is one
+posting read through graph.idx, with no scan of the graph and no run of an
+external dependency scanner. A target need not have a node yet; its entry
+holds until the importer changes.
+"""
+
+from typing import Dict, List, Optional
+
+SECTION = "imports"
+
+
+def update_import_index(graph, node_id: str, old: Optional[Dict], new: Optional[Dict]) -> None:
+    """Secondary index hook: keep the reverse import postings in step."""
+    old_targets = set(old.get(SECTION, [])) if old else set()
+    new_targets = set(new.get(SECTION, [])) if new else set()
+    if old_targets == new_targets:
+        return
+    store = graph.store
+    for target in old_targets - new_targets:
+        store.remove_posting(SECTION, target, node_id)
+    for target in new_targets - old_targets:
+        store.add_posting(SECTION, target, node_id)
+
+
+def dependents(graph, node_id: str) -> List[str]:
+    """IDs of the nodes importing node_id, in ID order."""
+    return graph.get_posting(SECTION, node_id)
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Packfile - Packed storage for cold memory nodes
+
+Cold nodes can live in one append-only data file (pack/nodes.pack) instead of
+one small markdown file each. A JSON sidecar (pack/nodes.idx) maps each member
+(its path relative to nodes/, e.g. "files/src-auth-ts.md") to
+[offset, length, mtime, node_id, live]:
+
+    live      the node is still in the graph; its cache path is the virtual
+              path "<memory_dir>/pack/nodes.pack#files/src-auth-ts.md"
+    not live  collected by graph.py gc; kept only so it can be unpacked
+
+Readers go through read_node_text()/node_mtime(), which accept both loose and
+virtual paths, so parse_node, search and format_full don't care where a node
+is stored. Removing a member only drops it from the index; `graph.py pack
+--compact` rewrites the data file without the dead bytes.
+
+The index is replaced atomically after data is appended, so a crash mid-append
+leaves unreferenced bytes at the end of the data file, never a bad entry.
+"""
+
+import os
+import sys
+import json
+import argparse
+from typing import Dict, Iterator, List, Optional, Tuple
+
+PACK_DIR = "pack"
+DATA_FILE = "nodes.pack"
+INDEX_FILE = "nodes.idx"
+SEPARATOR = "#"
+INDEX_FORMAT = 1
+
+# Per-process cache of opened packs, keyed by data file path
+_packs: Dict[str, "PackFile"] = {}
+
+
+def pack_path(memory_dir: str) -> str:
+    """Data file of the memory directory's pack."""
+    return os.path.join(memory_dir, PACK_DIR, DATA_FILE)
+
+
+def split_path(path: str) -> Optional[Tuple[str, str]]:
+    """(data file, member) for a virtual pack path, None for a loose file."""
+    marker = DATA_FILE + SEPARATOR
+    pos = path.find(marker)
+    if pos < 0:
+        return None
+    cut = pos + len(DATA_FILE)
+    return path[:cut], path[cut + 1:]
+
+
+def member_path(data_path: str, member: str) -> str:
+    return f"{data_path}{SEPARATOR}{member}"
+
+
+class PackFile:
+    """One pack: append-only data file plus a JSON member index."""
+
+    def __init__(self, data_path: str):
+        self.data_path = data_path
+        self.index_path = os.path.join(os.path.dirname(data_path), INDEX_FILE)
+        self.entries: Dict[str, list] = {}
+        self._index_stat: Optional[Tuple[int, int]] = None
+        self._reader = None
+        self._load()
+
+    def _stat_index(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.index_path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_mtime_ns
+
+    def _load(self) -> None:
+        self._index_stat = self._stat_index()
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.entries = {}
+            return
+        self.entries = index.get("entries", {}) if index.get("format") == INDEX_FORMAT else {}
+
+    def refresh(self) -> None:
+        """Reload the index if another process replaced it."""
+        if self._stat_index() != self._index_stat:
+            self.close()
+            self._load()
+
+    def read(self, member: str) -> Optional[bytes]:
+        entry = self.entries.get(member)
+        if entry is None:
+            return None
+        if self._reader is None:
+            try:
+                self._reader = open(self.data_path, 'rb')
+            except OSError:
+                return None
+        offset, length = entry[0], entry[1]
+        self._reader.seek(offset)
+        data = self._reader.read(length)
+        return data if len(data) == length else None
+
+    def mtime(self, member: str) -> float:
+        entry = self.entries.get(member)
+        return entry[2] if entry else 0
+
+    def append(self, member: str, data: bytes, mtime: float, node_id: str, live: bool) -> None:
+        """Append a member's bytes; call save() to publish the entry."""
+        os.makedirs(os.path.dirname(self.data_path), exist_ok=True)
+        with open(self.data_path, 'ab') as f:
+            offset = f.seek(0, os.SEEK_END)
+            f.write(data)
+        self.entries[member] = [offset, len(data), mtime, node_id, live]
+
+    def remove(self, member: str) -> None:
+        self.entries.pop(member, None)
+
+    def save(self) -> None:
+        """Atomically replace the index."""
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"format": INDEX_FORMAT, "entries": self.entries}, f,
+                      separators=(',', ':'), sort_keys=True)
+        os.replace(tmp, self.index_path)
+        self._index_stat = self._stat_index()
+
+    def members(self, live: Optional[bool] = None) -> Iterator[Tuple[str, list]]:
+        """(member, entry) pairs, optionally only live or only collected ones."""
+        for member, entry in self.entries.items():
+            if live is None or entry[4] == live:
+                yield member, entry
+
+    def dead_bytes(self) -> int:
+        """Bytes in the data file no entry points at."""
+        try:
+            size = os.path.getsize(self.data_path)
+        except OSError:
+            return 0
+        return size - sum(entry[1] for entry in self.entries.values())
+
+    def compact(self) -> int:
+        """Rewrite the data file with only indexed members. Returns bytes freed."""
+        freed = self.dead_bytes()
+        if not freed:
+            return 0
+        tmp = f"{self.data_path}.{os.getpid()}.tmp"
+        entries = {}
+        with open(tmp, 'wb') as out:
+            for member, entry in sorted(self.entries.items(), key=lambda kv: kv[1][0]):
+                data = self.read(member)
+                if data is None:
+                    continue
+                entries[member] = [out.tell()] + entry[1:]
+                out.write(data)
+        self.close()
+        self.entries = entries
+        # Callers hold the graph lock; a lock-free reader racing the two
+        # renames can see one unreadable node until its next refresh
+        os.replace(tmp, self.data_path)
+        self.save()
+        return freed
+
+    def close(self) -> None:
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+
+def open_pack(data_path: str) -> PackFile:
+    """Shared, refreshed PackFile for a data path."""
+    pack = _packs.get(data_path)
+    if pack is None:
+        pack = _packs[data_path] = PackFile(data_path)
+    else:
+        pack.refresh()
+    return pack
+
+
+def read_node_text(path: str) -> Optional[str]:
+    """Node markdown from a loose file or a pack member, None if missing."""
+    split = split_path(path)
+    if split is None:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read()
+        except (OSError, UnicodeDecodeError):
+            return None
+    data_path, member = split
+    data = open_pack(data_path).read(member)
+    if data is None:
+        return None
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:  # A corrupt member reads as missing, like a loose file
+        return None
+
+
+def node_mtime(path: str) -> float:
+    """mtime of a loose node file, or the recorded mtime of a pack member."""
+    split = split_path(path)
+    if split is None:
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return 0
+    data_path, member = split
+    return open_pack(data_path).mtime(member)
+
+
+def node_exists(path: str) -> bool:
+    split = split_path(path)
+    if split is None:
+        return os.path.exists(path)
+    data_path, member = split
+    entry = open_pack(data_path).entries.get(member)
+    return bool(entry and entry[4])
+
+
+def live_paths(memory_dir: str) -> List[str]:
+    """
+    Virtual paths of packed nodes that belong in the graph. A loose file at
+    the member's place under nodes/ (e.g. recaptured since packing) wins.
+    """
+    data_path = pack_path(memory_dir)
+    if not os.path.exists(data_path):
+        return []
+    nodes_dir = os.path.join(memory_dir, "nodes")
+    pack = open_pack(data_path)
+    return [member_path(data_path, member) for member, _ in pack.members(live=True)
+            if not os.path.exists(os.path.join(nodes_dir, member))]
+
+
+def _member_name(graph, path: str) -> str:
+    """Pack member for a loose node file: its path relative to nodes/."""
+    rel = os.path.relpath(os.path.abspath(path), os.path.abspath(graph.nodes_dir))
+    if rel.startswith(os.pardir):
+        rel = os.path.basename(path)
+    return rel.replace(os.sep, "/")
+
+
+def pack_nodes(graph, node_ids, live: bool = True) -> int:
+    """
+    Move nodes' files into the pack. Live nodes stay in the graph under their
+    virtual path; otherwise (gc) they are dropped from it. Returns the count.
+    """
+    with graph.mutation_lock():
+        data_path = pack_path(graph.memory_dir)
+        pack = open_pack(data_path)
+        loose, moved = [], []
+        for node_id in node_ids:
+            data = graph.store.get(node_id)
+            path = data.get("path", "") if data else ""
+            split = split_path(path)
+            if split is not None:
+                # Already packed: only its liveness can change
+                if split[1] in pack.entries:
+                    pack.entries[split[1]][4] = live
+                    moved.append((node_id, path))
+                continue
+            try:
+                with open(path, 'rb') as f:
+                    content = f.read()
+                mtime = os.path.getmtime(path)
+            except OSError:
+                if data and not live:
+                    moved.append((node_id, path))  # Nothing left to keep
+                continue
+            member = _member_name(graph, path)
+            pack.append(member, content, mtime, node_id, live)
+            loose.append(path)
+            moved.append((node_id, member_path(data_path, member)))
+        if not moved:
+            return 0
+
+        pack.save()
+        if live:
+            graph.apply_changes([path for _, path in moved])
+        else:
+            graph.apply_changes(deleted=[node_id for node_id, _ in moved])
+        for path in loose:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return len(moved)
+
+
+def unpack_nodes(graph, node_ids=None) -> int:
+    """
+    Restore pack members (all when node_ids is None, live or collected) as
+    loose files under nodes/ and index them. Returns the count.
+    """
+    with graph.mutation_lock():
+        pack = open_pack(pack_path(graph.memory_dir))
+        wanted = set(node_ids) if node_ids is not None else None
+        restored = []
+        for member, entry in list(pack.members()):
+            if wanted is not None and entry[3] not in wanted:
+                continue
+            content = pack.read(member)
+            if content is None:
+                continue
+            target = os.path.join(graph.nodes_dir, member)
+            if not os.path.exists(target):
+                # A loose file recaptured since packing is newer; keep it
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, 'wb') as f:
+                    f.write(content)
+                os.utime(target, (entry[2], entry[2]))
+            restored.append(target)
+            pack.remove(member)
+        if not restored:
+            return 0
+
+        graph.apply_changes(restored)
+        pack.save()
+    return len(restored)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="graph.py pack|unpack",
+                                     description="Move cold nodes into or out of the packfile")
+    parser.add_argument("--memory-dir", default=os.environ.get("CLAUDE_MEMORY_DIR", ".claude/memory"))
+    parser.add_argument("command", choices=("pack", "unpack"))
+    parser.add_argument("ids", nargs="*", help="Node IDs")
+    parser.add_argument("--type", help="pack: every node of this type")
+    parser.add_argument("--status", help="pack: every node with this status")
+    parser.add_argument("--all", action="store_true", help="unpack: every member")
+    parser.add_argument("--compact", action="store_true",
+                        help="Rewrite the data file without removed members")
+    args = parser.parse_args(argv)
+
+    from graph import MemoryGraph
+    graph = MemoryGraph(args.memory_dir)
+
+    if args.command == "unpack":
+        if not args.ids and not args.all:
+            parser.error("unpack needs node IDs or --all")
+        count = unpack_nodes(graph, None if args.all else args.ids)
+        print(f"Unpacked {count} node(s)")
+    else:
+        node_ids = list(args.ids)
+        if args.type or args.status:
+            for node_id, data in graph.store.nodes.items():
+                if args.type and data.get("type") != args.type:
+                    continue
+                if args.status and data.get("status", "active") != args.status:
+                    continue
+                node_ids.append(node_id)
+        if not node_ids and not args.compact:
+            parser.error("pack needs node IDs, --type or --status")
+        count = pack_nodes(graph, node_ids)
+        print(f"Packed {count} node(s) into {pack_path(args.memory_dir)}")
+
+    if args.compact:
+        with graph.mutation_lock():
+            freed = open_pack(pack_path(args.memory_dir)).compact()
+        print(f"Compacted pack: {freed} bytes freed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
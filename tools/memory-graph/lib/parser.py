@@ -10,8 +10,14 @@ from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict, field
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from profiling import add_bytes, profiled
+from packfile import read_node_text
+
 try:
     import yaml
+    # libyaml's loader when PyYAML was built with it: same results, ~8x faster
+    YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 except ImportError:
     # Fallback to basic YAML parsing if PyYAML not installed
     yaml = None
@@ -30,7 +36,10 @@ class NodeMetadata:
     status: str = "active"
     supersedes: Optional[str] = None
     file_path: Optional[str] = None  # For file-summary nodes (the file being summarized)
+    imports: List[str] = field(default_factory=list)  # File-summary nodes of the files it imports
     session_id: Optional[str] = None
+    access_count: int = 0  # Times capture saw the node again (retention input)
+    task_status: Optional[str] = None
 
 
 @dataclass
@@ -112,7 +121,7 @@ def parse_frontmatter(text: str) -> tuple[Dict, str]:
             return {}, text
 
         try:
-            frontmatter = yaml.safe_load(match.group(1)) or {}
+            frontmatter = yaml.load(match.group(1), Loader=YAML_LOADER) or {}
             content = match.group(2)
             return frontmatter, content
         except yaml.YAMLError:
@@ -126,7 +135,7 @@ def extract_wiki_links(content: str) -> List[str]:
     # Match [[link]] or [[link|display text]]
     pattern = r'\[\[([^\]|]+)(?:\|[^\]]+)?\]\]'
     matches = re.findall(pattern, content)
-    return list(set(matches))  # Dedupe
+    return list(dict.fromkeys(matches))  # Dedupe
 
 
 def extract_tags(content: str) -> List[str]:
@@ -134,19 +143,16 @@ def extract_tags(content: str) -> List[str]:
     # Simple approach: find #word patterns not preceded by non-whitespace
     pattern = r'(?<!\S)#([a-zA-Z][a-zA-Z0-9_-]*)'
     matches = re.findall(pattern, content)
-    return list(set(matches))
+    return list(dict.fromkeys(matches))
 
 
+@profiled("parse_node")
 def parse_node(file_path: str) -> Optional[Node]:
-    """Parse a markdown node file into a Node object."""
-    if not os.path.exists(file_path):
-        return None
-
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            text = f.read()
-    except Exception:
+    """Parse a markdown node file (or packed node) into a Node object."""
+    text = read_node_text(file_path)
+    if text is None:
         return None
+    add_bytes(read=len(text))
 
     frontmatter, content = parse_frontmatter(text)
 
@@ -169,14 +175,14 @@ def parse_node(file_path: str) -> Optional[Node]:
                 elif not r.startswith('[['):
                     links.append(r)
 
-    links = list(set(links))  # Dedupe
+    links = list(dict.fromkeys(links))  # Dedupe
 
     # Merge tags from frontmatter and content
     fm_tags = frontmatter.get('tags', [])
     if isinstance(fm_tags, str):
         fm_tags = [fm_tags]
     content_tags = extract_tags(content)
-    all_tags = list(set(fm_tags + content_tags))
+    all_tags = list(dict.fromkeys(fm_tags + content_tags))
 
     # Ensure string values for dates (handle datetime objects from PyYAML)
     created = frontmatter.get('created', '')
@@ -186,6 +192,15 @@ def parse_node(file_path: str) -> Optional[Node]:
     if hasattr(updated, 'isoformat'):
         updated = updated.isoformat()
 
+    imports = frontmatter.get('imports') or []
+    if isinstance(imports, str):
+        imports = [imports]
+
+    try:
+        access_count = int(frontmatter.get('access_count') or 0)
+    except (TypeError, ValueError):
+        access_count = 0
+
     metadata = NodeMetadata(
         id=str(frontmatter['id']),
         type=str(frontmatter['type']),
@@ -197,12 +212,32 @@ def parse_node(file_path: str) -> Optional[Node]:
         status=str(frontmatter.get('status', 'active')),
         supersedes=frontmatter.get('supersedes'),
         file_path=frontmatter.get('file_path') or frontmatter.get('path'),
-        session_id=frontmatter.get('session_id')
+        imports=[str(i) for i in imports],
+        session_id=frontmatter.get('session_id'),
+        access_count=access_count,
+        task_status=frontmatter.get('task_status')
     )
 
     return Node(metadata=metadata, content=content, links=links)
 
 
+def bump_access_count(text: str, count: int = 1) -> str:
+    """
+    Node text with count added to the frontmatter access_count (missing
+    counts as 1). A missing key goes at the end of the frontmatter, where
+    create_node puts extra keys, so every writer produces the same layout.
+    """
+    end = text.find('\n---', 3) if text.startswith('---') else -1
+    if end < 0:
+        return text
+    head, bumped = re.subn(r'^access_count:\s*(\d+)',
+                           lambda m: f'access_count: {int(m.group(1)) + count}',
+                           text[:end], count=1, flags=re.MULTILINE)
+    if not bumped:
+        head += f'\naccess_count: {1 + count}'
+    return head + text[end:]
+
+
 def create_node(
     node_id: str,
     node_type: str,
@@ -210,19 +245,24 @@ def create_node(
     content: str,
     tags: List[str] = None,
     related: List[str] = None,
-    extra_frontmatter: Dict = None
+    extra_frontmatter: Dict = None,
+    created: Optional[str] = None,
+    updated: Optional[str] = None,
+    status: str = "active"
 ) -> str:
-    """Create a markdown node with frontmatter."""
+    """Create a markdown node with frontmatter (timestamps default to now)."""
     now = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+    created = created or now
+    updated = updated or created
 
     # Build frontmatter manually to avoid PyYAML dependency
     lines = [
         '---',
         f'id: {node_id}',
         f'type: {node_type}',
-        f'created: {now}',
-        f'updated: {now}',
-        'status: active',
+        f'created: {created}',
+        f'updated: {updated}',
+        f'status: {status}',
     ]
 
     if tags:
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Profiling - Opt-in timing instrumentation for memory graph operations
+
+Set CLAUDE_MEMORY_PROFILE=1 to record spans (cache load/save, node parsing,
+query commands, formatters, captures) with call counts, durations and bytes
+read/written. At process exit one JSONL record per span name is appended to
+<memory_dir>/profile.jsonl, or to the path given in CLAUDE_MEMORY_PROFILE.
+
+When the variable is unset every helper is a no-op and decorated functions
+are returned unwrapped, so the hot path pays nothing.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import atexit
+import functools
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+ENV_VAR = "CLAUDE_MEMORY_PROFILE"
+DEFAULT_FILENAME = "profile.jsonl"
+# Per-process cap on raw durations kept per span; counts and totals stay exact
+MAX_SAMPLES = 1000
+
+_setting = os.environ.get(ENV_VAR, "").strip()
+ENABLED = _setting.lower() not in ("", "0", "false", "no", "off")
+
+_spans: Dict[str, Dict] = {}
+_stack: List[Dict] = []
+_memory_dir: Optional[str] = None
+_DISCARD: Dict = {}
+
+
+def set_memory_dir(memory_dir: str) -> None:
+    """Remember where to write metrics (first memory dir wins)."""
+    global _memory_dir
+    if _memory_dir is None:
+        _memory_dir = memory_dir
+
+
+def metrics_path(memory_dir: Optional[str] = None) -> str:
+    """Resolve the metrics file from the env var or the memory directory."""
+    if ENABLED and _setting.lower() not in ("1", "true", "yes", "on"):
+        return _setting
+    base = memory_dir or _memory_dir or os.environ.get("CLAUDE_MEMORY_DIR", ".claude/memory")
+    return os.path.join(base, DEFAULT_FILENAME)
+
+
+def _record(name: str, elapsed_ms: float, data: Dict) -> None:
+    entry = _spans.get(name)
+    if entry is None:
+        entry = _spans[name] = {
+            "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+            "bytes_read": 0, "bytes_written": 0, "samples_ms": []
+        }
+    entry["count"] += 1
+    entry["total_ms"] += elapsed_ms
+    entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+    entry["bytes_read"] += data.get("bytes_read", 0)
+    entry["bytes_written"] += data.get("bytes_written", 0)
+    if len(entry["samples_ms"]) < MAX_SAMPLES:
+        entry["samples_ms"].append(round(elapsed_ms, 3))
+
+
+@contextmanager
+def span(name: str) -> Iterator[Dict]:
+    """Time a block. The yielded dict accepts bytes_read/bytes_written."""
+    if not ENABLED:
+        yield _DISCARD
+        return
+
+    data = {"bytes_read": 0, "bytes_written": 0}
+    _stack.append(data)
+    start = time.perf_counter()
+    try:
+        yield data
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        _stack.pop()
+        _record(name, elapsed_ms, data)
+
+
+def profiled(name: str) -> Callable:
+    """Decorator form of span(); returns the function untouched when disabled."""
+    def decorator(func: Callable) -> Callable:
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def add_bytes(read: int = 0, written: int = 0) -> None:
+    """Attribute I/O to the innermost open span."""
+    if ENABLED and _stack:
+        _stack[-1]["bytes_read"] += read
+        _stack[-1]["bytes_written"] += written
+
+
+def flush() -> None:
+    """Append one record per span name to the metrics file."""
+    if not _spans:
+        return
+
+    command = " ".join([os.path.basename(sys.argv[0])] + sys.argv[1:3]) if sys.argv else ""
+    ts = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    lines = []
+    for name, entry in sorted(_spans.items()):
+        record = {"ts": ts, "pid": os.getpid(), "command": command, "span": name}
+        record.update(entry)
+        record["total_ms"] = round(entry["total_ms"], 3)
+        record["max_ms"] = round(entry["max_ms"], 3)
+        lines.append(json.dumps(record, separators=(',', ':')))
+    _spans.clear()
+
+    path = metrics_path()
+    try:
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        # Single append so concurrent hook processes don't interleave records
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+    except OSError:
+        pass
+
+
+if ENABLED:
+    atexit.register(flush)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def load_metrics(path: str) -> List[Dict]:
+    """Read span records from a metrics file, skipping malformed lines."""
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def aggregate(records: List[Dict]) -> Dict[str, Dict]:
+    """Merge per-process records into per-span totals and percentiles."""
+    merged: Dict[str, Dict] = {}
+    for record in records:
+        name = record.get("span")
+        if not name:
+            continue
+        entry = merged.setdefault(name, {
+            "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+            "bytes_read": 0, "bytes_written": 0, "samples": []
+        })
+        entry["count"] += record.get("count", 0)
+        entry["total_ms"] += record.get("total_ms", 0.0)
+        entry["max_ms"] = max(entry["max_ms"], record.get("max_ms", 0.0))
+        entry["bytes_read"] += record.get("bytes_read", 0)
+        entry["bytes_written"] += record.get("bytes_written", 0)
+        entry["samples"].extend(record.get("samples_ms", []))
+
+    report = {}
+    for name, entry in merged.items():
+        samples = entry.pop("samples")
+        entry["total_ms"] = round(entry["total_ms"], 2)
+        entry["max_ms"] = round(entry["max_ms"], 2)
+        entry["p50_ms"] = round(percentile(samples, 50), 2)
+        entry["p95_ms"] = round(percentile(samples, 95), 2)
+        entry["p99_ms"] = round(percentile(samples, 99), 2)
+        report[name] = entry
+    return report
+
+
+def format_report(report: Dict[str, Dict]) -> str:
+    """Render an aggregated report as a table, slowest total first."""
+    header = (f"{'span':<28} {'calls':>7} {'total ms':>10} {'p50':>8} {'p95':>8} "
+              f"{'p99':>8} {'max':>8} {'read':>10} {'written':>10}")
+    lines = [header, "-" * len(header)]
+    for name, e in sorted(report.items(), key=lambda kv: kv[1]["total_ms"], reverse=True):
+        lines.append(
+            f"{name:<28} {e['count']:>7} {e['total_ms']:>10.1f} {e['p50_ms']:>8.2f} "
+            f"{e['p95_ms']:>8.2f} {e['p99_ms']:>8.2f} {e['max_ms']:>8.2f} "
+            f"{e['bytes_read']:>10} {e['bytes_written']:>10}"
+        )
+    return '\n'.join(lines)
@@ -3,17 +3,31 @@
 Query Engine - Format and filter memory graph queries for context injection
 """
 
+from __future__ import annotations
+
 import os
 import sys
 import json
 import argparse
-from typing import List, Optional
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional
 from datetime import datetime, timedelta, timezone
 
 # Add lib directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from graph import MemoryGraph
-from parser import parse_node
+from packfile import read_node_text
+from profiling import add_bytes, span
+from querycache import MAX_OUTPUT, QueryCache, graph_version
+import importgraph
+import symbols
+
+# graph/parser (and PyYAML) are imported on a cache miss only; importing them
+# costs more than answering a cached query
+if TYPE_CHECKING:
+    from graph import MemoryGraph
+
+# "prompt" matches scoring below this share too little vocabulary to be worth
+# injecting (1.0 = same wording as the prompt)
+MIN_PROMPT_SCORE = 0.2
 
 
 def get_node_summary(node_id: str, graph: MemoryGraph) -> str:
@@ -23,9 +37,10 @@ def get_node_summary(node_id: str, graph: MemoryGraph) -> str:
         return ""
 
     file_path = node_data.get("path")
-    if not file_path or not os.path.exists(file_path):
+    if not file_path:
         return ""
 
+    from parser import parse_node
     node = parse_node(file_path)
     if not node:
         return ""
@@ -47,10 +62,8 @@ def get_node_summary(node_id: str, graph: MemoryGraph) -> str:
     return display
 
 
-def format_summary(node_ids: List[str], graph: MemoryGraph) -> str:
-    """Format nodes as brief summaries for context injection."""
-    lines = []
-
+def iter_summary(node_ids: Iterable[str], graph: MemoryGraph) -> Iterator[str]:
+    """Brief one-line summaries for context injection, one per node."""
     for node_id in node_ids:
         node_data = graph.get_node(node_id)
         if not node_data:
@@ -60,52 +73,116 @@ def format_summary(node_ids: List[str], graph: MemoryGraph) -> str:
         display = get_node_summary(node_id, graph)
 
         if display:
-            lines.append(f"[{node_type}] {display}")
+            yield f"[{node_type}] {display}"
 
-    return '\n'.join(lines)
 
+def iter_jsonl(node_ids: Iterable[str], graph: MemoryGraph) -> Iterator[str]:
+    """One compact JSON object per node."""
+    for node_id in node_ids:
+        node_data = graph.get_node(node_id)
+        if node_data:
+            yield json.dumps({"id": node_id, **node_data})
 
-def format_json(node_ids: List[str], graph: MemoryGraph) -> str:
-    """Format nodes as JSON."""
-    nodes = []
 
+def iter_full(node_ids: Iterable[str], graph: MemoryGraph) -> Iterator[str]:
+    """Full content of each node."""
     for node_id in node_ids:
         node_data = graph.get_node(node_id)
-        if node_data:
-            nodes.append({
-                "id": node_id,
-                **node_data
-            })
+        if not node_data:
+            continue
 
-    return json.dumps({"nodes": nodes, "count": len(nodes)}, indent=2)
+        # Loose file or pack member
+        content = read_node_text(node_data.get("path") or "")
+        if content is None:
+            continue
+        add_bytes(read=len(content))
+        yield f"--- {node_id} ---\n{content}"
 
 
-def format_full(node_ids: List[str], graph: MemoryGraph) -> str:
-    """Format nodes with full content."""
-    parts = []
+def iter_ids(node_ids: Iterable[str], graph: MemoryGraph) -> Iterator[str]:
+    return iter(node_ids)
+
 
+def iter_json(node_ids: Iterable[str], graph: MemoryGraph) -> Iterator[str]:
+    """
+    The json format in chunks, one per node. Concatenated, they equal
+    json.dumps({"nodes": [...], "count": n}, indent=2).
+    """
+    count = 0
     for node_id in node_ids:
         node_data = graph.get_node(node_id)
         if not node_data:
             continue
+        body = json.dumps({"id": node_id, **node_data}, indent=2).replace('\n', '\n    ')
+        yield ('{\n  "nodes": [\n    ' if count == 0 else ',\n    ') + body
+        count += 1
+    yield ('\n  ],\n' if count else '{\n  "nodes": [],\n') + f'  "count": {count}\n}}'
 
-        file_path = node_data.get("path")
-        if not file_path or not os.path.exists(file_path):
-            continue
 
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            parts.append(f"--- {node_id} ---\n{content}")
-        except IOError:
-            continue
+# format -> (record generator, separator between records)
+STREAMS = {
+    "summary": (iter_summary, "\n"),
+    "jsonl": (iter_jsonl, "\n"),
+    "full": (iter_full, "\n\n"),
+    "ids": (iter_ids, "\n"),
+}
+
 
-    return '\n\n'.join(parts)
+def iter_symbol_lines(node_ids: Iterable[str], graph: MemoryGraph, name: str) -> Iterator[str]:
+    """Summary format of the symbol command: one line per definition found."""
+    for node_id in node_ids:
+        data = graph.get_node(node_id)
+        for kind, symbol, line in symbols.matches(data, name):
+            yield f"[{kind}] {symbol}  {data.get('file_path') or node_id}:{line}"
+
+
+def stream_output(node_ids: Iterable[str], graph: MemoryGraph, fmt: str) -> Iterator[str]:
+    """A format's output as chunks produced one node at a time."""
+    if fmt == "json":
+        yield from iter_json(node_ids, graph)
+        return
+    records, separator = STREAMS[fmt]
+    for i, record in enumerate(records(node_ids, graph)):
+        yield record if i == 0 else separator + record
+
+
+def format_summary(node_ids: List[str], graph: MemoryGraph) -> str:
+    """Format nodes as brief summaries for context injection."""
+    return ''.join(stream_output(node_ids, graph, "summary"))
+
+
+def format_json(node_ids: List[str], graph: MemoryGraph) -> str:
+    """Format nodes as JSON."""
+    return ''.join(stream_output(node_ids, graph, "json"))
+
+
+def format_jsonl(node_ids: List[str], graph: MemoryGraph) -> str:
+    """Format nodes as JSON Lines."""
+    return ''.join(stream_output(node_ids, graph, "jsonl"))
+
+
+def format_full(node_ids: List[str], graph: MemoryGraph) -> str:
+    """Format nodes with full content."""
+    return ''.join(stream_output(node_ids, graph, "full"))
 
 
 def format_ids(node_ids: List[str], graph: MemoryGraph) -> str:
     """Format as simple list of IDs."""
-    return '\n'.join(node_ids)
+    return ''.join(stream_output(node_ids, graph, "ids"))
+
+
+# Commands whose order is a ranking rather than node ID order
+RANKED_COMMANDS = ("recent", "related", "similar", "prompt")
+
+
+def ranked_after(node_ids: Iterable[str], cursor: str) -> Iterator[str]:
+    """Entries of a ranking after the cursor (none if it dropped out)."""
+    node_ids = iter(node_ids)
+    for nid in node_ids:
+        if nid == cursor:
+            break
+    return node_ids
+
 
 def parse_date_arg(value: str) -> Optional[datetime]:
     """Parse the 'since' argument to obtain a minimum timestamp."""
@@ -135,20 +212,23 @@ def parse_date_arg(value: str) -> Optional[datetime]:
     min_timestamp = now - unit_funcs[unit](unit_value)
     return min_timestamp
 
+
 def main():
     parser = argparse.ArgumentParser(description="Query memory graph")
     parser.add_argument("--memory-dir", default=".claude/memory",
                         help="Path to memory directory")
     parser.add_argument("--command", required=True,
-                        choices=["recent", "type", "tag", "related", "search", "id"],
+                        choices=["recent", "type", "tag", "related", "search", "id",
+                                 "similar", "prompt", "symbol", "dependents", "all"],
                         help="Query command")
     parser.add_argument("--query", default="",
-                        help="Query argument (type name, tag, node id, or search term)")
+                        help="Query argument (type name, tag, node id, search term, prompt text, "
+                             "symbol name, or file path)")
     parser.add_argument("--format", default="summary",
-                        choices=["summary", "json", "full", "ids"],
+                        choices=["summary", "json", "jsonl", "full", "ids"],
                         help="Output format")
     parser.add_argument("--limit", type=int, default=5,
-                        help="Maximum number of results")
+                        help="Maximum number of results (0 = no limit)")
     parser.add_argument("--status", default="active",
                         choices=["active", "archived", "all"],
                         help="Filter by status")
@@ -158,83 +238,192 @@ def main():
                             "Use the format <value><unit> with no spaces. "
                             "Units: h = hours, d = days, m = months (30 days), y = years. "
                         ))
+    parser.add_argument("--after", default=None, metavar="CURSOR",
+                        help="Resume after the cursor printed by the previous page")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Bypass the query result cache")
     args = parser.parse_args()
 
     # Override memory dir from environment if set
     memory_dir = os.environ.get("CLAUDE_MEMORY_DIR", args.memory_dir)
-    graph = MemoryGraph(memory_dir)
-
-    # Get node IDs based on command
-    node_ids: List[str] = []
-
-    if args.command == "recent":
-        node_ids = graph.get_recent(args.limit)
-
-    elif args.command == "type":
-        node_ids = graph.get_by_type(args.query)[:args.limit]
 
-    elif args.command == "tag":
-        node_ids = graph.get_by_tag(args.query)[:args.limit]
-
-    elif args.command == "related":
-        node_ids = graph.get_related(args.query, args.limit)
-
-    elif args.command == "search":
-        node_ids = graph.search(args.query, args.limit)
-
-    elif args.command == "id":
-        if graph.get_node(args.query):
-            node_ids = [args.query]
+    # A file path (not a node ID) is made absolute before it keys the cache
+    if args.command == "dependents" and ('/' in args.query or os.path.exists(args.query)):
+        args.query = os.path.abspath(args.query)
+
+    # Repeats at the same graph version print the stored output. --since is
+    # part of the key, but its values are relative to the current time, so
+    # only "all" is served from the cache.
+    cache = None
+    version = graph_version(memory_dir) if args.since == "all" and not args.no_cache else None
+    if version is not None:
+        cache = QueryCache(memory_dir, version)
+        cache_key = QueryCache.key(args.command, args.query, args.format, args.limit, args.status,
+                                   args.since, args.after)
+        with span("query.cache_hit"):
+            cached = cache.get(cache_key)
+        if cached is not None:
+            output, next_cursor = cached
+            if output:
+                print(output)
+            if next_cursor is not None:
+                print(f"next_cursor: {next_cursor}", file=sys.stderr)
+            return
+
+    from graph import MemoryGraph
+    graph = MemoryGraph(memory_dir)
 
-    # Filter by status
-    if args.status != "all":
-        filtered = []
-        for nid in node_ids:
-            node_data = graph.get_node(nid)
-            if node_data and node_data.get("status") == args.status:
-                filtered.append(nid)
-        node_ids = filtered
-    
-    # Filter by date
-    if args.since != "all":
-        min_timestamp = parse_date_arg(value=args.since)
-        filtered = []
-        for nid in node_ids:
+    # --limit 0 means no limit (e.g. exporting the whole graph)
+    limit = args.limit if args.limit > 0 else sys.maxsize
+    # Ranked commands resume after the cursor in a recomputed ranking, so a
+    # later page needs the ranking past the first `limit` entries
+    ranked_limit = limit if args.after is None else sys.maxsize
+
+    # Get node IDs based on command. Index-ordered commands (type, tag,
+    # search, all) run in node ID order, and a cursor is the last ID of the
+    # previous page, so a later page starts with one binary search.
+    with span(f"query.{args.command}"):
+        node_ids: Iterable[str] = []
+
+        if args.command == "recent":
+            node_ids = graph.get_recent(ranked_limit)
+
+        # type/tag are limited after filtering, so archived nodes don't
+        # crowd active ones out of the result
+        elif args.command == "type":
+            node_ids = graph.iter_posting("types", args.query, args.after)
+
+        elif args.command == "tag":
+            node_ids = graph.iter_posting("tags", args.query, args.after)
+
+        elif args.command == "related":
+            node_ids = graph.get_related(args.query, ranked_limit)
+
+        # Files are read only until the page is full
+        elif args.command == "search":
+            node_ids = graph.iter_search(args.query, args.after)
+
+        elif args.command == "id":
+            if graph.get_node(args.query):
+                node_ids = [args.query]
+
+        # Content similarity (lib/vectors.py); over-fetch so the status
+        # filter below still leaves enough results
+        elif args.command == "similar":
+            node_ids = [nid for nid, _ in graph.get_similar(args.query, ranked_limit * 3)]
+
+        elif args.command == "prompt":
+            node_ids = [nid for nid, score in graph.get_similar_to_text(args.query, ranked_limit * 3)
+                        if score >= MIN_PROMPT_SCORE]
+
+        # File-summary nodes defining a symbol (lib/symbols.py): one posting
+        # lookup, no node file is read
+        elif args.command == "symbol":
+            node_ids = graph.iter_posting(symbols.SECTION, args.query, args.after)
+
+        # Files importing a file (lib/importgraph.py), given its path or
+        # file-summary node ID: one posting lookup
+        elif args.command == "dependents":
+            target = args.query
+            if os.path.isabs(target):
+                from capture import file_path_to_node_id
+                target = file_path_to_node_id(target)
+            node_ids = graph.iter_posting(importgraph.SECTION, target, args.after)
+
+        # Every node, read one index entry at a time
+        elif args.command == "all":
+            node_ids = graph.iter_node_ids(args.after)
+
+        if args.after is not None and args.command in RANKED_COMMANDS:
+            node_ids = ranked_after(node_ids, args.after)
+
+        min_timestamp = parse_date_arg(value=args.since) if args.since != "all" else None
+
+        def keep(nid: str) -> bool:
+            if args.status == "all" and min_timestamp is None:
+                return True
             node_data = graph.get_node(nid)
-            updated_str = node_data.get("updated") if node_data else None
-            if not updated_str:
-                continue
-            # convert str to timestamp
-            try:
-                if updated_str.endswith('Z'):
-                    parsed_dt = datetime.strptime(
-                        updated_str, "%Y-%m-%dT%H:%M:%SZ"
-                    ).replace(tzinfo=timezone.utc)
-                else:
-                    parsed_dt = datetime.fromisoformat(updated_str)
-            except Exception:
-                continue # skip if timestamp cant be determined
-            # safely add timezone (if not already included)
-            if parsed_dt.tzinfo is None:
-                parsed_dt = parsed_dt.replace(tzinfo=timezone.utc)
-            if parsed_dt >= min_timestamp:
-                filtered.append(nid)
-        node_ids = filtered
-
-    # Format output
-    if args.format == "summary":
-        output = format_summary(node_ids, graph)
-    elif args.format == "json":
-        output = format_json(node_ids, graph)
-    elif args.format == "full":
-        output = format_full(node_ids, graph)
-    elif args.format == "ids":
-        output = format_ids(node_ids, graph)
+            if not node_data:
+                return False
+
+            # Filter by status
+            if args.status != "all" and node_data.get("status") != args.status:
+                return False
+
+            # Filter by date
+            if min_timestamp is not None:
+                updated_str = node_data.get("updated")
+                if not updated_str:
+                    return False
+                # convert str to timestamp
+                try:
+                    if updated_str.endswith('Z'):
+                        parsed_dt = datetime.strptime(
+                            updated_str, "%Y-%m-%dT%H:%M:%SZ"
+                        ).replace(tzinfo=timezone.utc)
+                    else:
+                        parsed_dt = datetime.fromisoformat(updated_str)
+                except Exception:
+                    return False # skip if timestamp cant be determined
+                # safely add timezone (if not already included)
+                if parsed_dt.tzinfo is None:
+                    parsed_dt = parsed_dt.replace(tzinfo=timezone.utc)
+                if parsed_dt < min_timestamp:
+                    return False
+            return True
+
+        # The next cursor is set only when the page filled up and a further
+        # candidate passes the filters
+        page: Dict[str, Optional[str]] = {"last": None, "next": None}
+
+        def filtered(candidates: Iterable[str]) -> Iterator[str]:
+            kept = 0
+            for nid in candidates:
+                if not keep(nid):
+                    continue
+                if kept >= limit:
+                    # Another match exists past the page: only then is there a next page
+                    page["next"] = page["last"]
+                    break
+                kept += 1
+                page["last"] = nid
+                yield nid
+
+    # Records are filtered, formatted and written one node at a time, so the
+    # first line goes out at once and memory stays flat for any --limit
+    # (only outputs small enough to cache are held)
+    chunks: Optional[List[str]] = [] if cache is not None else None
+    held = 0
+    wrote = False
+    if args.command == "symbol" and args.format == "summary":
+        # Definitions rather than node titles; other formats stay per node
+        lines = iter_symbol_lines(filtered(node_ids), graph, args.query)
+        output = (line if i == 0 else "\n" + line for i, line in enumerate(lines))
     else:
-        output = ""
-
-    if output:
-        print(output)
+        output = stream_output(filtered(node_ids), graph, args.format)
+    try:
+        with span(f"format.{args.format}"):
+            for chunk in output:
+                sys.stdout.write(chunk)
+                wrote = True
+                if chunks is not None:
+                    held += len(chunk)
+                    if held > MAX_OUTPUT:
+                        chunks = None
+                    else:
+                        chunks.append(chunk)
+        if wrote:
+            sys.stdout.write("\n")
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # The reader (e.g. head) stopped early; don't cache a partial result
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return
+
+    if page["next"] is not None:
+        print(f"next_cursor: {page['next']}", file=sys.stderr)
+    if cache is not None and chunks is not None:
+        cache.put(cache_key, [''.join(chunks), page["next"]])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Query Cache - Memoized query.py output, shared across processes
+
+Hooks run the same few queries (recent, type decision, tag lookups) on every
+prompt. Each formatted result is stored in a small LRU sidecar
+(<memory_dir>/query-cache.json) under its query arguments, tagged with the
+graph version it was computed at. MemoryGraph bumps the version on every
+save, so a version change empties the cache and a repeat at the same version
+skips both the query and the formatting.
+
+The sidecar is advisory: it is replaced atomically, a lost race only loses an
+entry, and an unreadable file is treated as empty. It is written only when an
+entry is added; hits are read-only.
+"""
+
+import os
+import json
+from collections import OrderedDict
+from typing import Any, List, Optional, Sequence
+
+from cachefile import read_header
+
+CACHE_FILE = "query-cache.json"
+MAX_ENTRIES = 64
+MAX_OUTPUT = 64 * 1024  # larger outputs (exports) are streamed, not stored
+FORMAT = 2
+
+
+def graph_version(memory_dir: str) -> Optional[List]:
+    """
+    [graph_version, updated_at] from the graph.idx header, without loading
+    the graph; None when the index is missing or stale. updated_at guards
+    against a counter that restarted after graph.json was deleted.
+    """
+    header = read_header(os.path.join(memory_dir, "graph.json"))
+    if header is None:
+        return None
+    return [header.get("graph_version", 0), header.get("updated_at", "")]
+
+
+class QueryCache:
+    """LRU map of query key -> JSON-able result for one graph version."""
+
+    def __init__(self, memory_dir: str, version: Sequence, max_entries: int = MAX_ENTRIES):
+        self.path = os.path.join(memory_dir, CACHE_FILE)
+        self.version = list(version)
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Any]" = OrderedDict()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("format") == FORMAT and data.get("version") == self.version:
+                self.entries = OrderedDict(data.get("entries", []))
+        except (OSError, ValueError, AttributeError, TypeError):
+            pass
+
+    @staticmethod
+    def key(*parts) -> str:
+        return json.dumps(parts, separators=(',', ':'))
+
+    def get(self, key: str) -> Optional[Any]:
+        # A hit only reorders in memory; the order is written with the next
+        # put(), so the read path never rewrites the sidecar (LRU is approximate)
+        value = self.entries.get(key)
+        if value is not None:
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self._save()
+
+    def _save(self) -> None:
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({"format": FORMAT, "version": self.version,
+                           "entries": list(self.entries.items())}, f, separators=(',', ':'))
+            os.replace(tmp, self.path)
+        except OSError:
+            pass  # Read-only memory dir: run uncached
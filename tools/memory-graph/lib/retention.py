@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Retention - Policy-driven archival of cold memory nodes (graph.py gc)
+
+Policy comes from the "retention" section of <memory_dir>/config.json:
+
+    max_age_days          {type: days}; only listed types are ever collected
+    min_access_count      {type: n}; nodes seen at least n times are kept
+    keep_linked_to_active_tasks
+                          keep nodes linked to or from an unfinished task
+    max_nodes             after age rules, collect the least connected,
+                          oldest collectable nodes until at most this many
+                          nodes remain active (0 disables)
+    action                "pack" moves node files into the packfile
+                          (pack/nodes.pack) and drops them from the graph;
+                          "archive" sets status: archived in place
+
+Both actions go through MemoryGraph.apply_changes, so indexes are updated
+incrementally. Packed nodes leave the graph entirely, so queries only walk
+the working set; links to them become dangling and are restored by
+`graph.py unpack <id>`.
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+# Add lib directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from graph import MemoryGraph
+from packfile import pack_nodes, split_path, unpack_nodes
+from profiling import profiled
+
+ACTIONS = ("pack", "archive")
+DONE_TASK_STATUSES = ("completed", "cancelled")
+
+
+@dataclass
+class RetentionPolicy:
+    """Retention settings; defaults apply where config.json is silent."""
+    max_age_days: Dict[str, float] = field(default_factory=lambda: {
+        "file-summary": 30, "subagent": 30, "discovery": 180, "session": 7
+    })
+    min_access_count: Dict[str, int] = field(default_factory=lambda: {"file-summary": 3})
+    keep_linked_to_active_tasks: bool = True
+    max_nodes: int = 0
+    action: str = "pack"
+
+    @classmethod
+    def from_config(cls, memory_dir: str) -> "RetentionPolicy":
+        """Load the "retention" section of config.json over the defaults."""
+        policy = cls()
+        try:
+            with open(os.path.join(memory_dir, "config.json"), 'r', encoding='utf-8') as f:
+                section = json.load(f).get("retention", {})
+        except (OSError, json.JSONDecodeError):
+            return policy
+
+        if "session_archive_days" in section:
+            policy.max_age_days["session"] = section["session_archive_days"]
+        policy.max_age_days.update(section.get("max_age_days", {}))
+        policy.min_access_count.update(section.get("min_access_count", {}))
+        policy.keep_linked_to_active_tasks = section.get(
+            "keep_linked_to_active_tasks", policy.keep_linked_to_active_tasks)
+        policy.max_nodes = int(section.get("max_nodes", policy.max_nodes) or 0)
+        if section.get("action") in ACTIONS:
+            policy.action = section["action"]
+        return policy
+
+
+def _parse_time(value: str) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _age_days(data: Dict, now: datetime) -> float:
+    updated = _parse_time(data.get("updated", ""))
+    if updated is not None:
+        return (now - updated).total_seconds() / 86400
+    mtime = data.get("mtime") or 0
+    return (now.timestamp() - mtime) / 86400 if mtime else 0.0
+
+
+def _is_active_task(data: Dict) -> bool:
+    if data.get("type") != "task" or data.get("status", "active") != "active":
+        return False
+    task_status = data.get("task_status")
+    if task_status:
+        return task_status not in DONE_TASK_STATUSES
+    return not any(t in DONE_TASK_STATUSES for t in data.get("tags", []))
+
+
+def select_cold(graph: MemoryGraph, policy: RetentionPolicy,
+                now: Optional[datetime] = None) -> List[Tuple[str, str]]:
+    """(node_id, reason) for every node the policy would collect."""
+    now = now or datetime.now(timezone.utc)
+    nodes = {node_id: data for node_id, data in graph.store.nodes.items()
+             if data.get("status", "active") == "active"}
+
+    protected: Set[str] = set()
+    if policy.keep_linked_to_active_tasks:
+        current_task = _read_current_task(graph.memory_dir)
+        for node_id, data in nodes.items():
+            if _is_active_task(data) or node_id == current_task:
+                protected.add(node_id)
+                protected.update(data.get("links_to", []))
+                protected.update(data.get("backlinks", []))
+
+    cold: List[Tuple[str, str]] = []
+    collectable: List[str] = []
+    for node_id, data in nodes.items():
+        node_type = data.get("type", "")
+        if node_type not in policy.max_age_days or node_id in protected:
+            continue
+        if data.get("access_count", 0) >= policy.min_access_count.get(node_type, float('inf')):
+            continue
+        age = _age_days(data, now)
+        if age > policy.max_age_days[node_type]:
+            cold.append((node_id, f"age {age:.0f}d > {policy.max_age_days[node_type]}d"))
+        else:
+            collectable.append(node_id)
+
+    excess = len(nodes) - len(cold) - policy.max_nodes
+    if policy.max_nodes and excess > 0:
+        # least_connected_oldest
+        def rank(node_id: str) -> Tuple[int, str]:
+            data = nodes[node_id]
+            links = len(data.get("links_to", [])) + len(data.get("backlinks", []))
+            return links, data.get("updated", "")
+        for node_id in sorted(collectable, key=rank)[:excess]:
+            cold.append((node_id, f"over max_nodes {policy.max_nodes}"))
+    return cold
+
+
+def _read_current_task(memory_dir: str) -> Optional[str]:
+    try:
+        with open(os.path.join(memory_dir, ".current_task"), 'r') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _mark_archived(path: str) -> bool:
+    """Set status: archived in a node's frontmatter."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except OSError:
+        return False
+    content, count = re.subn(r'^status:.*$', 'status: archived', content, count=1, flags=re.MULTILINE)
+    if not count:
+        content = re.sub(r'^(type:.*)$', '\\g<1>\nstatus: archived', content, count=1, flags=re.MULTILINE)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
+
+
+def _archive(graph: MemoryGraph, node_ids: List[str]) -> Set[str]:
+    """
+    Mark nodes archived in place; returns the IDs actually rewritten. Live
+    pack members are unpacked first, since only loose files can be edited.
+    """
+    paths = {node_id: graph.store.get(node_id).get("path", "") for node_id in node_ids}
+    packed = [node_id for node_id, path in paths.items() if split_path(path) is not None]
+    if packed:
+        unpack_nodes(graph, packed)
+        for node_id in packed:
+            paths[node_id] = (graph.store.get(node_id) or {}).get("path", "")
+    rewritten = {node_id: path for node_id, path in paths.items()
+                 if split_path(path) is None and _mark_archived(path)}
+    if rewritten:
+        graph.apply_changes(list(rewritten.values()))
+    return set(rewritten)
+
+
+@profiled("gc")
+def collect(graph: MemoryGraph, policy: RetentionPolicy, dry_run: bool = False,
+            now: Optional[datetime] = None) -> Dict:
+    """
+    Apply the policy; returns a summary of what was (or would be) collected.
+    Selection and rewrite run under the graph's mutation lock, so capture,
+    the watcher and dedupe cannot change nodes in between.
+    """
+    with graph.mutation_lock():
+        scanned = len(graph.store)
+        cold = select_cold(graph, policy, now)
+        types = {node_id: graph.store.get(node_id).get("type", "") for node_id, _ in cold}
+        if not dry_run and cold:
+            node_ids = [node_id for node_id, _ in cold]
+            if policy.action == "archive":
+                done = _archive(graph, node_ids)
+            else:
+                pack_nodes(graph, node_ids, live=False)
+                done = {node_id for node_id in node_ids if node_id not in graph.store}
+            cold = [(node_id, reason) for node_id, reason in cold if node_id in done]
+        remaining = len(graph.store)
+
+    by_type: Dict[str, int] = {}
+    for node_id, _ in cold:
+        by_type[types[node_id]] = by_type.get(types[node_id], 0) + 1
+    summary = {
+        "action": policy.action,
+        "dry_run": dry_run,
+        "scanned": scanned,
+        "collected": len(cold),
+        "by_type": by_type,
+        "nodes": [{"id": node_id, "reason": reason} for node_id, reason in cold],
+    }
+    if not dry_run and cold:
+        summary["remaining"] = remaining
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="graph.py gc",
+                                     description="Archive cold nodes per the retention policy")
+    parser.add_argument("--memory-dir", default=os.environ.get("CLAUDE_MEMORY_DIR", ".claude/memory"))
+    parser.add_argument("--dry-run", action="store_true", help="Report without changing anything")
+    parser.add_argument("--action", choices=ACTIONS, help="Override the configured action")
+    parser.add_argument("--max-nodes", type=int, help="Override the configured max_nodes")
+    parser.add_argument("--json", action="store_true", help="Print the full summary as JSON")
+    args = parser.parse_args(argv)
+
+    policy = RetentionPolicy.from_config(args.memory_dir)
+    if args.action:
+        policy.action = args.action
+    if args.max_nodes is not None:
+        policy.max_nodes = args.max_nodes
+
+    summary = collect(MemoryGraph(args.memory_dir), policy, dry_run=args.dry_run)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        verb = "Would collect" if args.dry_run else "Collected"
+        types = ", ".join(f"{t}: {n}" for t, n in sorted(summary["by_type"].items())) or "none"
+        print(f"{verb} {summary['collected']} of {summary['scanned']} nodes "
+              f"({policy.action}; {types})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
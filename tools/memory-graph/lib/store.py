@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+"""
+Node Store - Compact in-memory form of the graph cache
+
+Node IDs are interned to integers, tag/type/status strings to a shared label
+table, and link lists are kept as array('i') of node integers. Postings,
+backlinks and dangling-link sources are sorted int arrays, so membership is a
+binary search and building them stays O(n log n) even for tags on 10k+
+nodes; they are serialized sorted by node ID, independent of build order.
+Integers follow interning order, not ID order, so each posting read in ID
+order is kept as a sorted ID list until the posting next changes.
+
+Nodes loaded from an indexed graph.json stay as raw byte spans into the
+mapped snapshot until something reads or mutates them; only then are they
+decoded (into a __slots__ NodeRecord when mutated). Unchanged records are
+written back byte-for-byte.
+
+NodesView and PostingsView expose the store as read-only mappings with the
+same shape graph.json always had, so code reading graph.cache["nodes"] etc.
+keeps working.
+"""
+
+import json
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+NODE_FIELDS = ("path", "type", "tags", "links_to", "backlinks",
+               "created", "updated", "status", "mtime")
+SECTIONS = ("tags", "types", "minhash", "symbols", "imports")
+NO_LINKS = b'"links_to": []'  # as written by _encode
+
+
+def _encode(value: Any) -> bytes:
+    return json.dumps(value).encode('utf-8')
+
+
+def _insert_sorted(values: array, value: int) -> bool:
+    """Insert into a sorted int array unless present. True if inserted."""
+    i = bisect_left(values, value)
+    if i < len(values) and values[i] == value:
+        return False
+    values.insert(i, value)
+    return True
+
+
+def _remove_sorted(values: array, value: Optional[int]) -> bool:
+    """Remove from a sorted int array. True if it was present."""
+    if value is None:
+        return False
+    i = bisect_left(values, value)
+    if i < len(values) and values[i] == value:
+        del values[i]
+        return True
+    return False
+
+
+class StringTable:
+    """Bidirectional string <-> int interning table."""
+
+    __slots__ = ("strings", "_ids")
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        idx = self._ids.get(value)
+        if idx is None:
+            idx = self._ids[value] = len(self.strings)
+            self.strings.append(value)
+        return idx
+
+    def find(self, value: str) -> Optional[int]:
+        return self._ids.get(value)
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+
+class NodeRecord:
+    """Decoded node; type/status/tags are label ints, links are node ints."""
+
+    __slots__ = ("path", "type", "status", "tags", "links_to", "backlinks",
+                 "created", "updated", "mtime", "extra")
+
+
+class NodeStore:
+    """Mutable node table with interned IDs and array-backed link lists."""
+
+    def __init__(self):
+        self.keys = StringTable()      # node IDs, including dangling link targets
+        self.labels = StringTable()    # tags, types, statuses
+        self._records: List[Optional[NodeRecord]] = []
+        self._present = bytearray()
+        self._raw_offset = array('q')  # -1 once decoded or for new nodes
+        self._raw_length = array('l')
+        self._source: Optional[Any] = None
+        self._postings: Dict[str, Dict[int, Any]] = {s: {} for s in SECTIONS}
+        self._sorted: Dict[str, Dict[int, List[str]]] = {s: {} for s in SECTIONS}
+        self._dangling: Dict[int, array] = {}  # absent target -> linking nodes
+        self._count = 0
+        self.nodes = NodesView(self)
+        self.tags = PostingsView(self, "tags")
+        self.types = PostingsView(self, "types")
+        self.minhash = PostingsView(self, "minhash")
+        self.symbols = PostingsView(self, "symbols")
+        self.imports = PostingsView(self, "imports")
+
+    # --- Loading ---
+
+    @classmethod
+    def from_spans(cls, source: Any, nodes: Iterator[Tuple[str, int, int]],
+                   postings: Dict[str, Iterator[Tuple[str, int, int]]]) -> "NodeStore":
+        """Build a store over (key, offset, length) spans into source."""
+        store = cls()
+        store._source = source
+        for node_id, offset, length in nodes:
+            idx = store._key(node_id)
+            store._present[idx] = 1
+            store._raw_offset[idx] = offset
+            store._raw_length[idx] = length
+            store._count += 1
+        for section, spans in postings.items():
+            table = store._postings[section]
+            for label, offset, length in spans:
+                table[store.labels.intern(label)] = (offset, length)
+        return store
+
+    @classmethod
+    def from_cache(cls, cache: Dict) -> "NodeStore":
+        """Build a store from a decoded graph.json dict."""
+        store = cls()
+        for node_id, data in cache.get("nodes", {}).items():
+            store.put(node_id, data)
+        for section in SECTIONS:
+            for label, ids in cache.get(section, {}).items():
+                store._postings[section][store.labels.intern(label)] = store._id_set(ids)
+        return store
+
+    def _key(self, node_id: str) -> int:
+        idx = self.keys.intern(node_id)
+        if idx == len(self._records):
+            self._records.append(None)
+            self._present.append(0)
+            self._raw_offset.append(-1)
+            self._raw_length.append(0)
+        return idx
+
+    def _id_set(self, node_ids: List[str]) -> array:
+        """Sorted, duplicate-free int array for a list of node IDs."""
+        return array('i', sorted(set(map(self._key, node_ids))))
+
+    def _ids(self, values: array) -> List[str]:
+        """Node IDs of an int array, sorted by ID for stable output."""
+        keys = self.keys.strings
+        return sorted([keys[k] for k in values])
+
+    # --- Records ---
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, node_id: str) -> bool:
+        idx = self.keys.find(node_id)
+        return idx is not None and self._present[idx] == 1
+
+    def node_ids(self) -> Iterator[str]:
+        """Present node IDs in insertion order."""
+        strings = self.keys.strings
+        for idx, present in enumerate(self._present):
+            if present:
+                yield strings[idx]
+
+    def _record(self, idx: int) -> NodeRecord:
+        """Decoded record for a present node, decoding a raw span if needed."""
+        record = self._records[idx]
+        if record is None:
+            offset = self._raw_offset[idx]
+            data = json.loads(self._source[offset:offset + self._raw_length[idx]])
+            record = self._records[idx] = self._to_record(data)
+            self._raw_offset[idx] = -1
+        return record
+
+    def _to_record(self, data: Dict) -> NodeRecord:
+        labels = self.labels.intern
+        record = NodeRecord()
+        record.path = data.get("path", "")
+        record.type = labels(data.get("type", ""))
+        record.status = labels(data.get("status", "active"))
+        record.tags = array('i', map(labels, data.get("tags", [])))
+        record.links_to = array('i', map(self._key, data.get("links_to", [])))
+        record.backlinks = self._id_set(data.get("backlinks", []))
+        record.created = data.get("created", "")
+        record.updated = data.get("updated", "")
+        record.mtime = data.get("mtime", 0)
+        extra = {k: v for k, v in data.items() if k not in NODE_FIELDS}
+        record.extra = extra or None
+        return record
+
+    def _to_dict(self, record: NodeRecord) -> Dict:
+        labels = self.labels.strings
+        keys = self.keys.strings
+        data = {
+            "path": record.path,
+            "type": labels[record.type],
+            "tags": [labels[t] for t in record.tags],
+            "links_to": [keys[k] for k in record.links_to],
+            "backlinks": self._ids(record.backlinks),
+            "created": record.created,
+            "updated": record.updated,
+            "status": labels[record.status],
+            "mtime": record.mtime,
+        }
+        if record.extra:
+            data.update(record.extra)
+        return data
+
+    def get(self, node_id: str) -> Optional[Dict]:
+        """Node as a fresh dict (graph.json shape), or None."""
+        idx = self.keys.find(node_id)
+        if idx is None or not self._present[idx]:
+            return None
+        record = self._records[idx]
+        if record is None:
+            offset = self._raw_offset[idx]
+            return json.loads(self._source[offset:offset + self._raw_length[idx]])
+        return self._to_dict(record)
+
+    def put(self, node_id: str, data: Dict) -> None:
+        """Insert or replace a node from a graph.json-shaped dict."""
+        idx = self._key(node_id)
+        if not self._present[idx]:
+            self._present[idx] = 1
+            self._count += 1
+        self._records[idx] = self._to_record(data)
+        self._raw_offset[idx] = -1
+
+    def links_to(self, node_id: str) -> List[str]:
+        idx = self.keys.find(node_id)
+        if idx is None or not self._present[idx]:
+            return []
+        keys = self.keys.strings
+        return [keys[k] for k in self._record(idx).links_to]
+
+    def links(self) -> Iterator[Tuple[str, List[str]]]:
+        """
+        (source, targets) for every node with outgoing links. Raw spans are
+        checked for an empty links_to before decoding, so a sweep over a
+        mostly unlinked store does not build records it will not use.
+        """
+        strings = self.keys.strings
+        for idx, present in enumerate(self._present):
+            if not present:
+                continue
+            record = self._records[idx]
+            if record is None:
+                offset = self._raw_offset[idx]
+                raw = self._source[offset:offset + self._raw_length[idx]]
+                if NO_LINKS in raw:
+                    continue
+                targets = json.loads(raw).get("links_to", [])
+            else:
+                targets = [strings[k] for k in record.links_to]
+            if targets:
+                yield strings[idx], targets
+
+    def backlinks(self, node_id: str) -> List[str]:
+        idx = self.keys.find(node_id)
+        if idx is None or not self._present[idx]:
+            return []
+        return self._ids(self._record(idx).backlinks)
+
+    def add_backlink(self, target: str, source: str) -> bool:
+        """Record source -> target on target's backlinks. False if target is absent."""
+        idx = self.keys.find(target)
+        if idx is None or not self._present[idx]:
+            return False
+        _insert_sorted(self._record(idx).backlinks, self._key(source))
+        return True
+
+    def remove_backlink(self, target: str, source: str) -> bool:
+        """Drop source from target's backlinks. False if target is absent."""
+        idx = self.keys.find(target)
+        if idx is None or not self._present[idx]:
+            return False
+        _remove_sorted(self._record(idx).backlinks, self.keys.find(source))
+        return True
+
+    def link(self, source: str, target: str) -> None:
+        """Record source -> target as a backlink, or as dangling if target is absent."""
+        if self.add_backlink(target, source):
+            return
+        sources = self._dangling.setdefault(self._key(target), array('i'))
+        _insert_sorted(sources, self._key(source))
+
+    def unlink(self, source: str, target: str) -> None:
+        """Undo link(source, target)."""
+        if self.remove_backlink(target, source):
+            return
+        target_idx = self.keys.find(target)
+        sources = self._dangling.get(target_idx)
+        if sources is not None and _remove_sorted(sources, self.keys.find(source)):
+            if not sources:
+                del self._dangling[target_idx]
+
+    def claim_dangling(self, target: str) -> List[str]:
+        """Pop the nodes that linked to target before it existed."""
+        target_idx = self.keys.find(target)
+        sources = self._dangling.pop(target_idx, None) if target_idx is not None else None
+        return self._ids(sources) if sources else []
+
+    def dangling(self) -> Dict[str, List[str]]:
+        """{absent target: [linking node IDs]} for links to nodes not in the store."""
+        keys = self.keys.strings
+        return {keys[t]: self._ids(self._dangling[t])
+                for t in sorted(self._dangling, key=keys.__getitem__)}
+
+    def load_dangling(self, dangling: Dict[str, List[str]]) -> None:
+        for target, sources in dangling.items():
+            self._dangling[self._key(target)] = self._id_set(sources)
+
+    def delete(self, node_id: str) -> bool:
+        """Drop a node's record; index cleanup is the caller's job."""
+        idx = self.keys.find(node_id)
+        if idx is None or not self._present[idx]:
+            return False
+        self._present[idx] = 0
+        self._records[idx] = None
+        self._raw_offset[idx] = -1
+        self._count -= 1
+        return True
+
+    def updated(self, node_id: str) -> str:
+        """The node's 'updated' timestamp ('' if unknown)."""
+        idx = self.keys.find(node_id)
+        if idx is None or not self._present[idx]:
+            return ""
+        record = self._records[idx]
+        if record is None:
+            return self.get(node_id).get("updated", "") or ""
+        return record.updated or ""
+
+    def status(self, node_id: str) -> str:
+        """The node's status ('' if unknown)."""
+        idx = self.keys.find(node_id)
+        if idx is None or not self._present[idx]:
+            return ""
+        record = self._records[idx]
+        if record is None:
+            return self.get(node_id).get("status", "active")
+        return self.labels.strings[record.status]
+
+    # --- Postings ---
+
+    def _posting(self, section: str, label_idx: int) -> array:
+        table = self._postings[section]
+        posting = table[label_idx]
+        if isinstance(posting, tuple):
+            offset, length = posting
+            ids = json.loads(self._source[offset:offset + length])
+            posting = table[label_idx] = self._id_set(ids)
+        return posting
+
+    def _sorted_ids(self, section: str, label_idx: int) -> List[str]:
+        """A posting's IDs in ID order, cached until the posting changes."""
+        cached = self._sorted[section].get(label_idx)
+        if cached is None:
+            posting = self._postings[section][label_idx]
+            if isinstance(posting, tuple):
+                offset, length = posting
+                cached = json.loads(self._source[offset:offset + length])  # Written sorted
+            else:
+                cached = self._ids(posting)
+            self._sorted[section][label_idx] = cached
+        return cached
+
+    def postings(self, section: str, label: str) -> Optional[List[str]]:
+        """Node IDs filed under a tag/type label, or None if unknown."""
+        label_idx = self.labels.find(label)
+        if label_idx is None or label_idx not in self._postings[section]:
+            return None
+        return list(self._sorted_ids(section, label_idx))
+
+    def posting_after(self, section: str, label: str, after: Optional[str] = None) -> Iterator[str]:
+        """IDs of a posting in ID order, starting after `after`."""
+        label_idx = self.labels.find(label)
+        if label_idx is None or label_idx not in self._postings[section]:
+            return iter(())
+        node_ids = self._sorted_ids(section, label_idx)
+        start = bisect_right(node_ids, after) if after is not None else 0
+        return (node_ids[i] for i in range(start, len(node_ids)))
+
+    def posting_sample(self, section: str, label: str, k: int, rng) -> List[str]:
+        """Up to k distinct IDs of a posting drawn at random by position."""
+        label_idx = self.labels.find(label)
+        if label_idx is None or label_idx not in self._postings[section]:
+            return []
+        node_ids = self._sorted_ids(section, label_idx)
+        return rng.sample(node_ids, min(k, len(node_ids)))
+
+    def add_posting(self, section: str, label: str, node_id: str) -> None:
+        label_idx = self.labels.intern(label)
+        table = self._postings[section]
+        if label_idx not in table:
+            table[label_idx] = array('i')
+        if _insert_sorted(self._posting(section, label_idx), self._key(node_id)):
+            self._sorted[section].pop(label_idx, None)
+
+    def remove_posting(self, section: str, label: str, node_id: str) -> None:
+        """Drop node_id from a label's posting; empty labels are removed."""
+        label_idx = self.labels.find(label)
+        node_idx = self.keys.find(node_id)
+        if label_idx is None or node_idx is None or label_idx not in self._postings[section]:
+            return
+        posting = self._posting(section, label_idx)
+        if _remove_sorted(posting, node_idx):
+            self._sorted[section].pop(label_idx, None)
+        if not posting:
+            del self._postings[section][label_idx]
+
+    def posting_size(self, section: str, label: str) -> int:
+        """Number of nodes under a label, without interning an undecoded posting."""
+        label_idx = self.labels.find(label)
+        posting = self._postings[section].get(label_idx) if label_idx is not None else None
+        if posting is None:
+            return 0
+        if isinstance(posting, tuple):
+            offset, length = posting
+            return len(json.loads(self._source[offset:offset + length]))
+        return len(posting)
+
+    def posting_count(self, section: str) -> int:
+        return len(self._postings[section])
+
+    def posting_labels(self, section: str) -> Iterator[str]:
+        strings = self.labels.strings
+        for label_idx in self._postings[section]:
+            yield strings[label_idx]
+
+    # --- Serialization ---
+
+    def encoded_nodes(self) -> Iterator[Tuple[str, bytes]]:
+        """(node_id, JSON bytes) for every node; untouched records are copied raw."""
+        strings = self.keys.strings
+        for idx, present in enumerate(self._present):
+            if not present:
+                continue
+            record = self._records[idx]
+            if record is None:
+                offset = self._raw_offset[idx]
+                yield strings[idx], self._source[offset:offset + self._raw_length[idx]]
+            else:
+                yield strings[idx], _encode(self._to_dict(record))
+
+    def encoded_postings(self, section: str) -> Iterator[Tuple[str, bytes]]:
+        """(label, JSON bytes) sorted by label; postings are sorted by node ID."""
+        labels = self.labels.strings
+        table = self._postings[section]
+        for label_idx in sorted(table, key=labels.__getitem__):
+            posting = table[label_idx]
+            if isinstance(posting, tuple):
+                offset, length = posting
+                yield labels[label_idx], self._source[offset:offset + length]
+            else:
+                yield labels[label_idx], _encode(self._sorted_ids(section, label_idx))
+
+
+class NodesView(Mapping):
+    """Read-only {node_id: node dict} view of a NodeStore."""
+
+    def __init__(self, store: NodeStore):
+        self._store = store
+
+    def __getitem__(self, node_id: str) -> Dict:
+        data = self._store.get(node_id)
+        if data is None:
+            raise KeyError(node_id)
+        return data
+
+    def __contains__(self, node_id: object) -> bool:
+        return isinstance(node_id, str) and node_id in self._store
+
+    def __iter__(self) -> Iterator[str]:
+        return self._store.node_ids()
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def encoded_items(self) -> Iterator[Tuple[str, bytes]]:
+        return self._store.encoded_nodes()
+
+
+class PostingsView(Mapping):
+    """Read-only {label: [node_id, ...]} view of a tag, type or MinHash band index."""
+
+    def __init__(self, store: NodeStore, section: str):
+        self._store = store
+        self._section = section
+
+    def __getitem__(self, label: str) -> List[str]:
+        ids = self._store.postings(self._section, label)
+        if ids is None:
+            raise KeyError(label)
+        return ids
+
+    def __iter__(self) -> Iterator[str]:
+        return self._store.posting_labels(self._section)
+
+    def __len__(self) -> int:
+        return self._store.posting_count(self._section)
+
+    def encoded_items(self) -> Iterator[Tuple[str, bytes]]:
+        return self._store.encoded_postings(self._section)
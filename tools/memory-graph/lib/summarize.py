@@ -1,74 +1,275 @@
 #!/usr/bin/env python3
 """
-File Summary Generator - Create summaries for large files
+File Summary Generator - Create summaries for source files
 Uses heuristics (not LLM) for automatic summarization.
+
+Python is parsed with `ast`, so methods (Class.method), async defs and the
+module docstring are found wherever they sit; a file that does not parse
+falls back to the line scanner. TypeScript/JavaScript and Go use line
+scanners: one regex pass per line, tracking only the state a declaration
+needs (Python class nesting, Go import blocks).
+
+Files over STREAM_MIN_BYTES (generated code, bundles) are never read whole:
+they are hashed in chunks and only their first SCAN_BUDGET bytes are fed to
+the line scanner, a bounded line at a time, so memory stays constant at any
+file size.
+
+Summaries are cached by content hash under <memory_dir>/summary-cache/, so a
+file is summarized once per distinct content, across sessions and across
+files with identical content. Entries carry ENGINE_VERSION; bumping it when
+an extractor changes invalidates them.
 """
 
 import os
 import re
+import abc
+import ast
 import sys
-from typing import Dict, List
+import json
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple
 from pathlib import Path
 
+import packfile
+
+ENGINE_VERSION = 4
+CACHE_DIR = "summary-cache"
+MAX_SYMBOLS = 200   # Per file; generated files can define thousands
+MAX_IMPORTS = 100
+DESCRIPTION_CHARS = 200
+DESCRIPTION_LINES = 20   # Top comment lines considered for the description
+STREAM_MIN_BYTES = 512 * 1024  # Larger files are streamed, never read whole
+SCAN_BUDGET = 1024 * 1024      # Bytes of a streamed file the scanners see
+MAX_LINE_BYTES = 64 * 1024     # Longer lines are cut; only their head is scanned
+CHUNK_BYTES = 1024 * 1024      # Read size when hashing a streamed file
+REPO_POOL_MIN_FILES = 64  # Below this a --repo scan runs in-process
+MATCH_NODES = (ast.Match,) if hasattr(ast, "Match") else ()  # Python 3.10+
+
+
+def _symbol(kind: str, name: str, line: int) -> Dict:
+    return {"kind": kind, "name": name, "line": line}
+
+
+class LineScanner(abc.ABC):
+    """Collects symbols and imports from lines fed in order."""
+
+    def __init__(self):
+        self.symbols: List[Dict] = []
+        self.imports: Dict[str, None] = {}  # Ordered set
+
+    @property
+    def full(self) -> bool:
+        return len(self.symbols) >= MAX_SYMBOLS and len(self.imports) >= MAX_IMPORTS
+
+    def add_symbol(self, kind: str, name: str, line: int) -> None:
+        if len(self.symbols) < MAX_SYMBOLS:
+            self.symbols.append(_symbol(kind, name, line))
+
+    def add_import(self, source: str) -> None:
+        if len(self.imports) < MAX_IMPORTS:
+            self.imports[source] = None
+
+    @abc.abstractmethod
+    def feed(self, line_no: int, line: str) -> None:
+        """Scan one line; line_no is 1-based."""
+
+
+class TypeScriptScanner(LineScanner):
+    """Exported declarations and import/require sources (TS and JS)."""
+
+    EXPORTS = [
+        (re.compile(r'^\s*export\s+(?:declare\s+)?(?:async\s+)?function\*?\s+(\w+)'), "function"),
+        (re.compile(r'^\s*export\s+(?:declare\s+)?(?:abstract\s+)?class\s+(\w+)'), "class"),
+        (re.compile(r'^\s*export\s+(?:declare\s+)?(?:const|let|var)\s+(\w+)'), "const"),
+        (re.compile(r'^\s*export\s+(?:declare\s+)?(?:interface|type|enum)\s+(\w+)'), "type"),
+    ]
+    DEFAULT = re.compile(r'^\s*export\s+default\s+(?:async\s+)?(?:class|function\*?)?\s*(\w+)?')
+    IMPORTS = re.compile(r"""(?:\bfrom\s+|^\s*import\s+|\brequire\(\s*)['"]([^'"]+)['"]""")
+
+    def feed(self, line_no: int, line: str) -> None:
+        if 'export' in line:
+            for pattern, kind in self.EXPORTS:
+                match = pattern.match(line)
+                if match:
+                    self.add_symbol(kind, match.group(1), line_no)
+                    break
+            else:
+                match = self.DEFAULT.match(line)
+                if match:
+                    self.add_symbol("default", match.group(1) or "default", line_no)
+        if 'from' in line or 'import' in line or 'require' in line:
+            for match in self.IMPORTS.finditer(line):
+                self.add_import(match.group(1))
+
+
+class GoScanner(LineScanner):
+    """Top-level funcs (Type.Method for methods), struct/interface types, imports."""
+
+    FUNC = re.compile(r'^func\s+(?:\(\s*(?:\w+\s+)?\*?(\w+)[^)]*\)\s*)?(\w+)')
+    TYPE = re.compile(r'^type\s+(\w+)\s+(?:struct|interface)\b')
+    IMPORT = re.compile(r'^import\s+(?:\w+\s+)?"([^"]+)"')
+    BLOCK_IMPORT = re.compile(r'^\s*(?:[\w.]+\s+)?"([^"]+)"')
+
+    def __init__(self):
+        super().__init__()
+        self.in_imports = False
+
+    def feed(self, line_no: int, line: str) -> None:
+        if self.in_imports:
+            if line.strip().startswith(')'):
+                self.in_imports = False
+            else:
+                match = self.BLOCK_IMPORT.match(line)
+                if match:
+                    self.add_import(match.group(1))
+            return
+        if line.startswith('func'):
+            match = self.FUNC.match(line)
+            if match:
+                receiver, name = match.groups()
+                self.add_symbol("func", f"{receiver}.{name}" if receiver else name, line_no)
+        elif line.startswith('type'):
+            match = self.TYPE.match(line)
+            if match:
+                self.add_symbol("type", match.group(1), line_no)
+        elif line.startswith('import'):
+            if re.match(r'^import\s*\($', line.rstrip()):
+                self.in_imports = True
+            else:
+                match = self.IMPORT.match(line)
+                if match:
+                    self.add_import(match.group(1))
+
+
+class PythonScanner(LineScanner):
+    """
+    Regex fallback for Python that does not parse: defs and classes, with
+    methods qualified by their class from indentation. Functions nested in
+    functions are skipped, as in the ast path.
+    """
+
+    DEF = re.compile(r'^([ \t]*)(?:async\s+)?(def|class)\s+(\w+)')
+    IMPORT = re.compile(r'^\s*import\s+([\w.]+)')
+    FROM = re.compile(r'^\s*from\s+(\.*[\w.]*)\s+import\b')
+    FROM_PACKAGE = re.compile(r'^\s*from\s+(\.+)\s+import\s+\(?\s*([\w\s,]+)')
+
+    def __init__(self):
+        super().__init__()
+        self.scopes: List[Tuple[int, str, str]] = []  # (indent, kind, qualified name)
+
+    def feed(self, line_no: int, line: str) -> None:
+        match = self.DEF.match(line)
+        if match:
+            indent, kind, name = len(match.group(1).expandtabs()), match.group(2), match.group(3)
+            while self.scopes and self.scopes[-1][0] >= indent:
+                self.scopes.pop()
+            parent = self.scopes[-1] if self.scopes else None
+            if parent is None or parent[1] == "class":
+                qualified = f"{parent[2]}.{name}" if parent else name
+                self.add_symbol(kind, qualified, line_no)
+            else:
+                qualified = ""  # Inside a function: not part of the file's API
+            self.scopes.append((indent, kind if qualified else "def", qualified))
+            return
+        match = self.FROM_PACKAGE.match(line)
+        if match:
+            for name in match.group(2).split(','):
+                if name.split():
+                    self.add_import(match.group(1) + name.split()[0])
+            return
+        match = self.IMPORT.match(line) or self.FROM.match(line)
+        if match:
+            self.add_import(match.group(1))
+
+
+SCANNERS = {
+    'typescript': TypeScriptScanner,
+    'javascript': TypeScriptScanner,
+    'go': GoScanner,
+    'python': PythonScanner,
+}
+
+
+def scan_lines(language: str, lines: Iterable[str]) -> Tuple[List[Dict], List[str]]:
+    """(symbols, imports) from a line scanner; ([], []) for other languages."""
+    scanner_class = SCANNERS.get(language)
+    if scanner_class is None:
+        return [], []
+    scanner = scanner_class()
+    for line_no, line in enumerate(lines, 1):
+        scanner.feed(line_no, line)
+        if scanner.full:
+            break
+    return scanner.symbols, list(scanner.imports)
+
+
+def extract_python(content: str) -> Optional[Tuple[List[Dict], List[str], str]]:
+    """(symbols, imports, docstring) via ast; None if the source does not parse."""
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return None
+
+    symbols: List[Dict] = []
+    imports: Dict[str, None] = {}
+
+    def visit(body, prefix: Optional[str]) -> None:
+        # Statements only: imports and defs never sit inside expressions.
+        # prefix is None inside functions, where imports count but defs do not.
+        for node in body:
+            if isinstance(node, ast.Import):
+                imports.update((alias.name, None) for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                if node.module is None:
+                    # from . import a, b: the names are sibling modules
+                    imports.update(("." * node.level + alias.name, None) for alias in node.names)
+                else:
+                    imports["." * node.level + node.module] = None
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                is_class = isinstance(node, ast.ClassDef)
+                if prefix is not None and len(symbols) < MAX_SYMBOLS:
+                    symbols.append(_symbol("class" if is_class else "def", prefix + node.name, node.lineno))
+                visit(node.body, f"{prefix}{node.name}." if is_class and prefix is not None else None)
+            elif isinstance(node, MATCH_NODES):
+                # match has no body of its own, only its cases'
+                for case in node.cases:
+                    visit(case.body, prefix)
+            elif hasattr(node, "body"):
+                # if/try/with/for blocks (try: import ... except ImportError: def ...)
+                for field in ("body", "orelse", "finalbody"):
+                    visit(getattr(node, field, ()), prefix)
+                for handler in getattr(node, "handlers", []):
+                    visit(handler.body, prefix)
+
+    visit(tree.body, "")
+    return symbols, list(imports)[:MAX_IMPORTS], ast.get_docstring(tree) or ""
+
 
 def extract_exports_ts(content: str) -> List[str]:
     """Extract exported functions/classes from TypeScript/JavaScript."""
-    exports = []
-
-    # export function name
-    for match in re.finditer(r'export\s+(?:async\s+)?function\s+(\w+)', content):
-        exports.append(f"function {match.group(1)}")
-
-    # export class name
-    for match in re.finditer(r'export\s+class\s+(\w+)', content):
-        exports.append(f"class {match.group(1)}")
-
-    # export const name
-    for match in re.finditer(r'export\s+const\s+(\w+)', content):
-        exports.append(f"const {match.group(1)}")
-
-    # export default
-    for match in re.finditer(r'export\s+default\s+(?:class|function)?\s*(\w+)?', content):
-        name = match.group(1) or "default"
-        exports.append(f"default {name}")
-
-    return exports[:10]  # Limit to 10
+    symbols, _ = scan_lines('typescript', content.splitlines())
+    return format_symbols(symbols)
 
 
 def extract_imports_ts(content: str) -> List[str]:
     """Extract import sources from TypeScript/JavaScript."""
-    imports = []
-
-    for match in re.finditer(r"from\s+['\"]([^'\"]+)['\"]", content):
-        imports.append(match.group(1))
-
-    return list(set(imports))[:10]
+    return scan_lines('typescript', content.splitlines())[1]
 
 
 def extract_functions_py(content: str) -> List[str]:
-    """Extract function/class definitions from Python."""
-    defs = []
-
-    for match in re.finditer(r'^(?:async\s+)?def\s+(\w+)', content, re.MULTILINE):
-        defs.append(f"def {match.group(1)}")
-
-    for match in re.finditer(r'^class\s+(\w+)', content, re.MULTILINE):
-        defs.append(f"class {match.group(1)}")
-
-    return defs[:10]
+    """Extract function/class definitions (methods as Class.method) from Python."""
+    parsed = extract_python(content)
+    symbols = parsed[0] if parsed else scan_lines('python', content.splitlines())[0]
+    return format_symbols(symbols)
 
 
 def extract_functions_go(content: str) -> List[str]:
     """Extract function definitions from Go."""
-    defs = []
-
-    for match in re.finditer(r'^func\s+(?:\([^)]+\)\s+)?(\w+)', content, re.MULTILINE):
-        defs.append(f"func {match.group(1)}")
+    return format_symbols(scan_lines('go', content.splitlines())[0])
 
-    for match in re.finditer(r'^type\s+(\w+)\s+struct', content, re.MULTILINE):
-        defs.append(f"type {match.group(1)}")
 
-    return defs[:10]
+def format_symbols(symbols: List[Dict]) -> List[str]:
+    return [f"{s['kind']} {s['name']}" for s in symbols]
 
 
 def detect_language(file_path: str) -> str:
@@ -79,6 +280,8 @@ def detect_language(file_path: str) -> str:
         '.tsx': 'typescript',
         '.js': 'javascript',
         '.jsx': 'javascript',
+        '.mjs': 'javascript',
+        '.cjs': 'javascript',
         '.py': 'python',
         '.go': 'go',
         '.rs': 'rust',
@@ -90,50 +293,475 @@ def detect_language(file_path: str) -> str:
     return lang_map.get(ext, 'unknown')
 
 
+def comment_description(lines: Iterable[str]) -> str:
+    """First few comment lines at the top of a file, joined."""
+    desc_lines = []
+    for line in lines:
+        line = line.strip()
+        if line.startswith('//') or line.startswith('#') or line.startswith('*') or line.startswith('/*'):
+            clean = re.sub(r'^[/#*!\s]+', '', line).rstrip('*/ ')
+            if clean and not clean.startswith('@'):
+                desc_lines.append(clean)
+                if len(desc_lines) == 3:
+                    break
+    return ' '.join(desc_lines)[:DESCRIPTION_CHARS]
+
+
 def generate_summary(file_path: str, content: str) -> Dict:
     """Generate a summary for a file."""
     language = detect_language(file_path)
-    lines = content.split('\n')
-    line_count = len(lines)
-    size_kb = len(content) / 1024
+    lines = content.splitlines()
 
     summary = {
         "path": file_path,
         "language": language,
-        "line_count": line_count,
-        "size_kb": round(size_kb, 1),
+        "line_count": content.count('\n') + 1,
+        "size_kb": round(len(content) / 1024, 1),
         "exports": [],
         "imports": [],
-        "description": ""
+        "symbols": [],
+        "description": "",
+        "truncated": False
     }
 
-    # Extract based on language
-    if language in ['typescript', 'javascript']:
-        summary["exports"] = extract_exports_ts(content)
-        summary["imports"] = extract_imports_ts(content)
-    elif language == 'python':
-        summary["exports"] = extract_functions_py(content)
-    elif language == 'go':
-        summary["exports"] = extract_functions_go(content)
+    parsed = extract_python(content) if language == 'python' else None
+    if parsed:
+        symbols, imports, docstring = parsed
+        description = ' '.join(docstring.split('\n\n')[0].split())[:DESCRIPTION_CHARS]
+    else:
+        symbols, imports = scan_lines(language, lines)
+        description = ""
 
-    # Try to extract description from top comments
-    desc_lines = []
-    for line in lines[:20]:
-        line = line.strip()
-        if line.startswith('//') or line.startswith('#') or line.startswith('*'):
-            clean = re.sub(r'^[/#*\s]+', '', line)
-            if clean and not clean.startswith('@'):
-                desc_lines.append(clean)
-        elif line.startswith('"""') or line.startswith("'''"):
-            # Python docstring
-            continue
+    summary["symbols"] = symbols
+    summary["exports"] = format_symbols(symbols)
+    summary["imports"] = imports
+    summary["description"] = description or comment_description(lines[:DESCRIPTION_LINES])
+    return summary
 
-    if desc_lines:
-        summary["description"] = ' '.join(desc_lines[:3])[:200]
 
+# === Local imports ===
+
+# Suffixes tried for a relative JS/TS import, in the bundlers' order
+SCRIPT_SUFFIXES = ("", ".ts", ".tsx", ".d.ts", ".js", ".jsx", ".mjs", ".cjs",
+                   "/index.ts", "/index.tsx", "/index.js", "/index.jsx")
+
+
+def _import_candidates(base_dir: str, source: str, language: str) -> Iterable[str]:
+    if language == "python":
+        level = len(source) - len(source.lstrip('.'))
+        if not level:
+            return ()
+        package = base_dir
+        for _ in range(level - 1):
+            package = os.path.dirname(package)
+        module = source[level:].replace('.', os.sep)
+        if not module:
+            return (os.path.join(package, "__init__.py"),)
+        stem = os.path.join(package, module)
+        return (stem + ".py", os.path.join(stem, "__init__.py"))
+    if language in ("typescript", "javascript") and source.startswith(('./', '../')):
+        stem = os.path.normpath(os.path.join(base_dir, source))
+        candidates = [stem + suffix for suffix in SCRIPT_SUFFIXES]
+        # ESM TypeScript imports its siblings by their compiled .js name
+        if language == "typescript" and stem.endswith(".js"):
+            candidates[0:0] = [stem[:-3] + ".ts", stem[:-3] + ".tsx"]
+        return candidates
+    return ()
+
+
+def resolve_imports(file_path: str, imports: List[str], language: str) -> List[str]:
+    """
+    Files in the same tree that file_path's relative imports name (Python
+    dotted, JS/TS ./ and ../), each once, limited to summarized languages.
+    Package imports (os, react, Go module paths) are not resolved.
+    """
+    base_dir = os.path.dirname(file_path)
+    resolved: Dict[str, None] = {}
+    for source in imports:
+        for candidate in _import_candidates(base_dir, source, language):
+            if detect_language(candidate) in SCANNERS and os.path.isfile(candidate):
+                if candidate != file_path:
+                    resolved[candidate] = None
+                break
+    return list(resolved)
+
+
+# === Content-hash cache ===
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+class SummaryCache:
+    """Summaries keyed by (content hash, language), one small JSON file each."""
+
+    def __init__(self, memory_dir: str):
+        self.root = os.path.join(memory_dir, CACHE_DIR)
+
+    def _path(self, digest: str, language: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}-{language}.json")
+
+    def get(self, digest: str, language: str) -> Optional[Dict]:
+        try:
+            with open(self._path(digest, language), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or entry.get("engine") != ENGINE_VERSION:
+            return None
+        return entry.get("summary")
+
+    def put(self, digest: str, language: str, summary: Dict) -> None:
+        path = self._path(digest, language)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        stored = {k: v for k, v in summary.items() if k not in ("path", "content_hash")}
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({"engine": ENGINE_VERSION, "summary": stored}, separators=(',', ':')))
+            os.replace(tmp, path)
+        except OSError:
+            pass  # Read-only memory dir: run uncached
+
+
+def summarize_file(file_path: str, memory_dir: Optional[str] = None,
+                   unless_hash: Optional[str] = None) -> Optional[Dict]:
+    """
+    Summary of the file on disk, with its "content_hash". Served from the
+    cache in memory_dir when the content was seen before (no cache if None).
+    Returns None if the content hash equals unless_hash (file unchanged).
+
+    Files over STREAM_MIN_BYTES are never held in memory: one chunked pass
+    hashes them and counts lines, and on a cache miss stream_summary() scans
+    their head.
+    """
+    if os.path.getsize(file_path) <= STREAM_MIN_BYTES:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        digest = content_hash(data)
+        if digest == unless_hash:
+            return None
+        return _cached(file_path, digest, memory_dir,
+                       lambda: generate_summary(file_path, data.decode('utf-8', errors='ignore')))
+
+    digest, size, newlines = digest_stream(file_path)
+    if digest == unless_hash:
+        return None
+    return _cached(file_path, digest, memory_dir, lambda: stream_summary(file_path, size, newlines))
+
+
+def summarize_bytes(file_path: str, data: bytes, memory_dir: Optional[str] = None) -> Dict:
+    """summarize_file() for content already read."""
+    return _cached(file_path, content_hash(data), memory_dir,
+                   lambda: generate_summary(file_path, data.decode('utf-8', errors='ignore')))
+
+
+def _cached(file_path: str, digest: str, memory_dir: Optional[str], build) -> Dict:
+    language = detect_language(file_path)
+    cache = SummaryCache(memory_dir) if memory_dir else None
+    summary = cache.get(digest, language) if cache else None
+    if summary is None:
+        summary = build()
+        if cache:
+            cache.put(digest, language, summary)
+    # Location-dependent, so resolved per call rather than cached by content
+    summary["path"] = file_path
+    summary["content_hash"] = digest
+    summary["local_imports"] = resolve_imports(file_path, summary["imports"], language)
     return summary
 
 
+# === Large files ===
+
+def digest_stream(file_path: str) -> Tuple[str, int, int]:
+    """(content hash, size, newline count) read in fixed-size chunks."""
+    hasher = hashlib.sha1()
+    size = newlines = 0
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_BYTES), b''):
+            hasher.update(chunk)
+            size += len(chunk)
+            newlines += chunk.count(b'\n')
+    return hasher.hexdigest(), size, newlines
+
+
+def stream_summary(file_path: str, size: int, newlines: int) -> Dict:
+    """
+    Summary of a large file from at most SCAN_BUDGET bytes of its head, read
+    a line at a time (lines are cut at MAX_LINE_BYTES, so a minified file is
+    not one giant read). Scanning stops early once the scanner's symbol and
+    import caps are full. Python is not parsed with ast here: the line
+    scanner needs no full source. size and newlines come from digest_stream().
+    """
+    language = detect_language(file_path)
+    scanner_class = SCANNERS.get(language)
+    scanner = scanner_class() if scanner_class else None
+    head: List[str] = []
+    scanned = line_no = 0
+    at_line_start = True
+
+    with open(file_path, 'rb') as f:
+        while scanned < SCAN_BUDGET:
+            if (scanner is None or scanner.full) and line_no >= DESCRIPTION_LINES:
+                break
+            raw = f.readline(MAX_LINE_BYTES)
+            if not raw:
+                break
+            scanned += len(raw)
+            if at_line_start:  # Continuations of a cut line are skipped
+                line_no += 1
+                line = raw.decode('utf-8', errors='ignore').rstrip('\r\n')
+                if line_no <= DESCRIPTION_LINES:
+                    head.append(line)
+                if scanner is not None:
+                    scanner.feed(line_no, line)
+            at_line_start = raw.endswith(b'\n')
+
+    symbols = scanner.symbols if scanner else []
+    return {
+        "path": file_path,
+        "language": language,
+        "line_count": newlines + 1,
+        "size_kb": round(size / 1024, 1),
+        "exports": format_symbols(symbols),
+        "imports": list(scanner.imports) if scanner else [],
+        "symbols": symbols,
+        "description": comment_description(head),
+        "truncated": scanned >= SCAN_BUDGET and scanned < size,
+    }
+
+
+# === Repository scan (summarize.py --repo) ===
+
+class GitIgnore:
+    """
+    .gitignore matching for trees without a usable git: patterns, `!`
+    negation, trailing `/` for directories, leading or inner `/` anchoring
+    and `**`. Rules are loaded per directory as the walk reaches it.
+    """
+
+    def __init__(self):
+        self.rules: List[Tuple[str, "re.Pattern", bool, bool]] = []  # (base, regex, negate, dir_only)
+
+    @staticmethod
+    def _translate(pattern: str) -> str:
+        out, i = [], 0
+        while i < len(pattern):
+            if pattern.startswith('**/', i):
+                out.append('(?:.*/)?')
+                i += 3
+            elif pattern.startswith('**', i):
+                out.append('.*')
+                i += 2
+            elif pattern[i] == '*':
+                out.append('[^/]*')
+                i += 1
+            elif pattern[i] == '?':
+                out.append('[^/]')
+                i += 1
+            elif pattern[i] == '[' and ']' in pattern[i + 1:]:
+                end = pattern.index(']', i + 1)
+                out.append('[' + pattern[i + 1:end].replace('!', '^', 1) + ']')
+                i = end + 1
+            else:
+                out.append(re.escape(pattern[i]))
+                i += 1
+        return ''.join(out)
+
+    def load(self, base: str, path: str) -> None:
+        """Add the rules of the .gitignore at path, for files under base ('' = root)."""
+        try:
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return
+        for line in lines:
+            line = line.rstrip()
+            if not line or line.startswith('#'):
+                continue
+            negate = line.startswith('!')
+            line = line[1:] if negate else line
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            anchored = '/' in line
+            regex = self._translate(line.lstrip('/'))
+            if not anchored:
+                regex = '(?:.*/)?' + regex
+            self.rules.append((base, re.compile(regex + r'\Z'), negate, dir_only))
+
+    def ignored(self, rel_path: str, is_dir: bool) -> bool:
+        result = False
+        for base, regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if base:
+                if not rel_path.startswith(base + '/'):
+                    continue
+                path = rel_path[len(base) + 1:]
+            else:
+                path = rel_path
+            if regex.match(path):
+                result = not negate
+        return result
+
+
+def list_repo_files(repo_dir: str) -> List[str]:
+    """
+    Paths (relative to repo_dir) of files git would track: `git ls-files`
+    when repo_dir is a work tree, else a walk honouring .gitignore files.
+    """
+    import subprocess
+    try:
+        result = subprocess.run(["git", "-C", repo_dir, "ls-files", "-z", "--cached", "--others",
+                                 "--exclude-standard"], capture_output=True, timeout=60)
+        if result.returncode == 0:
+            return [p for p in result.stdout.decode('utf-8', errors='ignore').split('\0') if p]
+    except (OSError, subprocess.SubprocessError):
+        pass
+
+    ignore = GitIgnore()
+    files = []
+    for root, dirs, names in os.walk(repo_dir):
+        rel_root = os.path.relpath(root, repo_dir).replace(os.sep, '/')
+        rel_root = '' if rel_root == '.' else rel_root
+        if '.gitignore' in names:
+            ignore.load(rel_root, os.path.join(root, '.gitignore'))
+        prefix = rel_root + '/' if rel_root else ''
+        dirs[:] = sorted(d for d in dirs if d != '.git' and not ignore.ignored(prefix + d, True))
+        files.extend(prefix + n for n in sorted(names) if not ignore.ignored(prefix + n, False))
+    return files
+
+
+def node_content_hash(text: str) -> Optional[str]:
+    """content_hash from a node's frontmatter (None if absent)."""
+    match = re.search(r'^content_hash:\s*(\w+)', text.split('\n---', 1)[0], re.MULTILINE)
+    return match.group(1) if match else None
+
+
+def _node_content_hash(node_path: str) -> Optional[str]:
+    if packfile.split_path(node_path) is not None:
+        text = packfile.read_node_text(node_path)
+        return node_content_hash(text) if text else None
+    try:
+        with open(node_path, 'r', encoding='utf-8', errors='ignore') as f:
+            return node_content_hash(f.read(4096))
+    except OSError:
+        return None
+
+
+def _graph_node_path(graph, node_id: str) -> Optional[str]:
+    """Loose or pack path of node_id as the graph records it, if the node is there."""
+    data = graph.get_node(node_id)
+    path = data.get("path", "") if data else ""
+    return path if path and packfile.node_exists(path) else None
+
+
+def _repo_job(job: Tuple[str, str, str, str]) -> Tuple[str, Optional[Dict]]:
+    """Worker: ("unchanged" | "changed" | "error", summary) for one file."""
+    file_path, _, node_path, memory_dir = job
+    try:
+        summary = summarize_file(file_path, memory_dir, unless_hash=_node_content_hash(node_path))
+        return ("changed", summary) if summary else ("unchanged", None)
+    except (OSError, ValueError, RecursionError):
+        return "error", None
+
+
+def summarize_repo(repo_dir: str, memory_dir: str, jobs: Optional[int] = None) -> Dict:
+    """
+    Summarize every auto-summarized source file of repo_dir into file-summary
+    nodes: files run across a process pool, nodes are written by this
+    process, and the graph cache takes them in one apply_changes() batch.
+    Existing nodes are found through the graph, so a packed node is unpacked
+    and updated rather than shadowed by a new file. Files whose node already
+    has their content hash are skipped.
+    """
+    from capture import (file_path_to_node_id, file_summary_node, get_node_path,
+                         refresh_file_summary, summarize_languages)
+    from graph import MemoryGraph
+
+    graph = MemoryGraph(memory_dir)
+    languages = set(summarize_languages(memory_dir))
+    repo_dir = os.path.abspath(repo_dir)
+    work = []
+    seen = set()
+    for rel in list_repo_files(repo_dir):
+        if detect_language(rel) in languages:
+            file_path = os.path.join(repo_dir, rel)
+            node_id = file_path_to_node_id(file_path)
+            if node_id not in seen:  # Long paths can truncate to the same node ID; first wins
+                seen.add(node_id)
+                node_path = (_graph_node_path(graph, node_id)
+                             or get_node_path(memory_dir, "file-summary", node_id))
+                work.append((file_path, node_id, node_path, memory_dir))
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs > 1 and len(work) > REPO_POOL_MIN_FILES:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(_repo_job, work, chunksize=16))
+    else:
+        results = [_repo_job(job) for job in work]
+
+    counts = {"files": len(work), "created": 0, "updated": 0, "unchanged": 0, "errors": 0}
+    changed = []
+    for (file_path, node_id, _, _), (status, summary) in zip(work, results):
+        if status == "changed":
+            changed.append((file_path, node_id, summary))
+        else:
+            counts["unchanged" if status == "unchanged" else "errors"] += 1
+    if not changed:
+        return counts
+
+    with graph.mutation_lock():
+        # Resolve again under the lock: a node may have been packed or
+        # captured while the files were being summarized
+        paths = {node_id: _graph_node_path(graph, node_id) for _, node_id, _ in changed}
+        packed = [node_id for node_id, path in paths.items()
+                  if path and packfile.split_path(path) is not None]
+        if packed:
+            packfile.unpack_nodes(graph, packed)
+            for node_id in packed:
+                paths[node_id] = os.path.join(graph.nodes_dir, packfile.split_path(paths[node_id])[1])
+
+        written = []
+        for file_path, node_id, summary in changed:
+            node_path = paths[node_id] or get_node_path(memory_dir, "file-summary", node_id)
+            text = packfile.read_node_text(node_path) if os.path.exists(node_path) else None
+            if text is not None:
+                text = refresh_file_summary(text, summary)
+                counts["updated"] += 1
+            else:
+                text = file_summary_node(file_path, "summarize", summary, access_count=0)[1]
+                os.makedirs(os.path.dirname(node_path), exist_ok=True)
+                counts["created"] += 1
+            with open(node_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            written.append(node_path)
+        graph.apply_changes(written)
+    return counts
+
+
+# === Rendering ===
+
+def format_sections(summary: Dict) -> str:
+    """"## Key Exports" and "## Dependencies" sections of a file-summary node."""
+    lines = []
+    symbols = summary.get("symbols", [])
+    if symbols:
+        lines.append("## Key Exports")
+        # All of them: the symbol index (lib/symbols.py) is built from this list
+        for s in symbols:
+            lines.append(f"- `{s['kind']} {s['name']}` (line {s['line']})")
+        lines.append("")
+
+    if summary["imports"]:
+        lines.append("## Dependencies")
+        for imp in summary["imports"]:
+            lines.append(f"- `{imp}`")
+        lines.append("")
+    return '\n'.join(lines)
+
+
 def format_as_markdown(summary: Dict) -> str:
     """Format summary as markdown content for a node."""
     lines = [f"# {summary['path']}", ""]
@@ -148,39 +776,39 @@ def format_as_markdown(summary: Dict) -> str:
     lines.append(f"- **Size**: {summary['size_kb']} KB")
     lines.append("")
 
-    if summary["exports"]:
-        lines.append("## Exports")
-        for exp in summary["exports"]:
-            lines.append(f"- `{exp}`")
-        lines.append("")
-
-    if summary["imports"]:
-        lines.append("## Dependencies")
-        for imp in summary["imports"]:
-            lines.append(f"- `{imp}`")
-        lines.append("")
-
-    return '\n'.join(lines)
+    return '\n'.join(lines) + '\n' + format_sections(summary)
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: summarize.py <file_path> [--json]")
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarize a source file, or a whole repository into file-summary nodes")
+    parser.add_argument("file_path", nargs="?", help="File to summarize")
+    parser.add_argument("--repo", metavar="DIR", help="Summarize every source file under DIR into the memory graph")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes for --repo (default: CPU count)")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    parser.add_argument("--memory-dir", default=os.environ.get("CLAUDE_MEMORY_DIR", ".claude/memory"),
+                        help="Memory directory holding the summary cache")
+    parser.add_argument("--no-cache", action="store_true", help="Always re-summarize")
+    args = parser.parse_args()
+
+    if args.repo:
+        for directory in (args.repo, args.memory_dir):
+            if not os.path.isdir(directory):
+                print(f"Directory not found: {directory}", file=sys.stderr)
+                sys.exit(1)
+        print(json.dumps(summarize_repo(args.repo, args.memory_dir, args.jobs)))
+        sys.exit(0)
+    if not args.file_path:
+        parser.error("a file path or --repo DIR is required")
+    if not os.path.exists(args.file_path):
+        print(f"File not found: {args.file_path}", file=sys.stderr)
         sys.exit(1)
 
-    file_path = sys.argv[1]
-
-    if not os.path.exists(file_path):
-        print(f"File not found: {file_path}", file=sys.stderr)
-        sys.exit(1)
-
-    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-        content = f.read()
-
-    summary = generate_summary(file_path, content)
+    use_cache = not args.no_cache and os.path.isdir(args.memory_dir)
+    summary = summarize_file(args.file_path, args.memory_dir if use_cache else None)
 
-    if "--json" in sys.argv:
-        import json
+    if args.json:
         print(json.dumps(summary, indent=2))
     else:
         print(format_as_markdown(summary))
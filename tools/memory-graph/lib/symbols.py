@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Symbols - Definition index over file-summary nodes (query.py --command symbol)
+
+The summarizer lists a file's definitions under "## Key Exports" as
+"- `kind name` (line N)". node_record() parses that list into the node's
+"symbols" entry ([kind, name, line] triples), and this secondary index files
+the node under each symbol name in the "symbols" postings section of
+graph.json. A qualified name (Class.method, Type.Method) is also filed under
+its last part, so "charge" finds "Billing.charge".
+
+A lookup is one posting read plus the records it names, through the
+graph.idx index like tag lookups; no node file is opened.
+"""
+
+import re
+from typing import Dict, List, Optional, Set
+
+SECTION = "symbols"
+_LISTED = re.compile(r'^- `(\S+) ([^`]+)` \(line (\d+)\)', re.MULTILINE)
+_KEY_EXPORTS = re.compile(r'^## Key Exports\n(.*?)(?=^## |\Z)', re.MULTILINE | re.DOTALL)
+
+
+def node_symbols(node_type: str, content: str) -> List[List]:
+    """[kind, name, line] for each definition listed in a file-summary body."""
+    if node_type != "file-summary":
+        return []
+    match = _KEY_EXPORTS.search(content)
+    if not match:
+        return []
+    return [[kind, name, int(line)] for kind, name, line in _LISTED.findall(match.group(1))]
+
+
+def labels(symbols: Optional[List[List]]) -> Set[str]:
+    """Posting labels of a symbol list: each name, and the last part of qualified ones."""
+    result: Set[str] = set()
+    for _, name, _ in symbols or ():
+        result.add(name)
+        if '.' in name:
+            result.add(name.rsplit('.', 1)[1])
+    return result
+
+
+def update_symbol_index(graph, node_id: str, old: Optional[Dict], new: Optional[Dict]) -> None:
+    """Secondary index hook: keep the symbol postings in step."""
+    old_labels = labels(old.get(SECTION)) if old else set()
+    new_labels = labels(new.get(SECTION)) if new else set()
+    if old_labels == new_labels:
+        return
+    store = graph.store
+    for label in old_labels - new_labels:
+        store.remove_posting(SECTION, label, node_id)
+    for label in new_labels - old_labels:
+        store.add_posting(SECTION, label, node_id)
+
+
+def matches(data: Optional[Dict], name: str) -> List[List]:
+    """[kind, name, line] entries of one node record that define name."""
+    return [entry for entry in (data or {}).get(SECTION, [])
+            if entry[1] == name or entry[1].endswith('.' + name)]
+
+
+def find_symbol(graph, name: str) -> List[Dict]:
+    """Definitions of name (exact or as the last part of a qualified name), by node ID."""
+    hits = []
+    for node_id in graph.get_posting(SECTION, name):
+        data = graph.get_node(node_id)
+        for kind, symbol, line in matches(data, name):
+            hits.append({"node_id": node_id, "kind": kind, "name": symbol, "line": line,
+                         "file": data.get("file_path", "")})
+    return hits
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Vectors - TF-IDF similarity index over node content
+
+Each node's body (frontmatter stripped) becomes a sparse vector of
+log-scaled term frequencies, L2-normalized and capped at MAX_TERMS terms.
+Similarity is the IDF-weighted dot product sum(idf(t)^2 * q_t * d_t), scaled
+so that a document identical to the query scores 1.0; IDF is applied at query
+time, so stored vectors never change when other nodes are
+added and the index can be maintained one node at a time.
+
+On disk (<memory_dir>/vectors/), written under the graph mutation lock:
+
+    meta.json              generation, slot and live document counts
+    docs.<gen>.tsv         one "node_id<TAB>mtime" line per document slot
+                           (empty id = removed)
+    terms.<gen>.tsv        sorted "term<TAB>start<TAB>count" lines
+    postings.<gen>.doc     little-endian uint32 document slots, grouped
+                           by term
+    postings.<gen>.w       little-endian float32 weights, parallel to .doc
+    delta.json             documents added or changed since the base was
+                           written, and IDs whose base slot is stale
+
+Queries memory-map the base, binary-search the term table, and accumulate
+scores with NumPy when it is installed (plain arrays otherwise). The delta is
+merged into a new base generation once it holds DELTA_LIMIT documents.
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import heapq
+import mmap
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from packfile import read_node_text
+
+VECTORS_DIR = "vectors"
+INDEX_FORMAT = 1
+MAX_TERMS = 64          # strongest terms kept per document
+DELTA_LIMIT = 1000      # delta documents before the base is rewritten
+COMMON_DF = 0.3         # query terms in more of the corpus than this are skipped...
+COMMON_MIN = 1000       # ...once their postings are this long
+
+_TOKEN = re.compile(r'[a-z][a-z0-9_]+')
+_FRONTMATTER = re.compile(r'\A---\s*\n.*?\n---\s*\n', re.DOTALL)
+STOPWORDS = frozenset("""
+    a an and are as at be been but by can could did do does for from had has have
+    how if in into is it its may more most no not of on or our should so such than
+    that the their then there these they this those to was we were what when where
+    which while who why will with would you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def text_vector(text: str) -> Dict[str, float]:
+    """L2-normalized log-tf vector of text, strongest MAX_TERMS terms."""
+    counts: Dict[str, int] = {}
+    for token in tokenize(text):
+        counts[token] = counts.get(token, 0) + 1
+    weights = {t: 1.0 + math.log(c) for t, c in counts.items()}
+    if len(weights) > MAX_TERMS:
+        weights = dict(heapq.nlargest(MAX_TERMS, weights.items(), key=lambda kv: (kv[1], kv[0])))
+    norm = math.sqrt(sum(w * w for w in weights.values()))
+    return {t: round(w / norm, 4) for t, w in sorted(weights.items())} if norm else {}
+
+
+def node_text(path: str) -> str:
+    """Node body without frontmatter, '' if unreadable."""
+    text = read_node_text(path) or ""
+    return _FRONTMATTER.sub('', text, count=1)
+
+
+class VectorIndex:
+    """Memory-mapped base segment plus a JSON delta."""
+
+    def __init__(self, memory_dir: str):
+        self.dir = os.path.join(memory_dir, VECTORS_DIR)
+        self.meta: Dict = {"format": INDEX_FORMAT, "generation": 0, "slots": 0, "live": 0}
+        self.delta: Dict[str, list] = {}     # node_id -> [mtime, {term: weight}]
+        self.stale: Set[str] = set()         # base slots no longer current
+        self._docs: Optional[List[Tuple[str, float]]] = None
+        self._slot_of: Optional[Dict[str, int]] = None
+        self._terms: Optional[mmap.mmap] = None
+        self._postings: Optional[Tuple[mmap.mmap, mmap.mmap]] = None
+        self._building: Optional[Set[str]] = None
+        self._dirty = False
+        self.load()
+
+    # --- Loading ---
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.dir, name.format(gen=self.meta["generation"]))
+
+    def load(self) -> None:
+        self.close()
+        try:
+            with open(os.path.join(self.dir, "meta.json"), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get("format") == INDEX_FORMAT:
+                self.meta = meta
+        except (OSError, json.JSONDecodeError):
+            pass
+        self.delta, self.stale = {}, set()
+        try:
+            with open(os.path.join(self.dir, "delta.json"), 'r', encoding='utf-8') as f:
+                delta = json.load(f)
+            if delta.get("generation") == self.meta["generation"]:
+                self.delta = delta.get("docs", {})
+                self.stale = set(delta.get("stale", []))
+        except (OSError, json.JSONDecodeError):
+            pass
+
+    def docs(self) -> List[Tuple[str, float]]:
+        """Base document slots as (node_id, mtime); '' marks a removed slot."""
+        if self._docs is None:
+            self._docs = []
+            if self.meta["slots"]:
+                with open(self._path("docs.{gen}.tsv"), 'r', encoding='utf-8') as f:
+                    for line in f:
+                        node_id, mtime = line.rstrip('\n').split('\t')
+                        self._docs.append((node_id, float(mtime)))
+        return self._docs
+
+    def slot_of(self, node_id: str) -> Optional[int]:
+        if self._slot_of is None:
+            self._slot_of = {node_id: i for i, (node_id, _) in enumerate(self.docs()) if node_id}
+        return self._slot_of.get(node_id)
+
+    def _open_base(self) -> bool:
+        if self._terms is None:
+            if not self.meta["slots"]:
+                return False
+            self._terms = _map(self._path("terms.{gen}.tsv"))
+            self._postings = (_map(self._path("postings.{gen}.doc")),
+                              _map(self._path("postings.{gen}.w")))
+        return True
+
+    def _find_term(self, term: str) -> Optional[Tuple[int, int]]:
+        """(start, count) of a term's postings in the base."""
+        if not self._open_base():
+            return None
+        mm, target = self._terms, term.encode('utf-8')
+        lo, hi = 0, len(mm)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = mm.rfind(b'\n', lo, mid)
+            start = lo if start < 0 else start + 1
+            end = mm.find(b'\n', start)
+            if end < 0:
+                end = len(mm)
+            key, first, count = mm[start:end].split(b'\t')
+            if key == target:
+                return int(first), int(count)
+            if key < target:
+                lo = end + 1
+            else:
+                hi = start
+        return None
+
+    def _base_postings(self, term: str):
+        """(slots, weights) arrays of a term; NumPy views when available."""
+        found = self._find_term(term)
+        if found is None:
+            return None
+        first, count = found
+        docs_map, weights_map = self._postings
+        if np is not None:
+            return (np.frombuffer(docs_map, dtype='<u4', count=count, offset=first * 4),
+                    np.frombuffer(weights_map, dtype='<f4', count=count, offset=first * 4))
+        slots, weights = array('I'), array('f')
+        slots.frombytes(docs_map[first * 4:(first + count) * 4])
+        weights.frombytes(weights_map[first * 4:(first + count) * 4])
+        if sys.byteorder == 'big':
+            slots.byteswap()
+            weights.byteswap()
+        return slots, weights
+
+    # --- Maintenance ---
+
+    def mtime_of(self, node_id: str) -> Optional[float]:
+        if node_id in self.delta:
+            return self.delta[node_id][0]
+        if node_id in self.stale:
+            return None
+        slot = self.slot_of(node_id)
+        return self.docs()[slot][1] if slot is not None else None
+
+    def begin_build(self) -> None:
+        """Start a full pass; documents not seen by end_build() are dropped."""
+        self._building = set()
+
+    def update(self, node_id: str, path: Optional[str], mtime: float = 0,
+               body: Optional[str] = None) -> None:
+        """Index (or with path=None, drop) one node; body, if given, spares reading path."""
+        if self._building is not None:
+            self._building.add(node_id)
+        if path is not None and self.mtime_of(node_id) == mtime:
+            return  # Unchanged since indexed (e.g. a rebuild)
+        if self.slot_of(node_id) is not None:
+            self.stale.add(node_id)
+        if path is None:
+            self.delta.pop(node_id, None)
+        else:
+            self.delta[node_id] = [mtime, text_vector(node_text(path) if body is None else body)]
+        self._dirty = True
+
+    def end_build(self) -> None:
+        if self._building is None:
+            return
+        seen, self._building = self._building, None
+        for node_id in [nid for nid, _ in self.docs() if nid and nid not in seen]:
+            self.update(node_id, None)
+        for node_id in [nid for nid in self.delta if nid not in seen]:
+            self.update(node_id, None)
+
+    def save(self) -> None:
+        """Persist the delta, or merge it into a new base once it is large."""
+        self.end_build()
+        if not self._dirty:
+            return
+        if len(self.delta) + len(self.stale) >= DELTA_LIMIT:
+            self.compact()
+            return
+        os.makedirs(self.dir, exist_ok=True)
+        _write_json(os.path.join(self.dir, "delta.json"), {
+            "generation": self.meta["generation"],
+            "docs": self.delta,
+            "stale": sorted(self.stale),
+        })
+        self._dirty = False
+
+    def compact(self) -> None:
+        """Write a new base generation holding base + delta."""
+        os.makedirs(self.dir, exist_ok=True)
+        old = dict(self.meta)
+        masked = self.stale | set(self.delta)
+
+        docs: List[Tuple[str, float]] = []
+        remap = array('l', [-1]) * len(self.docs())
+        for slot, (node_id, mtime) in enumerate(self.docs()):
+            if node_id and node_id not in masked:
+                remap[slot] = len(docs)
+                docs.append((node_id, mtime))
+        added: Dict[str, List[Tuple[int, float]]] = {}
+        for node_id in sorted(self.delta):
+            mtime, vector = self.delta[node_id]
+            for term, weight in vector.items():
+                added.setdefault(term, []).append((len(docs), weight))
+            docs.append((node_id, mtime))
+
+        base_terms: Set[str] = set()
+        if self._open_base():
+            for line in self._terms[:].splitlines():
+                base_terms.add(line.split(b'\t', 1)[0].decode('utf-8'))
+
+        gen = old["generation"] + 1
+        names = {key: os.path.join(self.dir, f"{key}.{gen}.{ext}") for key, ext in
+                 (("docs", "tsv"), ("terms", "tsv"))}
+        doc_out = array('I')
+        weight_out = array('f')
+        term_lines = []
+        for term in sorted(base_terms | set(added)):
+            start = len(doc_out)
+            found = self._base_postings(term) if term in base_terms else None
+            if found is not None:
+                for slot, weight in zip(found[0].tolist(), found[1].tolist()):
+                    new_slot = remap[slot]
+                    if new_slot >= 0:
+                        doc_out.append(new_slot)
+                        weight_out.append(weight)
+            for slot, weight in added.get(term, ()):
+                doc_out.append(slot)
+                weight_out.append(weight)
+            if len(doc_out) > start:
+                term_lines.append(f"{term}\t{start}\t{len(doc_out) - start}\n")
+
+        with open(names["docs"], 'w', encoding='utf-8') as f:
+            f.writelines(f"{node_id}\t{mtime}\n" for node_id, mtime in docs)
+        with open(names["terms"], 'w', encoding='utf-8') as f:
+            f.writelines(term_lines)
+        for ext, values in (("doc", doc_out), ("w", weight_out)):
+            if values.itemsize != 4:
+                raise RuntimeError("vector postings need 4-byte array items")
+            if sys.byteorder == 'big':
+                values.byteswap()  # The files are little-endian everywhere
+            with open(os.path.join(self.dir, f"postings.{gen}.{ext}"), 'wb') as f:
+                values.tofile(f)
+
+        # meta.json is the commit point; the delta it starts with is empty
+        _write_json(os.path.join(self.dir, "delta.json"), {"generation": gen, "docs": {}, "stale": []})
+        _write_json(os.path.join(self.dir, "meta.json"), {
+            "format": INDEX_FORMAT, "generation": gen, "slots": len(docs), "live": len(docs)})
+        self.load()
+        for name in ("docs.{gen}.tsv", "terms.{gen}.tsv", "postings.{gen}.doc", "postings.{gen}.w"):
+            try:
+                os.remove(os.path.join(self.dir, name.format(gen=old["generation"])))
+            except OSError:
+                pass
+        self._dirty = False
+
+    # --- Queries ---
+
+    def search(self, vector: Dict[str, float], limit: int = 5,
+               exclude: Iterable[str] = ()) -> List[Tuple[str, float]]:
+        """Top documents for a query vector as (node_id, score), best first."""
+        masked = self.stale | set(self.delta)
+        live = self.meta["live"] - len(self.stale) + len(self.delta)
+        if live <= 0 or not vector:
+            return []
+
+        delta_df: Dict[str, int] = {}
+        for _, doc in self.delta.values():
+            for term in doc:
+                delta_df[term] = delta_df.get(term, 0) + 1
+
+        weighted = []
+        for term, q in vector.items():
+            postings = self._base_postings(term) if self.meta["slots"] else None
+            df = (len(postings[0]) if postings is not None else 0) + delta_df.get(term, 0)
+            if not df:
+                continue
+            idf = math.log((live + 1) / (df + 1)) + 1
+            weighted.append((term, q * idf * idf, df, postings))
+        # Very common terms cost a long postings walk for little signal
+        rare = [w for w in weighted if w[2] <= max(COMMON_DF * live, COMMON_MIN)]
+        weighted = rare or weighted
+        # Scale so that a document identical to the query scores 1.0
+        norm = sum(weight * vector[term] for term, weight, _, _ in weighted)
+        if not norm:
+            return []
+
+        scores: Dict[str, float] = {}
+        for node_id, (_, doc) in self.delta.items():
+            score = sum(weight * doc[term] for term, weight, _, _ in weighted if term in doc)
+            if score:
+                scores[node_id] = score
+
+        excluded = set(exclude)
+        wanted = limit + len(excluded) + len(masked)
+        docs = self.docs() if self.meta["slots"] else []
+        if np is not None and docs:
+            acc = np.zeros(len(docs), dtype=np.float32)
+            for _, weight, _, postings in weighted:
+                if postings is not None:
+                    acc[postings[0]] += postings[1] * weight
+            nonzero = int(np.count_nonzero(acc))
+            top = np.argpartition(-acc, min(wanted, len(acc) - 1))[:wanted] if nonzero else []
+            base = [(int(slot), float(acc[slot])) for slot in top if acc[slot] > 0]
+        else:
+            acc_py: Dict[int, float] = {}
+            for _, weight, _, postings in weighted:
+                if postings is not None:
+                    for slot, w in zip(postings[0], postings[1]):
+                        acc_py[slot] = acc_py.get(slot, 0.0) + w * weight
+            base = heapq.nlargest(wanted, acc_py.items(), key=lambda kv: kv[1])
+
+        for slot, score in base:
+            node_id = docs[slot][0]
+            if node_id and node_id not in masked:
+                scores[node_id] = score
+
+        ranked = sorted(((s, nid) for nid, s in scores.items() if nid not in excluded),
+                        key=lambda kv: (-kv[0], kv[1]))
+        return [(nid, round(s / norm, 4)) for s, nid in ranked[:limit]]
+
+    def close(self) -> None:
+        if self._terms is not None:
+            for mm in (self._terms,) + self._postings:
+                if isinstance(mm, mmap.mmap):
+                    mm.close()
+        self._terms = self._postings = None
+        self._docs = self._slot_of = None
+
+
+def _map(path: str):
+    """Read-only map of a file (mmap cannot map an empty one)."""
+    with open(path, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _write_json(path: str, value: Dict) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(value, f, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+# --- Secondary index hooks (registered by graph.py) ---
+
+def update_vector_index(graph, node_id: str, old: Optional[Dict], new: Optional[Dict]) -> None:
+    if new is None:
+        graph.vectors.update(node_id, None)
+    else:
+        graph.vectors.update(node_id, new.get("path"), new.get("mtime", 0), graph.take_body(node_id))
+
+
+def begin_vector_build(graph) -> None:
+    graph.vectors.begin_build()
+
+
+def save_vector_index(graph) -> None:
+    graph.vectors.save()
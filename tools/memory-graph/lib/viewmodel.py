@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+View Model - Graph summary shared by the visualizers
+
+visualize.py and visualize_rich.py used to rescan the full edge list once per
+node type and again for the connection map, which is O(types x edges). The
+view model takes edge counts, hubs and top tags from the stats block that
+MemoryGraph keeps up to date (lib/graphstats.py), so nothing is counted at
+render time. Type sections take their counts from the same block and read
+only the first TYPE_SHOWN IDs of each type posting. Renderers then only touch
+the handful of nodes they print, each looked up through the index, and a
+render costs the same at any graph size.
+
+SubgraphView renders a bounded node set instead: the k-hop ego network of one
+node (`visualize.py --focus ID --depth K`) or a sample stratified by type and
+degree (`--sample N`). Both are extracted with index lookups, so memory and
+time scale with the view, not the corpus.
+"""
+
+import heapq
+import random
+from collections import Counter
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from graph import MemoryGraph
+
+HUB_COUNT = 6
+TAG_COUNT = 10
+RECENT_COUNT = 5
+TYPE_SHOWN = 10        # Node IDs listed per type (renderers show at most this many)
+MAX_VIEW_NODES = 200   # Upper bound on a focus/sample subgraph
+SAMPLE_CANDIDATES = 4  # Records decoded per sample slot when stratifying by degree
+
+
+class GraphView:
+    """Counts, top-k selections and on-demand adjacency for one render."""
+
+    def __init__(self, graph: MemoryGraph, hub_count: int = HUB_COUNT,
+                 tag_count: int = TAG_COUNT, recent_count: int = RECENT_COUNT):
+        self.graph = graph
+        self.stats = graph.get_stats()
+        self.scope = ""  # Set by subgraph views; shown under the header
+        self._nodes: Dict[str, Dict] = {}
+
+        # Edges are links whose target exists; links to missing nodes are not drawn
+        self.edge_count: int = self.stats["edge_count"]
+        self.hubs: List[str] = [node_id for node_id, _ in self.stats["hubs"][:hub_count]]
+        self.top_tags: List[Tuple[str, int]] = [(tag, count) for tag, count in self.stats["top_tags"][:tag_count]]
+        # (type, node count, first TYPE_SHOWN IDs): counts come from the stats
+        # block and each posting is read only as far as the slice
+        self.types: List[Tuple[str, int, List[str]]] = [
+            (ntype, count, list(islice(graph.iter_posting("types", ntype), TYPE_SHOWN)))
+            for ntype, count in sorted(self.stats["types"].items())]
+        self.recent: List[str] = graph.get_recent(recent_count)
+
+    def node(self, node_id: str) -> Dict:
+        """Cached metadata of one node ({} if unknown)."""
+        if node_id not in self._nodes:
+            self._nodes[node_id] = self.graph.get_node(node_id) or {}
+        return self._nodes[node_id]
+
+    def node_type(self, node_id: str) -> str:
+        return self.node(node_id).get("type", "")
+
+    def outgoing(self, node_id: str) -> List[str]:
+        """Link targets of node_id that exist."""
+        return [target for target in self.node(node_id).get("links_to", []) if self.node(target)]
+
+    def neighbors(self, node_id: str) -> List[str]:
+        """Nodes linked to or from node_id (each once)."""
+        return list(dict.fromkeys(self.outgoing(node_id) + self.node(node_id).get("backlinks", [])))
+
+    def edges(self, limit: Optional[int] = None) -> Iterator[Tuple[str, str]]:
+        """(source, target) pairs in node order, at most limit of them."""
+        emitted = 0
+        for source, targets in self.graph.iter_links():
+            for target in targets:
+                if limit is not None and emitted >= limit:
+                    return
+                if self.node(target):
+                    yield source, target
+                    emitted += 1
+
+
+class SubgraphView(GraphView):
+    """GraphView over a bounded node set; edges, hubs and tags count only members."""
+
+    def __init__(self, graph: MemoryGraph, node_ids: List[str], scope: str,
+                 center: Optional[str] = None, hub_count: int = HUB_COUNT,
+                 tag_count: int = TAG_COUNT, recent_count: int = RECENT_COUNT):
+        self.graph = graph
+        self.scope = scope
+        self._nodes = {}
+        members = [node_id for node_id in node_ids if self.node(node_id)]
+        member_set = set(members)
+
+        self._outgoing: Dict[str, List[str]] = {}
+        self._incoming: Dict[str, List[str]] = {}
+        self._edges: List[Tuple[str, str]] = []
+        degree: Dict[str, int] = dict.fromkeys(members, 0)
+        for source in members:
+            targets = [t for t in self.node(source).get("links_to", []) if t in member_set]
+            self._outgoing[source] = targets
+            for target in targets:
+                self._incoming.setdefault(target, []).append(source)
+                self._edges.append((source, target))
+                degree[source] += 1
+                degree[target] += 1
+        self.edge_count = len(self._edges)
+
+        by_type: Dict[str, List[str]] = {}
+        tags: Counter = Counter()
+        for node_id in members:
+            data = self.node(node_id)
+            by_type.setdefault(data.get("type", ""), []).append(node_id)
+            tags.update(data.get("tags", []))
+        self.types = [(ntype, len(ids), sorted(ids)[:TYPE_SHOWN]) for ntype, ids in sorted(by_type.items())]
+        self.stats = {"node_count": len(members), "type_count": len(by_type), "tag_count": len(tags)}
+
+        ranked = heapq.nlargest(hub_count, (nid for nid in members if degree[nid] and nid != center),
+                                key=degree.__getitem__)
+        self.hubs = (([center] if center in member_set else []) + ranked)[:hub_count]
+        self.top_tags = tags.most_common(tag_count)
+        self.recent = heapq.nlargest(recent_count, members,
+                                     key=lambda nid: self.node(nid).get("updated", ""))
+
+    def outgoing(self, node_id: str) -> List[str]:
+        return self._outgoing.get(node_id, [])
+
+    def neighbors(self, node_id: str) -> List[str]:
+        return list(dict.fromkeys(self.outgoing(node_id) + self._incoming.get(node_id, [])))
+
+    def edges(self, limit: Optional[int] = None) -> Iterator[Tuple[str, str]]:
+        return islice(self._edges, limit)
+
+
+def ego_network(graph: MemoryGraph, center: str, depth: int = 1,
+                max_nodes: int = MAX_VIEW_NODES) -> List[str]:
+    """Nodes within `depth` links of center (either direction), nearest first."""
+    if graph.get_node(center) is None:
+        return []
+    seen = {center: None}
+    frontier = [center]
+    for _ in range(depth):
+        next_frontier = []
+        for node_id in frontier:
+            data = graph.get_node(node_id) or {}
+            for neighbor in data.get("links_to", []) + data.get("backlinks", []):
+                if neighbor in seen or graph.get_node(neighbor) is None:
+                    continue
+                seen[neighbor] = None
+                next_frontier.append(neighbor)
+                if len(seen) >= max_nodes:
+                    return list(seen)
+        frontier = next_frontier
+    return list(seen)
+
+
+def _type_quotas(counts: Dict[str, int], budget: int) -> Dict[str, int]:
+    """
+    Sample slots per type, summing to at most budget: one for each type
+    (the largest types first if there are more types than slots), then the
+    rest in proportion to the counts, never more than a type holds.
+    """
+    types = sorted((t for t in counts if counts[t] > 0), key=lambda t: (-counts[t], t))[:max(budget, 0)]
+    spare = budget - len(types)
+    total = sum(counts[t] for t in types) or 1
+    return {t: min(counts[t], 1 + spare * counts[t] // total) for t in types}
+
+
+def stratified_sample(graph: MemoryGraph, size: int, seed: int = 0,
+                      max_nodes: int = MAX_VIEW_NODES) -> List[str]:
+    """
+    About `size` nodes (at most max_nodes): each type gets a quota in
+    proportion to its count (at least one), and a type's quota is spread
+    evenly over its candidates ordered by degree, so hubs and leaves are both
+    represented. Candidates are a random positional draw from the type
+    posting plus that type's known hubs, so the cost follows the sample size,
+    not the corpus.
+    """
+    rng = random.Random(seed)
+    stats = graph.get_stats()
+    hub_types = {node_id: (graph.get_node(node_id) or {}).get("type") for node_id, _ in stats["hubs"]}
+    picked: List[str] = []
+    for ntype, slots in sorted(_type_quotas(stats["types"], min(size, max_nodes)).items()):
+        want = slots * SAMPLE_CANDIDATES
+        if stats["types"][ntype] <= want:
+            candidates = set(islice(graph.iter_posting("types", ntype), want))
+        else:
+            candidates = set(graph.sample_posting("types", ntype, want, rng))
+        candidates.update(node_id for node_id, hub_type in hub_types.items() if hub_type == ntype)
+        degree = {}
+        for node_id in candidates:
+            data = graph.get_node(node_id) or {}
+            degree[node_id] = len(data.get("links_to", [])) + len(data.get("backlinks", []))
+        ordered = sorted(degree, key=lambda nid: (-degree[nid], nid))
+        picked.extend(ordered[i * len(ordered) // slots] for i in range(min(slots, len(ordered))))
+    return picked
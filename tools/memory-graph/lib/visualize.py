@@ -9,11 +9,11 @@ import sys
 import json
 from datetime import datetime, timezone
 from typing import Dict, List, Set, Tuple, Optional
-from collections import defaultdict
 
 # Add lib directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from graph import MemoryGraph
+from viewmodel import MAX_VIEW_NODES, GraphView, SubgraphView, ego_network, stratified_sample
 
 # ANSI Colors
 RESET = "\033[0m"
@@ -64,11 +64,10 @@ def truncate(text: str, max_len: int = 25) -> str:
     return text[:max_len-1] + "…"
 
 
-def get_display_name(node_id: str, node_type: str, nodes_data: dict = None) -> str:
+def get_display_name(node_id: str, node_type: str, node: Optional[Dict] = None) -> str:
     """Get clean display name for node."""
     # Try to get title from node data first
-    if nodes_data and node_id in nodes_data:
-        node = nodes_data[node_id]
+    if node:
         # Use file_path or title if available
         if node_type == "file-summary":
             path = node.get("file_path") or node.get("path", "")
@@ -101,22 +100,20 @@ def get_display_name(node_id: str, node_type: str, nodes_data: dict = None) -> s
     return truncate(node_id, 20)
 
 
-def draw_header(graph: MemoryGraph):
+def draw_header(view: GraphView):
     """Draw the header section."""
-    stats = graph.get_stats()
-    nodes_data = graph.cache.get("nodes", {})
-
-    # Count connections
-    conn_count = sum(len(n.get("links_to", [])) for n in nodes_data.values())
+    stats = view.stats
 
     print()
     print(f"  {BOLD}Memory Graph{RESET}")
     print(f"  {GRAY}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━{RESET}")
-    print(f"  {DIM}Nodes:{RESET} {stats['node_count']}  {DIM}Types:{RESET} {stats['type_count']}  {DIM}Edges:{RESET} {conn_count}  {DIM}Tags:{RESET} {stats['tag_count']}")
+    print(f"  {DIM}Nodes:{RESET} {stats['node_count']}  {DIM}Types:{RESET} {stats['type_count']}  {DIM}Edges:{RESET} {view.edge_count}  {DIM}Tags:{RESET} {stats['tag_count']}")
+    if view.scope:
+        print(f"  {DIM}{view.scope}{RESET}")
     print()
 
 
-def draw_type_section(ntype: str, node_ids: List[str], nodes_data: dict, all_connections: List[Tuple[str, str]]):
+def draw_type_section(ntype: str, count: int, node_ids: List[str], view: GraphView):
     """Draw a section for one node type with inline connections."""
     config = TYPE_CONFIG.get(ntype, {"color": GRAY, "symbol": "○", "icon": "📄"})
     color = config["color"]
@@ -124,20 +121,12 @@ def draw_type_section(ntype: str, node_ids: List[str], nodes_data: dict, all_con
     icon = config["icon"]
 
     type_label = ntype.replace("-", " ").title()
-    print(f"  {icon} {BOLD}{type_label}{RESET} {GRAY}({len(node_ids)}){RESET}")
-
-    # Build connection map for this type's nodes
-    outgoing = defaultdict(list)
-    incoming = defaultdict(list)
-    for src, dst in all_connections:
-        if src in node_ids:
-            outgoing[src].append(dst)
-        if dst in node_ids:
-            incoming[dst].append(src)
-
-    for i, nid in enumerate(node_ids[:8]):
-        node = nodes_data.get(nid, {})
-        name = get_display_name(nid, ntype, nodes_data)
+    print(f"  {icon} {BOLD}{type_label}{RESET} {GRAY}({count}){RESET}")
+
+    shown = node_ids[:8]
+    for i, nid in enumerate(shown):
+        node = view.node(nid)
+        name = get_display_name(nid, ntype, view.node(nid))
         time_ago = get_time_ago(node.get("updated", ""))
 
         # Status indicator
@@ -151,18 +140,17 @@ def draw_type_section(ntype: str, node_ids: List[str], nodes_data: dict, all_con
             status_char = f"{DIM}○{RESET} "
 
         # Connection indicators
-        out_targets = outgoing.get(nid, [])
-        in_sources = incoming.get(nid, [])
+        out_targets = view.outgoing(nid)
 
         conn_str = ""
         if out_targets:
-            targets_preview = [get_display_name(t, nodes_data.get(t, {}).get("type", ""), nodes_data)[:12] for t in out_targets[:2]]
+            targets_preview = [get_display_name(t, view.node_type(t), view.node(t))[:12] for t in out_targets[:2]]
             conn_str += f" {GRAY}→{RESET} {', '.join(targets_preview)}"
             if len(out_targets) > 2:
                 conn_str += f" {DIM}+{len(out_targets)-2}{RESET}"
 
         # Tree branch character
-        is_last = (i == len(node_ids[:8]) - 1)
+        is_last = (i == len(shown) - 1)
         branch = "└" if is_last else "├"
 
         # Build line
@@ -174,24 +162,18 @@ def draw_type_section(ntype: str, node_ids: List[str], nodes_data: dict, all_con
 
         print(line)
 
-    if len(node_ids) > 8:
-        print(f"     {DIM}   ... +{len(node_ids) - 8} more{RESET}")
+    if count > len(shown):
+        print(f"     {DIM}   ... +{count - len(shown)} more{RESET}")
     print()
 
 
-def draw_connection_graph(nodes_data: dict, connections: List[Tuple[str, str]]):
+def draw_connection_graph(view: GraphView):
     """Draw a small ASCII visualization of key connections."""
-    if not connections:
+    if not view.edge_count:
         return
 
-    # Get the most connected nodes
-    conn_count = defaultdict(int)
-    for src, dst in connections:
-        conn_count[src] += 1
-        conn_count[dst] += 1
-
-    # Get top nodes by connectivity
-    top_nodes = sorted(conn_count.keys(), key=lambda x: -conn_count[x])[:6]
+    # Most connected nodes (heap-selected when the view was built)
+    top_nodes = view.hubs
 
     if len(top_nodes) < 2:
         return
@@ -201,14 +183,13 @@ def draw_connection_graph(nodes_data: dict, connections: List[Tuple[str, str]]):
 
     # Draw simple radial layout from most connected node
     center = top_nodes[0]
-    center_type = nodes_data.get(center, {}).get("type", "")
+    center_type = view.node_type(center)
     center_config = TYPE_CONFIG.get(center_type, {"color": GRAY, "symbol": "○"})
-    center_name = get_display_name(center, center_type, nodes_data)
+    center_name = get_display_name(center, center_type, view.node(center))
 
     # Find direct connections from center
-    center_out = [dst for src, dst in connections if src == center and dst in top_nodes]
-    center_in = [src for src, dst in connections if dst == center and src in top_nodes]
-    center_connected = list(set(center_out + center_in))[:4]
+    top_set = set(top_nodes)
+    center_connected = [nid for nid in view.neighbors(center) if nid in top_set][:4]
 
     if not center_connected:
         center_connected = top_nodes[1:5]
@@ -221,17 +202,16 @@ def draw_connection_graph(nodes_data: dict, connections: List[Tuple[str, str]]):
         n1 = center_connected[0]
         n2 = center_connected[1] if len(center_connected) > 1 else None
 
-        n1_type = nodes_data.get(n1, {}).get("type", "")
+        n1_type = view.node_type(n1)
         n1_config = TYPE_CONFIG.get(n1_type, {"color": GRAY, "symbol": "○"})
-        n1_name = get_display_name(n1, n1_type, nodes_data)[:15]
+        n1_name = get_display_name(n1, n1_type, view.node(n1))[:15]
 
         if n2:
-            n2_type = nodes_data.get(n2, {}).get("type", "")
+            n2_type = view.node_type(n2)
             n2_config = TYPE_CONFIG.get(n2_type, {"color": GRAY, "symbol": "○"})
-            n2_name = get_display_name(n2, n2_type, nodes_data)[:15]
+            n2_name = get_display_name(n2, n2_type, view.node(n2))[:15]
 
             # Draw top row with two nodes
-            spacing = 30
             print(f"       {n1_config['color']}{n1_config['symbol']}{RESET} {n1_name:<15}           {n2_config['color']}{n2_config['symbol']}{RESET} {n2_name}")
             print(f"         {GRAY}╲{RESET}                         {GRAY}╱{RESET}")
             print(f"          {GRAY}╲{RESET}                       {GRAY}╱{RESET}")
@@ -247,14 +227,14 @@ def draw_connection_graph(nodes_data: dict, connections: List[Tuple[str, str]]):
         n3 = center_connected[2]
         n4 = center_connected[3] if len(center_connected) > 3 else None
 
-        n3_type = nodes_data.get(n3, {}).get("type", "")
+        n3_type = view.node_type(n3)
         n3_config = TYPE_CONFIG.get(n3_type, {"color": GRAY, "symbol": "○"})
-        n3_name = get_display_name(n3, n3_type, nodes_data)[:15]
+        n3_name = get_display_name(n3, n3_type, view.node(n3))[:15]
 
         if n4:
-            n4_type = nodes_data.get(n4, {}).get("type", "")
+            n4_type = view.node_type(n4)
             n4_config = TYPE_CONFIG.get(n4_type, {"color": GRAY, "symbol": "○"})
-            n4_name = get_display_name(n4, n4_type, nodes_data)[:15]
+            n4_name = get_display_name(n4, n4_type, view.node(n4))[:15]
 
             print(f"          {GRAY}╱{RESET}                       {GRAY}╲{RESET}")
             print(f"         {GRAY}╱{RESET}                         {GRAY}╲{RESET}")
@@ -266,100 +246,122 @@ def draw_connection_graph(nodes_data: dict, connections: List[Tuple[str, str]]):
     print()
 
 
-def draw_edge_list(connections: List[Tuple[str, str]], nodes_data: dict):
+def draw_edge_list(view: GraphView):
     """Draw a compact edge list."""
-    if not connections:
+    if not view.edge_count:
         return
 
-    print(f"  {BOLD}Edges{RESET} {GRAY}({len(connections)} connections){RESET}")
+    print(f"  {BOLD}Edges{RESET} {GRAY}({view.edge_count} connections){RESET}")
     print(f"  {GRAY}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━{RESET}")
 
-    for i, (src, dst) in enumerate(connections[:8]):
-        src_type = nodes_data.get(src, {}).get("type", "")
-        dst_type = nodes_data.get(dst, {}).get("type", "")
+    for src, dst in view.edges(8):
+        src_type = view.node_type(src)
+        dst_type = view.node_type(dst)
 
         src_config = TYPE_CONFIG.get(src_type, {"color": GRAY, "symbol": "○"})
         dst_config = TYPE_CONFIG.get(dst_type, {"color": GRAY, "symbol": "○"})
 
-        src_name = get_display_name(src, src_type, nodes_data)
-        dst_name = get_display_name(dst, dst_type, nodes_data)
+        src_name = get_display_name(src, src_type, view.node(src))
+        dst_name = get_display_name(dst, dst_type, view.node(dst))
 
         print(f"     {src_config['color']}{src_config['symbol']}{RESET} {src_name} {GRAY}───▶{RESET} {dst_config['color']}{dst_config['symbol']}{RESET} {dst_name}")
 
-    if len(connections) > 8:
-        print(f"     {DIM}... +{len(connections) - 8} more edges{RESET}")
+    if view.edge_count > 8:
+        print(f"     {DIM}... +{view.edge_count - 8} more edges{RESET}")
     print()
 
 
-def draw_tags(graph: MemoryGraph):
+def draw_tags(view: GraphView):
     """Draw tags summary."""
-    tags_data = graph.cache.get("tags", {})
-    if not tags_data:
+    if not view.top_tags:
         return
 
-    tag_counts = sorted([(t, len(ids)) for t, ids in tags_data.items()], key=lambda x: -x[1])
-
     print(f"  {BOLD}Tags{RESET}")
     tags_str = "  "
-    for tag, count in tag_counts[:10]:
+    for tag, count in view.top_tags:
         tags_str += f"{CYAN}#{tag}{RESET}{GRAY}({count}){RESET}  "
     print(tags_str)
     print()
 
 
-def draw_recent(graph: MemoryGraph, nodes_data: dict):
+def draw_recent(view: GraphView):
     """Draw recent activity."""
-    recent = graph.get_recent(5)
-    if not recent:
+    if not view.recent:
         return
 
     print(f"  {BOLD}Recent{RESET} {GRAY}(last 5){RESET}")
-    for nid in recent:
-        node = nodes_data.get(nid, {})
+    for nid in view.recent:
+        node = view.node(nid)
         ntype = node.get("type", "")
         config = TYPE_CONFIG.get(ntype, {"color": GRAY, "symbol": "○"})
-        name = get_display_name(nid, ntype, nodes_data)
+        name = get_display_name(nid, ntype, view.node(nid))
         time_ago = get_time_ago(node.get("updated", ""))
         print(f"     {config['color']}{config['symbol']}{RESET} {name} {DIM}{time_ago}{RESET}")
     print()
 
 
-def visualize_graph(memory_dir: str = ".claude/memory"):
-    """Main visualization function."""
+def visualize_graph(memory_dir: str = ".claude/memory", focus: Optional[str] = None,
+                    depth: int = 1, sample: Optional[int] = None, seed: int = 0,
+                    max_nodes: int = MAX_VIEW_NODES) -> int:
+    """
+    Main visualization function. With focus, render the depth-hop
+    neighbourhood of one node; with sample, about that many nodes stratified
+    by type and degree. Either view stops at max_nodes. Returns an exit status.
+    """
     graph = MemoryGraph(memory_dir)
-    nodes_data = graph.cache.get("nodes", {})
-    types_data = graph.cache.get("types", {})
-
-    if not nodes_data:
+    total = graph.get_node_count()
+    if not total:
         print(f"\n  {DIM}No nodes in memory graph yet.{RESET}\n")
-        return
-
-    # Collect all connections
-    connections = []
-    for nid, node in nodes_data.items():
-        for target in node.get("links_to", []):
-            if target in nodes_data:
-                connections.append((nid, target))
+        return 0
+
+    if focus:
+        node_ids = ego_network(graph, focus, depth, max_nodes)
+        if not node_ids:
+            print(f"Node not found: {focus}", file=sys.stderr)
+            return 1
+        view = SubgraphView(graph, node_ids, center=focus,
+                            scope=f"Focus: {focus} · depth {depth} · {len(node_ids)} of {total} nodes")
+    elif sample:
+        node_ids = stratified_sample(graph, sample, seed, max_nodes)
+        view = SubgraphView(graph, node_ids,
+                            scope=f"Sample: {len(node_ids)} of {total} nodes by type and degree")
+    else:
+        view = GraphView(graph)
 
     # Draw sections
-    draw_header(graph)
+    draw_header(view)
 
     # Draw each type section
-    for ntype, node_ids in sorted(types_data.items()):
-        draw_type_section(ntype, node_ids, nodes_data, connections)
+    for ntype, count, node_ids in view.types:
+        draw_type_section(ntype, count, node_ids, view)
 
     # Draw connection visualization if we have enough connections
-    if len(connections) >= 3:
-        draw_connection_graph(nodes_data, connections)
-    elif connections:
-        draw_edge_list(connections, nodes_data)
+    if view.edge_count >= 3:
+        draw_connection_graph(view)
+    elif view.edge_count:
+        draw_edge_list(view)
 
-    draw_tags(graph)
-    draw_recent(graph, nodes_data)
+    draw_tags(view)
+    draw_recent(view)
+    return 0
 
 
 if __name__ == "__main__":
-    memory_dir = os.environ.get("CLAUDE_MEMORY_DIR", ".claude/memory")
-    if len(sys.argv) > 1:
-        memory_dir = sys.argv[1]
-    visualize_graph(memory_dir)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Visualize the memory graph")
+    parser.add_argument("memory_dir", nargs="?", default=None,
+                        help="Path to memory directory (default: $CLAUDE_MEMORY_DIR or .claude/memory)")
+    scope = parser.add_mutually_exclusive_group()
+    scope.add_argument("--focus", metavar="ID", help="Only show the neighbourhood of this node")
+    scope.add_argument("--sample", type=int, metavar="N",
+                       help="Only show about N nodes, stratified by type and degree")
+    parser.add_argument("--depth", type=int, default=1, help="Hops around --focus (default: 1)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for --sample")
+    parser.add_argument("--max-nodes", type=int, default=MAX_VIEW_NODES,
+                        help=f"Cap on --focus/--sample views (default: {MAX_VIEW_NODES})")
+    args = parser.parse_args()
+
+    memory_dir = args.memory_dir or os.environ.get("CLAUDE_MEMORY_DIR", ".claude/memory")
+    sys.exit(visualize_graph(memory_dir, focus=args.focus, depth=args.depth,
+                             sample=args.sample, seed=args.seed, max_nodes=args.max_nodes))
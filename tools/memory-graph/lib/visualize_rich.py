@@ -22,6 +22,7 @@ except ImportError:
 # Add lib directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from graph import MemoryGraph
+from viewmodel import GraphView
 
 
 def get_time_ago(timestamp_str: str) -> str:
@@ -58,7 +59,8 @@ def visualize_graph(memory_dir: str = ".claude/memory"):
 
     # Load graph
     graph = MemoryGraph(memory_dir)
-    stats = graph.get_stats()
+    view = GraphView(graph, tag_count=8)
+    stats = view.stats
 
     if stats["node_count"] == 0:
         console.print(Panel(
@@ -82,10 +84,6 @@ def visualize_graph(memory_dir: str = ".claude/memory"):
     # Create main tree
     tree = Tree(header)
 
-    # Group nodes by type
-    types_data = graph.cache.get("types", {})
-    nodes_data = graph.cache.get("nodes", {})
-
     # Type icons
     type_icons = {
         "file-summary": "📁",
@@ -117,16 +115,16 @@ def visualize_graph(memory_dir: str = ".claude/memory"):
     }
 
     # Render each type
-    for node_type, node_ids in sorted(types_data.items()):
+    for node_type, count, node_ids in view.types:
         icon = type_icons.get(node_type, "📄")
         color = type_colors.get(node_type, "white")
 
         type_label = node_type.replace("-", " ").title()
-        branch = tree.add(f"{icon} [{color}]{type_label}[/{color}] [dim]· {len(node_ids)}[/dim]")
+        branch = tree.add(f"{icon} [{color}]{type_label}[/{color}] [dim]· {count}[/dim]")
 
         # Add nodes
         for node_id in node_ids[:10]:  # Limit to 10 per type
-            node = nodes_data.get(node_id, {})
+            node = view.node(node_id)
 
             # Build node display
             status = node.get("status", "active")
@@ -167,42 +165,32 @@ def visualize_graph(memory_dir: str = ".claude/memory"):
             branch.add(line)
 
         # Show if truncated
-        if len(node_ids) > 10:
-            branch.add(f"[dim]... and {len(node_ids) - 10} more[/dim]")
+        if count > 10:
+            branch.add(f"[dim]... and {count - 10} more[/dim]")
 
     # Connections section
-    connections = []
-    for node_id, node in nodes_data.items():
-        links = node.get("links_to", [])
-        for target in links:
-            if target in nodes_data:
-                connections.append((node_id, target))
-
-    if connections:
-        conn_branch = tree.add(f"🔗 [bold bright_magenta]Connections[/bold bright_magenta] [dim]· {len(connections)}[/dim]")
-        for src, dst in connections[:5]:
+    if view.edge_count:
+        conn_branch = tree.add(f"🔗 [bold bright_magenta]Connections[/bold bright_magenta] [dim]· {view.edge_count}[/dim]")
+        for src, dst in view.edges(5):
             src_short = truncate(src, 25)
             dst_short = truncate(dst, 25)
             conn_branch.add(f"[bright_white]{src_short}[/bright_white] [bright_yellow]→[/bright_yellow] [bright_white]{dst_short}[/bright_white]")
-        if len(connections) > 5:
-            conn_branch.add(f"[dim]... and {len(connections) - 5} more[/dim]")
+        if view.edge_count > 5:
+            conn_branch.add(f"[dim]... and {view.edge_count - 5} more[/dim]")
 
     # Recent section
-    recent = graph.get_recent(5)
+    recent = view.recent
     if recent:
         recent_branch = tree.add(f"🕐 [bold bright_white]Recent[/bold bright_white] [dim]· last {len(recent)}[/dim]")
         for node_id in recent:
-            node = nodes_data.get(node_id, {})
+            node = view.node(node_id)
             time_ago = get_time_ago(node.get("updated", ""))
             name = truncate(node_id, 40)
             recent_branch.add(f"[bright_white]{name}[/bright_white] [bright_black]{time_ago}[/bright_black]")
 
     # Tags summary
-    tags_data = graph.cache.get("tags", {})
-    if tags_data:
-        tag_counts = [(tag, len(ids)) for tag, ids in tags_data.items()]
-        tag_counts.sort(key=lambda x: -x[1])
-        top_tags = tag_counts[:8]
+    top_tags = view.top_tags
+    if top_tags:
         tags_str = " ".join([f"[bold bright_cyan]{t}[/bold bright_cyan][bright_yellow]({c})[/bright_yellow]" for t, c in top_tags])
         tree.add(f"🏷️  [bold]Tags:[/bold] {tags_str}")
 
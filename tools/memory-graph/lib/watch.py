@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Graph Watcher - Keep graph.json in step with hand-edited node files
+
+Watches nodes/ with inotify (through ctypes; no extra dependency) or, where
+inotify is unavailable, by polling mtimes. Changes are debounced and applied
+as one batch of incremental updates and deletes per burst, so editors that
+write via temp file + rename, or scripts that touch many nodes at once,
+cost one cache save.
+
+On start the watcher reconciles the cache with nodes/ (new, modified and
+removed files since the cache was last written). Only one watcher runs per
+memory directory.
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import argparse
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import ctypes
+    import ctypes.util
+except ImportError:
+    ctypes = None
+
+# Add lib directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from graph import MemoryGraph
+from packfile import live_paths, node_exists, node_mtime
+
+# inotify(7) event bits
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+_EVENT = struct.Struct("iIII")
+
+DEFAULT_DEBOUNCE = 0.25   # quiet period that ends a burst (seconds)
+MAX_BATCH_DELAY = 2.0     # flush a long burst at least this often
+DEFAULT_POLL_INTERVAL = 2.0
+OWNER_CHECK_INTERVAL = 5.0
+ROOT_RETRY_INTERVAL = 1.0  # how often to look for a removed root coming back
+
+
+class InotifySource:
+    """
+    Recursive inotify watch over a directory tree. If the root itself is
+    removed or moved away, every watch is dropped and read() waits for the
+    root to reappear, then watches it afresh and asks for a rescan.
+    """
+
+    def __init__(self, root: str):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self.fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.root = root
+        self._root_wd: Optional[int] = None
+        self._dirs: Dict[int, str] = {}
+        self.watch_tree(root)
+
+    @classmethod
+    def available(cls) -> bool:
+        if ctypes is None or not sys.platform.startswith("linux"):
+            return False
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"))
+            return hasattr(libc, "inotify_init1")
+        except OSError:
+            return False
+
+    def watch_tree(self, root: str) -> List[str]:
+        """Watch root and its subdirectories; returns .md files already inside."""
+        found = []
+        for dirpath, dirs, files in os.walk(root):
+            wd = self._add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err == errno.ENOSPC:
+                    raise OSError(err, "inotify watch limit reached")
+                continue
+            self._dirs[wd] = dirpath
+            if dirpath == self.root:
+                self._root_wd = wd
+            found.extend(os.path.join(dirpath, f) for f in files if f.endswith('.md'))
+        return found
+
+    def _drop_watches(self) -> None:
+        for wd in list(self._dirs):
+            self._rm_watch(self.fd, wd)
+        self._dirs.clear()
+        self._root_wd = None
+
+    def read(self, timeout: Optional[float]) -> Optional[Set[str]]:
+        """
+        Wait up to timeout for events; returns changed .md paths.
+        None means a rescan is needed: the kernel queue overflowed, or the
+        root was lost and has been watched again.
+        """
+        if self._root_wd is None:
+            if not os.path.isdir(self.root):
+                wait = ROOT_RETRY_INTERVAL if timeout is None else min(timeout, ROOT_RETRY_INTERVAL)
+                time.sleep(wait)
+                return set()
+            self.watch_tree(self.root)
+            return None
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        buf = os.read(self.fd, 64 * 1024)
+        changed: Set[str] = set()
+        pos = 0
+        while pos < len(buf):
+            wd, mask, _cookie, length = _EVENT.unpack_from(buf, pos)
+            name = buf[pos + _EVENT.size:pos + _EVENT.size + length].rstrip(b'\0')
+            pos += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if wd == self._root_wd and mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                self._drop_watches()
+                return None
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            parent = self._dirs.get(wd)
+            if parent is None or not name:
+                continue
+            path = os.path.join(parent, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # Files may land before the new directory is watched
+                    changed.update(self.watch_tree(path))
+                elif mask & IN_MOVED_FROM:
+                    return None  # Its files left without per-file events
+                continue
+            if path.endswith('.md'):
+                changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class GraphWatcher:
+    """Applies debounced, batched node file changes to a MemoryGraph."""
+
+    def __init__(self, graph: MemoryGraph, debounce: float = DEFAULT_DEBOUNCE,
+                 verbose: bool = False, owner_pid: Optional[int] = None):
+        self.graph = graph
+        self.debounce = debounce
+        self.verbose = verbose
+        self.owner_pid = owner_pid
+        self.known: Dict[str, Tuple[str, float]] = {}  # abs path -> (node_id, mtime)
+        self.batches = 0
+
+    def log(self, message: str) -> None:
+        if self.verbose:
+            print(message, flush=True)
+
+    def load_known(self) -> None:
+        """Seed the path map from the cache."""
+        self.known.clear()
+        for node_id, data in self.graph.store.nodes.items():
+            path = data.get("path")
+            if path:
+                self.known[os.path.abspath(path)] = (node_id, data.get("mtime", 0))
+
+    def scan(self) -> Dict[str, float]:
+        """mtime of every .md file under nodes/ and every live pack member."""
+        disk = {}
+        for dirpath, _, files in os.walk(self.graph.nodes_dir):
+            for file in files:
+                if not file.endswith('.md'):
+                    continue
+                path = os.path.abspath(os.path.join(dirpath, file))
+                try:
+                    disk[path] = os.path.getmtime(path)
+                except OSError:
+                    continue
+        for path in live_paths(self.graph.memory_dir):
+            disk[os.path.abspath(path)] = node_mtime(path)
+        return disk
+
+    def diff(self, disk: Dict[str, float]) -> Set[str]:
+        """Paths added, modified or removed relative to what is indexed."""
+        changed = {path for path, mtime in disk.items()
+                   if path not in self.known or self.known[path][1] != mtime}
+        changed.update(path for path in self.known if path not in disk)
+        return changed
+
+    def reconcile(self) -> Tuple[int, int]:
+        """Catch the cache up with nodes/ by a full stat scan."""
+        return self.apply(self.diff(self.scan()))
+
+    def apply(self, paths: Iterable[str]) -> Tuple[int, int]:
+        """Index existing paths and delete nodes whose files are gone."""
+        updates, deleted = [], []
+        for path in sorted({os.path.abspath(p) for p in paths}):
+            if node_exists(path):
+                updates.append(path)
+            elif path in self.known:
+                deleted.append(self.known.pop(path)[0])
+        if deleted:
+            # graph.py pack removes files it has already re-pointed into the
+            # pack; those nodes moved rather than went away
+            self.graph.reload_if_changed()
+            store = self.graph.store
+            for node_id in list(deleted):
+                moved_to = (store.get(node_id) or {}).get("path")
+                if moved_to and node_exists(moved_to):
+                    deleted.remove(node_id)
+                    self.known[os.path.abspath(moved_to)] = (node_id, node_mtime(moved_to))
+        if not updates and not deleted:
+            return 0, 0
+
+        indexed, removed = self.graph.apply_changes(updates, deleted)
+        # A file whose frontmatter id changed leaves its old id behind
+        renamed = []
+        for path, node_id in indexed.items():
+            previous = self.known.get(path)
+            if previous and previous[0] != node_id:
+                renamed.append(previous[0])
+            self.known[path] = (node_id, node_mtime(path))
+        if renamed:
+            # ...unless another file still carries it (e.g. a copy being edited)
+            owners = {node_id: path for path, (node_id, _) in self.known.items()}
+            restore = [owners[node_id] for node_id in renamed if node_id in owners]
+            gone = [node_id for node_id in renamed if node_id not in owners]
+            removed += self.graph.apply_changes(restore, gone)[1]
+
+        self.batches += 1
+        self.log(f"Applied {len(indexed)} update(s), {removed} delete(s)")
+        return len(indexed), removed
+
+    def owner_alive(self) -> bool:
+        """False once the process that started us (e.g. the session) is gone."""
+        if self.owner_pid is None:
+            return True
+        try:
+            os.kill(self.owner_pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def run_inotify(self, source: InotifySource) -> None:
+        while self.owner_alive():
+            timeout = OWNER_CHECK_INTERVAL if self.owner_pid else None
+            pending = source.read(timeout)
+            if pending is None:
+                self.reconcile()
+                continue
+            # Debounce: keep collecting until the burst goes quiet
+            deadline = time.monotonic() + MAX_BATCH_DELAY
+            while time.monotonic() < deadline:
+                more = source.read(self.debounce)
+                if more is None:
+                    pending = None
+                    break
+                if not more:
+                    break
+                pending |= more
+            if pending is None:
+                self.reconcile()
+            elif pending:
+                self.apply(pending)
+
+    def run_polling(self, interval: float) -> None:
+        while self.owner_alive():
+            time.sleep(interval)
+            changed = self.diff(self.scan())
+            if changed:
+                # Let in-flight writes settle before parsing
+                time.sleep(self.debounce)
+                self.apply(changed | self.diff(self.scan()))
+
+
+def acquire_single_instance(memory_dir: str):
+    """Hold watch.lock for the process lifetime; None if another watcher has it."""
+    if fcntl is None:
+        return open(os.devnull)
+    os.makedirs(memory_dir, exist_ok=True)
+    lock_file = open(os.path.join(memory_dir, "watch.lock"), 'a')
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="graph.py watch",
+                                     description="Keep graph.json in sync with nodes/")
+    parser.add_argument("--memory-dir", default=os.environ.get("CLAUDE_MEMORY_DIR", ".claude/memory"))
+    parser.add_argument("--poll", action="store_true", help="Poll mtimes instead of using inotify")
+    parser.add_argument("--interval", type=float, default=DEFAULT_POLL_INTERVAL,
+                        help="Polling interval in seconds")
+    parser.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE,
+                        help="Quiet period before a batch is applied (seconds)")
+    parser.add_argument("--once", action="store_true",
+                        help="Reconcile the cache with nodes/ and exit")
+    parser.add_argument("--owner-pid", type=int, default=None,
+                        help="Exit once this process exits (hooks pass the session's PID)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Don't log batches")
+    args = parser.parse_args(argv)
+
+    lock = acquire_single_instance(args.memory_dir)
+    if lock is None:
+        print(f"A watcher is already running for {args.memory_dir}", file=sys.stderr)
+        return 1
+
+    graph = MemoryGraph(args.memory_dir)
+    os.makedirs(graph.nodes_dir, exist_ok=True)
+    watcher = GraphWatcher(graph, debounce=args.debounce, verbose=not args.quiet,
+                           owner_pid=args.owner_pid)
+
+    source = None
+    if not args.once and not args.poll and InotifySource.available():
+        try:
+            # Watch before reconciling so nothing between the two is missed
+            source = InotifySource(graph.nodes_dir)
+        except OSError as e:
+            print(f"inotify unavailable ({e}); polling instead", file=sys.stderr)
+
+    watcher.load_known()
+    updated, removed = watcher.reconcile()
+    if args.once:
+        print(f"Reconciled: {updated} updated, {removed} deleted")
+        return 0
+
+    mode = "inotify" if source else f"polling every {args.interval}s"
+    watcher.log(f"Watching {graph.nodes_dir} ({mode})")
+    try:
+        if source:
+            watcher.run_inotify(source)
+        else:
+            watcher.run_polling(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if source:
+            source.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
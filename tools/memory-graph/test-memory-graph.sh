@@ -549,6 +549,1363 @@ else
     log_fail "Inline tags not parsed"
 fi
 
+# ============================================
+# Test 13: Benchmark Harness
+# ============================================
+
+echo ""
+echo "--- Test 13: Benchmark Harness ---"
+
+log_test "Benchmarking a small synthetic corpus..."
+OUTPUT=$(python3 "$SCRIPT_DIR/lib/bench.py" --sizes 40 --iterations 2 --warmup 0 \
+    --targets query:recent,graph:stats,capture:file --work-dir "$TEST_DIR/bench" --json 2>/dev/null)
+if echo "$OUTPUT" | python3 -c "import sys,json; r=json.load(sys.stdin)['results']; sys.exit(0 if len(r) == 3 and all('p99_ms' in x for x in r) else 1)"; then
+    log_pass "Benchmark reports percentiles per target"
+else
+    log_fail "Benchmark did not report percentiles"
+fi
+
+if echo "$OUTPUT" | python3 -c "import sys,json; r={x['target']: x for x in json.load(sys.stdin)['results']}; sys.exit(0 if r['capture:file']['bytes_written'] > 0 else 1)"; then
+    log_pass "Benchmark measures bytes written"
+else
+    log_fail "Benchmark did not measure bytes written"
+fi
+
+log_test "Benchmark fails when over budget..."
+if ! python3 "$SCRIPT_DIR/lib/bench.py" --sizes 40 --iterations 1 --warmup 0 \
+    --targets graph:stats --work-dir "$TEST_DIR/bench" --budget-ms 0.001 > /dev/null 2>&1; then
+    log_pass "Budget violation exits non-zero"
+else
+    log_fail "Budget violation should exit non-zero"
+fi
+
+log_test "Benchmark fails on failed runs within budget..."
+if python3 - "$SCRIPT_DIR/lib" << 'PYEOF'
+import sys
+sys.path.insert(0, sys.argv[1])
+from bench import check_budgets
+
+result = {"target": "query:recent", "size": 40, "iterations": 5, "failures": 5, "p95_ms": 1.0}
+assert check_budgets([result], {"percentile": "p95", "targets": {}}, 1000.0) == \
+    ["query:recent @ 40 nodes: 5/5 runs failed"]
+PYEOF
+then
+    log_pass "Failed runs are a violation even when fast"
+else
+    log_fail "Failed runs passed the budget gate"
+fi
+
+# ============================================
+# Test 14: Synthetic Corpus Generator
+# ============================================
+
+echo ""
+echo "--- Test 14: Synthetic Corpus Generator ---"
+
+log_test "Generating seeded corpora..."
+python3 "$SCRIPT_DIR/lib/generate.py" "$TEST_DIR/gen-a" --nodes 300 --seed 7 > /dev/null
+python3 "$SCRIPT_DIR/lib/generate.py" "$TEST_DIR/gen-b" --nodes 300 --seed 7 > /dev/null
+
+if python3 - "$TEST_DIR/gen-a/graph.json" "$TEST_DIR/gen-b/graph.json" << 'PYEOF'
+import sys, json
+a, b = (json.load(open(p)) for p in sys.argv[1:3])
+strip = lambda g: {k: (v["type"], sorted(v["tags"]), sorted(v["links_to"]), v["updated"]) for k, v in g["nodes"].items()}
+sys.exit(0 if a["node_count"] == 300 and strip(a) == strip(b) else 1)
+PYEOF
+then
+    log_pass "Same seed produces the same corpus"
+else
+    log_fail "Seeded corpora differ"
+fi
+
+log_test "Emitted graph.json matches a cold rebuild..."
+cp "$TEST_DIR/gen-a/graph.json" "$TEST_DIR/gen-a-emitted.json"
+CLAUDE_MEMORY_DIR="$TEST_DIR/gen-a" python3 "$SCRIPT_DIR/lib/graph.py" rebuild > /dev/null
+if python3 - "$TEST_DIR/gen-a-emitted.json" "$TEST_DIR/gen-a/graph.json" << 'PYEOF'
+import sys, json
+a, b = (json.load(open(p)) for p in sys.argv[1:3])
+norm = lambda n: {k: sorted(v) if isinstance(v, list) else v for k, v in n.items()}
+same_nodes = {k: norm(v) for k, v in a["nodes"].items()} == {k: norm(v) for k, v in b["nodes"].items()}
+same_index = all({k: sorted(v) for k, v in a[s].items()} == {k: sorted(v) for k, v in b[s].items()} for s in ("tags", "types"))
+sys.exit(0 if same_nodes and same_index else 1)
+PYEOF
+then
+    log_pass "Emitted graph matches rebuild"
+else
+    log_fail "Emitted graph differs from rebuild"
+fi
+
+# ============================================
+# Test 15: Profiling Instrumentation
+# ============================================
+
+echo ""
+echo "--- Test 15: Profiling Instrumentation ---"
+
+log_test "Recording spans with CLAUDE_MEMORY_PROFILE..."
+rm -f "$TEST_DIR/memory/profile.jsonl"
+CLAUDE_MEMORY_DIR="$TEST_DIR/memory" python3 "$SCRIPT_DIR/lib/query.py" --command recent --limit 3 > /dev/null
+if [ ! -f "$TEST_DIR/memory/profile.jsonl" ]; then
+    log_pass "No metrics written when profiling is off"
+else
+    log_fail "Metrics written without CLAUDE_MEMORY_PROFILE"
+fi
+
+CLAUDE_MEMORY_PROFILE=1 CLAUDE_MEMORY_DIR="$TEST_DIR/memory" python3 "$SCRIPT_DIR/lib/query.py" --command recent --limit 3 --no-cache > /dev/null
+if python3 - "$TEST_DIR/memory/profile.jsonl" << 'PYEOF'
+import sys, json
+spans = {json.loads(l)["span"]: json.loads(l) for l in open(sys.argv[1])}
+ok = {"load_index", "parse_node", "query.recent", "format.summary"} <= set(spans)
+sys.exit(0 if ok and spans["parse_node"]["bytes_read"] > 0 else 1)
+PYEOF
+then
+    log_pass "Query records load/parse/query/format spans"
+else
+    log_fail "Expected spans missing from profile.jsonl"
+fi
+
+OUTPUT=$(CLAUDE_MEMORY_DIR="$TEST_DIR/memory" python3 "$SCRIPT_DIR/lib/graph.py" profile-report --json)
+if echo "$OUTPUT" | python3 -c "import sys,json; r=json.load(sys.stdin); sys.exit(0 if r['load_index']['count'] >= 1 and 'p95_ms' in r['load_index'] else 1)"; then
+    log_pass "profile-report aggregates percentiles"
+else
+    log_fail "profile-report output incorrect"
+fi
+
+# ============================================
+# Test 16: Indexed Lazy Cache
+# ============================================
+
+echo ""
+echo "--- Test 16: Indexed Lazy Cache ---"
+
+log_test "Reading records through graph.idx..."
+if [ -f "$TEST_DIR/gen-a/graph.idx" ]; then
+    log_pass "graph.idx written alongside graph.json"
+else
+    log_fail "graph.idx not written"
+fi
+
+if python3 - "$SCRIPT_DIR/lib" "$TEST_DIR/gen-a" << 'PYEOF'
+import sys, json
+sys.path.insert(0, sys.argv[1])
+from graph import MemoryGraph
+full = json.load(open(sys.argv[2] + "/graph.json"))
+g = MemoryGraph(sys.argv[2])
+ok = all(g.get_node(nid) == data for nid, data in full["nodes"].items())
+ok = ok and all(g.get_by_tag(t) == ids for t, ids in full["tags"].items())
+ok = ok and all(g.get_by_type(t) == ids for t, ids in full["types"].items())
+ok = ok and g.get_node("no-such-node") is None and g.get_by_tag("no-such-tag") == []
+ok = ok and g.get_recent(20) == full["recent"] and g.get_node_count() == full["node_count"]
+sys.exit(0 if ok and g._cache is None else 1)
+PYEOF
+then
+    log_pass "Lazy lookups match graph.json without a full load"
+else
+    log_fail "Lazy lookups differ from graph.json"
+fi
+
+log_test "Falling back when graph.idx is stale..."
+python3 -c "import json,sys; p=sys.argv[1]; g=json.load(open(p)); g['node_count']=7; json.dump(g, open(p,'w'))" "$TEST_DIR/gen-a/graph.json"
+COUNT=$(CLAUDE_MEMORY_DIR="$TEST_DIR/gen-a" python3 "$SCRIPT_DIR/lib/graph.py" count)
+if [ "$COUNT" = "7" ]; then
+    log_pass "Stale index ignored"
+else
+    log_fail "Stale index used (count: $COUNT)"
+fi
+
+# ============================================
+# Test 17: Compact Node Store
+# ============================================
+
+echo ""
+echo "--- Test 17: Compact Node Store ---"
+
+log_test "Round-tripping the cache through the node store..."
+if python3 - "$SCRIPT_DIR/lib" "$TEST_DIR/gen-a" << 'PYEOF'
+import sys, json
+sys.path.insert(0, sys.argv[1])
+from graph import MemoryGraph
+path = sys.argv[2] + "/graph.json"
+before = json.load(open(path))
+g = MemoryGraph(sys.argv[2])          # stale index from Test 16: decoded path
+g.save_cache()
+g = MemoryGraph(sys.argv[2])          # fresh index: span-backed path
+g.save_cache()
+after = json.load(open(path))
+strip = lambda c: {k: v for k, v in c.items() if k not in ("updated_at", "graph_version")}
+sys.exit(0 if strip(before) == strip(after) else 1)
+PYEOF
+then
+    log_pass "Store load/save preserves graph.json"
+else
+    log_fail "Store round-trip changed graph.json"
+fi
+
+log_test "Reading postings in ID order after edits..."
+if python3 - "$SCRIPT_DIR/lib" << 'PYEOF'
+import sys
+sys.path.insert(0, sys.argv[1])
+from store import NodeStore
+
+store = NodeStore()
+for node_id in ["c", "a", "d", "b"]:          # interned out of ID order
+    store.add_posting("tags", "x", node_id)
+first = store.postings("tags", "x")
+assert first == ["a", "b", "c", "d"], first
+first.append("mutated")                        # callers get a copy
+assert store.postings("tags", "x") == ["a", "b", "c", "d"]
+assert list(store.posting_after("tags", "x", "b")) == ["c", "d"]
+store.add_posting("tags", "x", "ab")
+store.remove_posting("tags", "x", "c")
+assert store.postings("tags", "x") == ["a", "ab", "b", "d"], store.postings("tags", "x")
+assert list(store.posting_after("tags", "missing")) == []
+PYEOF
+then
+    log_pass "ID-ordered view kept in step with add/remove"
+else
+    log_fail "Posting order wrong after edits"
+fi
+
+OUTPUT=$(CLAUDE_MEMORY_DIR="$TEST_DIR/gen-a" python3 "$SCRIPT_DIR/lib/graph.py" load)
+if echo "$OUTPUT" | python3 -c "import sys,json; r=json.load(sys.stdin); sys.exit(0 if r['node_count'] == 300 and r['max_rss_kb'] > 0 else 1)"; then
+    log_pass "graph.py load reports load time and RSS"
+else
+    log_fail "graph.py load output incorrect"
+fi
+
+# ============================================
+# Test 18: Incremental Index Maintenance
+# ============================================
+
+echo ""
+echo "--- Test 18: Incremental Index Maintenance ---"
+
+log_test "Applying node edits and deletes as deltas..."
+if python3 - "$SCRIPT_DIR/lib" "$TEST_DIR/delta" << 'PYEOF'
+import os, sys, json, shutil
+sys.path.insert(0, sys.argv[1])
+from graph import MemoryGraph, register_secondary_index
+root = sys.argv[2]
+nodes = os.path.join(root, "nodes", "notes")
+os.makedirs(nodes, exist_ok=True)
+
+def write(node_id, node_type, tags, related, day):
+    path = os.path.join(nodes, node_id + ".md")
+    with open(path, "w") as f:
+        f.write(f"---\nid: {node_id}\ntype: {node_type}\n"
+                f"created: 2025-01-{day:02d}T10:00:00Z\nupdated: 2025-01-{day:02d}T10:00:00Z\n"
+                f"status: active\ntags: [{', '.join(tags)}]\nrelated: [{', '.join(related)}]\n---\n\n# {node_id}\n")
+    return path
+
+def canonical(memory_dir):
+    cache = json.load(open(os.path.join(memory_dir, "graph.json")))
+    nodes = {k: dict(v, path=os.path.basename(v["path"]), backlinks=sorted(v["backlinks"]), mtime=0)
+             for k, v in cache["nodes"].items()}
+    index = lambda section: {k: sorted(v) for k, v in cache[section].items()}
+    dangling = {k: sorted(v) for k, v in cache.get("dangling", {}).items()}
+    return nodes, index("tags"), index("types"), dangling, cache["node_count"]
+
+seen = []
+register_secondary_index(lambda graph, node_id, old, new: seen.append((node_id, old is None, new is None)))
+
+g = MemoryGraph(root)
+a = write("note-a", "decision", ["auth", "db"], ["note-b", "note-c"], 1)
+b = write("note-b", "decision", ["auth"], [], 2)
+for path in (a, b):
+    MemoryGraph(root).update_single_node(path)
+c = write("note-c", "pattern", ["db"], ["note-a"], 3)          # note-a -> note-c was dangling
+MemoryGraph(root).update_single_node(c)
+a = write("note-a", "pattern", ["db", "perf"], ["note-c"], 4)   # type, tag and link changes
+MemoryGraph(root).update_single_node(a)
+MemoryGraph(root).delete_node("note-c")
+os.remove(c)
+incremental = canonical(root)
+
+rebuilt_dir = root + "-rebuilt"
+shutil.copytree(os.path.join(root, "nodes"), os.path.join(rebuilt_dir, "nodes"))
+MemoryGraph(rebuilt_dir).rebuild()
+rebuilt = canonical(rebuilt_dir)
+
+nodes, tags, types, dangling, count = incremental
+ok = (incremental[:4] == rebuilt[:4] and count == 2
+      and "decision" in types and types["pattern"] == ["note-a"]
+      and "auth" in tags and tags["auth"] == ["note-b"] and "perf" in tags
+      and nodes["note-b"]["backlinks"] == [] and dangling == {"note-c": ["note-a"]}
+      and ("note-c", True, False) in seen and ("note-c", False, True) in seen)
+sys.exit(0 if ok else 1)
+PYEOF
+then
+    log_pass "Incremental updates and deletes match a full rebuild"
+else
+    log_fail "Incremental index maintenance diverged from rebuild"
+fi
+
+OUTPUT=$(CLAUDE_MEMORY_DIR="$TEST_DIR/delta" python3 "$SCRIPT_DIR/lib/graph.py" delete note-b)
+if [ "$(CLAUDE_MEMORY_DIR="$TEST_DIR/delta" python3 "$SCRIPT_DIR/lib/graph.py" count)" = "1" ] && \
+   [ "$(CLAUDE_MEMORY_DIR="$TEST_DIR/delta" python3 "$SCRIPT_DIR/lib/graph.py" tag auth)" = "[]" ]; then
+    log_pass "graph.py delete removes node and its postings"
+else
+    log_fail "graph.py delete left stale entries"
+fi
+
+# ============================================
+# Test 19: Filesystem Watcher
+# ============================================
+
+echo ""
+echo "--- Test 19: Filesystem Watcher ---"
+
+WATCH_DIR="$TEST_DIR/watch"
+mkdir -p "$WATCH_DIR/nodes/notes"
+for n in 1 2; do
+    cat > "$WATCH_DIR/nodes/notes/w$n.md" << EOF
+---
+id: w$n
+type: note
+created: 2025-01-0${n}T10:00:00Z
+updated: 2025-01-0${n}T10:00:00Z
+status: active
+tags: [watched]
+related: []
+---
+
+# w$n
+EOF
+done
+CLAUDE_MEMORY_DIR="$WATCH_DIR" python3 "$SCRIPT_DIR/lib/graph.py" rebuild > /dev/null
+
+log_test "Reconciling hand edits with watch --once..."
+sed -i.bak 's/tags: \[watched\]/tags: [watched, edited]/' "$WATCH_DIR/nodes/notes/w1.md" && rm -f "$WATCH_DIR/nodes/notes/w1.md.bak"
+rm "$WATCH_DIR/nodes/notes/w2.md"
+OUTPUT=$(CLAUDE_MEMORY_DIR="$WATCH_DIR" python3 "$SCRIPT_DIR/lib/graph.py" watch --once)
+if echo "$OUTPUT" | grep -q "1 updated, 1 deleted" && \
+   [ "$(CLAUDE_MEMORY_DIR="$WATCH_DIR" python3 "$SCRIPT_DIR/lib/graph.py" tag watched | tr -d ' \n')" = '["w1"]' ]; then
+    log_pass "watch --once applies edits and deletions"
+else
+    log_fail "watch --once did not reconcile: $OUTPUT"
+fi
+
+log_test "Picking up a new node while watching..."
+CLAUDE_MEMORY_DIR="$WATCH_DIR" python3 "$SCRIPT_DIR/lib/graph.py" watch --poll --interval 0.2 --quiet &
+WATCH_PID=$!
+sleep 0.5
+sed 's/w1/w3/g' "$WATCH_DIR/nodes/notes/w1.md" > "$WATCH_DIR/nodes/notes/w3.md"
+FOUND=""
+for _ in $(seq 1 30); do
+    if CLAUDE_MEMORY_DIR="$WATCH_DIR" python3 "$SCRIPT_DIR/lib/graph.py" node w3 > /dev/null 2>&1; then
+        FOUND=1
+        break
+    fi
+    sleep 0.2
+done
+kill "$WATCH_PID" 2>/dev/null || true
+wait "$WATCH_PID" 2>/dev/null || true
+if [ -n "$FOUND" ]; then
+    log_pass "Watcher indexed a new node without a rebuild"
+else
+    log_fail "Watcher did not index the new node"
+fi
+
+log_test "Re-watching nodes/ after it is removed and recreated..."
+if python3 -c "import sys; sys.path.insert(0, sys.argv[1]); from watch import InotifySource; sys.exit(0 if InotifySource.available() else 1)" "$SCRIPT_DIR/lib"; then
+    CLAUDE_MEMORY_DIR="$WATCH_DIR" python3 "$SCRIPT_DIR/lib/graph.py" watch --debounce 0.1 --quiet &
+    WATCH_PID=$!
+    sleep 0.5
+    cp "$WATCH_DIR/nodes/notes/w3.md" "$TEST_DIR/w3.keep"
+    rm -rf "$WATCH_DIR/nodes"
+    sleep 0.5
+    mkdir -p "$WATCH_DIR/nodes/notes"
+    sed 's/w3/w4/g' "$TEST_DIR/w3.keep" > "$WATCH_DIR/nodes/notes/w4.md"
+    FOUND=""
+    for _ in $(seq 1 30); do
+        if CLAUDE_MEMORY_DIR="$WATCH_DIR" python3 "$SCRIPT_DIR/lib/graph.py" node w4 > /dev/null 2>&1; then
+            FOUND=1
+            break
+        fi
+        sleep 0.2
+    done
+    kill "$WATCH_PID" 2>/dev/null || true
+    wait "$WATCH_PID" 2>/dev/null || true
+    if [ -n "$FOUND" ] && ! CLAUDE_MEMORY_DIR="$WATCH_DIR" python3 "$SCRIPT_DIR/lib/graph.py" node w1 > /dev/null 2>&1; then
+        log_pass "Watcher recovered the lost root and rescanned"
+    else
+        log_fail "Watcher stopped seeing changes after nodes/ was recreated"
+    fi
+else
+    log_pass "inotify unavailable; skipped"
+fi
+
+# ============================================
+# Test 20: Retention Policy
+# ============================================
+
+echo ""
+echo "--- Test 20: Retention Policy ---"
+
+GC_DIR="$TEST_DIR/gc"
+mkdir -p "$GC_DIR/nodes/files" "$GC_DIR/nodes/tasks"
+cat > "$GC_DIR/config.json" << 'EOF'
+{"retention": {"max_age_days": {"file-summary": 30}, "min_access_count": {"file-summary": 3},
+               "keep_linked_to_active_tasks": true, "max_nodes": 0}}
+EOF
+write_gc_node() {
+    cat > "$GC_DIR/nodes/$1/$2.md" << EOF
+---
+id: $2
+type: $3
+created: 2024-01-01T00:00:00Z
+updated: $4
+status: active
+tags: [gc]
+related: [$5]
+access_count: $6
+task_status: in_progress
+---
+
+# $2
+EOF
+}
+write_gc_node files file-cold file-summary 2024-01-01T00:00:00Z "" 1
+write_gc_node files file-busy file-summary 2024-01-01T00:00:00Z "" 5
+write_gc_node files file-fresh file-summary 2099-01-01T00:00:00Z "" 1
+write_gc_node files file-linked file-summary 2024-01-01T00:00:00Z "" 1
+write_gc_node tasks task-open task 2024-01-01T00:00:00Z "file-linked, file-cold-2" 0
+write_gc_node files file-cold-2 file-summary 2024-01-01T00:00:00Z "" 0
+sed -i.bak 's/^related: \[\]/related: [file-linked]/' "$GC_DIR/nodes/files/file-cold.md" && rm -f "$GC_DIR/nodes/files/file-cold.md.bak"
+CLAUDE_MEMORY_DIR="$GC_DIR" python3 "$SCRIPT_DIR/lib/graph.py" rebuild > /dev/null
+
+log_test "Selecting cold nodes by age, access count and task links..."
+OUTPUT=$(CLAUDE_MEMORY_DIR="$GC_DIR" python3 "$SCRIPT_DIR/lib/graph.py" gc --dry-run --json)
+if echo "$OUTPUT" | python3 -c "import sys,json; r=json.load(sys.stdin); sys.exit(0 if sorted(n['id'] for n in r['nodes']) == ['file-cold'] else 1)"; then
+    log_pass "gc --dry-run picks only the cold, unlinked, rarely used node"
+else
+    log_fail "gc selected the wrong nodes: $OUTPUT"
+fi
+
+log_test "Packing cold nodes out of the working set..."
+CLAUDE_MEMORY_DIR="$GC_DIR" python3 "$SCRIPT_DIR/lib/graph.py" gc > /dev/null
+if grep -q '"files/file-cold.md":\[[0-9]*,[0-9]*,[0-9.]*,"file-cold",false\]' "$GC_DIR/pack/nodes.idx" && \
+   [ ! -f "$GC_DIR/nodes/files/file-cold.md" ] && \
+   [ "$(CLAUDE_MEMORY_DIR="$GC_DIR" python3 "$SCRIPT_DIR/lib/graph.py" count)" = "5" ] && \
+   CLAUDE_MEMORY_DIR="$GC_DIR" python3 "$SCRIPT_DIR/lib/graph.py" node file-linked | python3 -c "import sys,json; sys.exit(0 if json.load(sys.stdin)['backlinks'] == ['task-open'] else 1)"; then
+    log_pass "Packed node moved into the packfile and dropped from indexes"
+else
+    log_fail "gc pack left the graph inconsistent"
+fi
+
+log_test "Archiving in place..."
+sed -i.bak 's/^task_status: in_progress/task_status: completed/' "$GC_DIR/nodes/tasks/task-open.md" && rm -f "$GC_DIR/nodes/tasks/task-open.md.bak"
+CLAUDE_MEMORY_DIR="$GC_DIR" python3 "$SCRIPT_DIR/lib/graph.py" update "$GC_DIR/nodes/tasks/task-open.md" > /dev/null
+CLAUDE_MEMORY_DIR="$GC_DIR" python3 "$SCRIPT_DIR/lib/graph.py" gc --action archive > /dev/null
+OUTPUT=$(CLAUDE_MEMORY_DIR="$GC_DIR" python3 "$SCRIPT_DIR/lib/query.py" --command tag --query gc --format ids --limit 2)
+if grep -q "^status: archived" "$GC_DIR/nodes/files/file-linked.md" && echo "$OUTPUT" | grep -q "file-busy"; then
+    log_pass "Archived nodes no longer crowd active query results"
+else
+    log_fail "gc archive did not mark nodes archived"
+fi
+
+log_test "Archiving cold nodes that are packed but live..."
+PACKED_GC_DIR="$TEST_DIR/gc-packed"
+mkdir -p "$PACKED_GC_DIR/nodes/files"
+cp "$GC_DIR/config.json" "$PACKED_GC_DIR/"
+GC_DIR="$PACKED_GC_DIR" write_gc_node files file-packed-cold file-summary 2024-01-01T00:00:00Z "" 0
+CLAUDE_MEMORY_DIR="$PACKED_GC_DIR" python3 "$SCRIPT_DIR/lib/graph.py" rebuild > /dev/null
+CLAUDE_MEMORY_DIR="$PACKED_GC_DIR" python3 "$SCRIPT_DIR/lib/graph.py" pack file-packed-cold > /dev/null
+OUTPUT=$(CLAUDE_MEMORY_DIR="$PACKED_GC_DIR" python3 "$SCRIPT_DIR/lib/graph.py" gc --action archive --json)
+STATUS=$(CLAUDE_MEMORY_DIR="$PACKED_GC_DIR" python3 "$SCRIPT_DIR/lib/graph.py" node file-packed-cold | python3 -c "import sys,json; print(json.load(sys.stdin)['status'])")
+if echo "$OUTPUT" | python3 -c "import sys,json; r=json.load(sys.stdin); sys.exit(0 if [n['id'] for n in r['nodes']] == ['file-packed-cold'] else 1)" \
+    && [ "$STATUS" = "archived" ] && grep -q "^status: archived" "$PACKED_GC_DIR/nodes/files/file-packed-cold.md"; then
+    log_pass "Packed node unpacked, archived and reported"
+else
+    log_fail "Packed cold node: $OUTPUT (status $STATUS)"
+fi
+
+# ============================================
+# Test 21: Packfile
+# ============================================
+
+echo ""
+echo "--- Test 21: Packfile ---"
+
+log_test "Reading packed nodes transparently..."
+CLAUDE_MEMORY_DIR="$GC_DIR" python3 "$SCRIPT_DIR/lib/graph.py" pack file-busy > /dev/null
+NODE_JSON=$(CLAUDE_MEMORY_DIR="$GC_DIR" python3 "$SCRIPT_DIR/lib/graph.py" node file-busy)
+SEARCH=$(CLAUDE_MEMORY_DIR="$GC_DIR" python3 "$SCRIPT_DIR/lib/graph.py" search "# file-busy")
+FULL=$(CLAUDE_MEMORY_DIR="$GC_DIR" python3 "$SCRIPT_DIR/lib/query.py" --command id --query file-busy --format full)
+if [ ! -f "$GC_DIR/nodes/files/file-busy.md" ] && echo "$NODE_JSON" | grep -q 'nodes.pack#files/file-busy.md' && \
+   echo "$SEARCH" | grep -q '"file-busy"' && echo "$FULL" | grep -q "^access_count: 5"; then
+    log_pass "node, search and full output read from the pack"
+else
+    log_fail "Packed node not readable: $NODE_JSON $SEARCH"
+fi
+
+log_test "Rebuilding with packed nodes..."
+CLAUDE_MEMORY_DIR="$GC_DIR" python3 "$SCRIPT_DIR/lib/graph.py" rebuild > /dev/null
+NODE_JSON=$(CLAUDE_MEMORY_DIR="$GC_DIR" python3 "$SCRIPT_DIR/lib/graph.py" node file-busy)
+if echo "$NODE_JSON" | grep -q 'nodes.pack#' && \
+   [ "$(CLAUDE_MEMORY_DIR="$GC_DIR" python3 "$SCRIPT_DIR/lib/graph.py" count)" = "5" ]; then
+    log_pass "rebuild indexes live pack members but not collected ones"
+else
+    log_fail "rebuild lost or resurrected packed nodes"
+fi
+
+log_test "Unpacking and compacting..."
+CLAUDE_MEMORY_DIR="$GC_DIR" python3 "$SCRIPT_DIR/lib/graph.py" unpack --all --compact > /dev/null
+if [ -f "$GC_DIR/nodes/files/file-busy.md" ] && [ -f "$GC_DIR/nodes/files/file-cold.md" ] && \
+   [ ! -s "$GC_DIR/pack/nodes.pack" ] && \
+   [ "$(CLAUDE_MEMORY_DIR="$GC_DIR" python3 "$SCRIPT_DIR/lib/graph.py" count)" = "6" ]; then
+    log_pass "unpack restored loose files and re-indexed them"
+else
+    log_fail "unpack did not restore the packed nodes"
+fi
+
+log_test "Recapturing a packed node..."
+RECAP_DIR="$TEST_DIR/recapture"
+bash "$SCRIPT_DIR/init.sh" "$RECAP_DIR" > /dev/null
+printf 'x = 1\n' > "$TEST_DIR/recap.py"
+CLAUDE_MEMORY_DIR="$RECAP_DIR" python3 "$SCRIPT_DIR/lib/capture.py" file "$TEST_DIR/recap.py" > /dev/null
+RECAP_NODE=$(ls "$RECAP_DIR"/nodes/files/*.md)
+printf '\n## Notes\nSee [[decision-abc]]\n' >> "$RECAP_NODE"
+CLAUDE_MEMORY_DIR="$RECAP_DIR" python3 "$SCRIPT_DIR/lib/graph.py" update "$RECAP_NODE" > /dev/null
+CLAUDE_MEMORY_DIR="$RECAP_DIR" python3 "$SCRIPT_DIR/lib/graph.py" pack --type file-summary > /dev/null
+OUTPUT=$(CLAUDE_MEMORY_DIR="$RECAP_DIR" python3 "$SCRIPT_DIR/lib/capture.py" file "$TEST_DIR/recap.py")
+RECAP_ID=$(basename "$RECAP_NODE" .md)
+FULL=$(CLAUDE_MEMORY_DIR="$RECAP_DIR" python3 "$SCRIPT_DIR/lib/query.py" --command id --query "$RECAP_ID" --format full)
+if echo "$OUTPUT" | grep -q '"status": "updated"' && echo "$FULL" | grep -q "decision-abc" && \
+   echo "$FULL" | grep -q "^access_count: 2" && [ -f "$RECAP_NODE" ] && \
+   [ "$(python3 -c "import json; print(len(json.load(open('$RECAP_DIR/pack/nodes.idx'))['entries']))" 2>/dev/null || echo 0)" = "0" ]; then
+    log_pass "Packed node unpacked and bumped in place, notes and links kept"
+else
+    log_fail "Recapture duplicated the packed node: $OUTPUT"
+fi
+
+# ============================================
+# Test 22: Near-Duplicate Detection
+# ============================================
+
+echo ""
+echo "--- Test 22: Near-Duplicate Detection ---"
+
+DEDUPE_DIR="$TEST_DIR/dedupe"
+mkdir -p "$DEDUPE_DIR"
+INSIGHT="The auth middleware caches JWT validation results per request so repeated checks within one handler are cheap and do not hit the key server"
+
+log_test "Merging a reworded discovery at capture time..."
+FIRST=$(CLAUDE_MEMORY_DIR="$DEDUPE_DIR" python3 "$SCRIPT_DIR/lib/capture.py" discovery pattern "$INSIGHT")
+SECOND=$(CLAUDE_MEMORY_DIR="$DEDUPE_DIR" python3 "$SCRIPT_DIR/lib/capture.py" discovery pattern "${INSIGHT/do not/never}")
+OTHER=$(CLAUDE_MEMORY_DIR="$DEDUPE_DIR" python3 "$SCRIPT_DIR/lib/capture.py" discovery pattern "Database migrations run in a single transaction on Postgres but not on MySQL")
+if echo "$SECOND" | grep -q '"status": "merged"' && echo "$OTHER" | grep -q '"status": "created"' && \
+   [ "$(CLAUDE_MEMORY_DIR="$DEDUPE_DIR" python3 "$SCRIPT_DIR/lib/graph.py" count)" = "2" ] && \
+   grep -q "^access_count: 2" "$DEDUPE_DIR"/nodes/discoveries/discovery-pattern-*.md; then
+    log_pass "Near-duplicate folded into the existing node"
+else
+    log_fail "Near-duplicate not merged: $FIRST $SECOND $OTHER"
+fi
+
+log_test "Superseding near-duplicates in an existing corpus..."
+sed -e 's/^id: .*/id: discovery-copy/' -e 's/^created: .*/created: 2099-01-01T00:00:00Z/' \
+    -e 's/do not hit/do not ever hit/' "$DEDUPE_DIR"/nodes/discoveries/discovery-pattern-d33ac3d3.md \
+    > "$DEDUPE_DIR/nodes/discoveries/discovery-copy.md"
+CLAUDE_MEMORY_DIR="$DEDUPE_DIR" python3 "$SCRIPT_DIR/lib/graph.py" update "$DEDUPE_DIR/nodes/discoveries/discovery-copy.md" > /dev/null
+CLAUDE_MEMORY_DIR="$DEDUPE_DIR" python3 "$SCRIPT_DIR/lib/graph.py" dedupe > /dev/null
+NODE_JSON=$(CLAUDE_MEMORY_DIR="$DEDUPE_DIR" python3 "$SCRIPT_DIR/lib/graph.py" node discovery-copy)
+INCREMENTAL=$(python3 -c "import json; c=json.load(open('$DEDUPE_DIR/graph.json')); print(json.dumps(c['minhash'], sort_keys=True))")
+CLAUDE_MEMORY_DIR="$DEDUPE_DIR" python3 "$SCRIPT_DIR/lib/graph.py" rebuild > /dev/null
+REBUILT=$(python3 -c "import json; c=json.load(open('$DEDUPE_DIR/graph.json')); print(json.dumps(c['minhash'], sort_keys=True))")
+if echo "$NODE_JSON" | grep -q '"status": "superseded"' && echo "$NODE_JSON" | grep -q '"discovery-pattern-d33ac3d3"' && \
+   [ "$INCREMENTAL" = "$REBUILT" ]; then
+    log_pass "dedupe superseded the newer copy; band index matches a rebuild"
+else
+    log_fail "dedupe batch pass failed: $NODE_JSON"
+fi
+
+log_test "Superseding near-duplicates that are packed..."
+PACKED_DEDUPE_DIR="$TEST_DIR/dedupe-packed"
+mkdir -p "$PACKED_DEDUPE_DIR/nodes/discoveries"
+cp "$DEDUPE_DIR"/nodes/discoveries/discovery-pattern-d33ac3d3.md "$PACKED_DEDUPE_DIR/nodes/discoveries/"
+sed -e 's/^id: .*/id: discovery-copy/' -e 's/^created: .*/created: 2099-01-01T00:00:00Z/' \
+    -e 's/do not hit/do not ever hit/' "$DEDUPE_DIR"/nodes/discoveries/discovery-pattern-d33ac3d3.md \
+    > "$PACKED_DEDUPE_DIR/nodes/discoveries/discovery-copy.md"
+KEPT_ACCESS=$(sed -n 's/^access_count: //p' "$DEDUPE_DIR"/nodes/discoveries/discovery-pattern-d33ac3d3.md)
+CLAUDE_MEMORY_DIR="$PACKED_DEDUPE_DIR" python3 "$SCRIPT_DIR/lib/graph.py" rebuild > /dev/null
+CLAUDE_MEMORY_DIR="$PACKED_DEDUPE_DIR" python3 "$SCRIPT_DIR/lib/graph.py" pack --type discovery > /dev/null
+OUTPUT=$(CLAUDE_MEMORY_DIR="$PACKED_DEDUPE_DIR" python3 "$SCRIPT_DIR/lib/graph.py" dedupe)
+NODE_JSON=$(CLAUDE_MEMORY_DIR="$PACKED_DEDUPE_DIR" python3 "$SCRIPT_DIR/lib/graph.py" node discovery-copy)
+if [ "$OUTPUT" = "Superseded 1 node(s) in 1 group(s)" ] && echo "$NODE_JSON" | grep -q '"status": "superseded"' \
+    && grep -q "^access_count: $((KEPT_ACCESS + 1))$" "$PACKED_DEDUPE_DIR"/nodes/discoveries/discovery-pattern-d33ac3d3.md; then
+    log_pass "Packed duplicates unpacked and rewritten; the count matches"
+else
+    log_fail "Packed dedupe: $OUTPUT $NODE_JSON"
+fi
+
+# ============================================
+# Test 23: Content Similarity
+# ============================================
+
+echo ""
+echo "--- Test 23: Content Similarity ---"
+
+SIM_DIR="$TEST_DIR/similar"
+mkdir -p "$SIM_DIR"
+CLAUDE_MEMORY_DIR="$SIM_DIR" python3 "$SCRIPT_DIR/lib/capture.py" discovery performance "Redis eviction drops session keys under memory pressure; raise maxmemory or switch the eviction policy to volatile-lru" > /dev/null
+CLAUDE_MEMORY_DIR="$SIM_DIR" python3 "$SCRIPT_DIR/lib/capture.py" discovery gotcha "Webpack rebuilds are slow because source maps are regenerated for every chunk" > /dev/null
+CLAUDE_MEMORY_DIR="$SIM_DIR" python3 "$SCRIPT_DIR/lib/capture.py" discovery config "Logging goes through a single structured JSON formatter configured at startup" > /dev/null
+REDIS_ID=$(grep -l "Redis eviction" "$SIM_DIR"/nodes/discoveries/*.md | xargs basename | sed 's/\.md$//')
+
+log_test "Finding nodes with similar content but no shared tags..."
+CLAUDE_MEMORY_DIR="$SIM_DIR" python3 "$SCRIPT_DIR/lib/capture.py" discovery bug "Session keys vanish when Redis hits maxmemory because the eviction policy is allkeys-lru" > /dev/null
+BUG_ID=$(grep -l "Session keys vanish" "$SIM_DIR"/nodes/discoveries/*.md | xargs basename | sed 's/\.md$//')
+SIMILAR=$(CLAUDE_MEMORY_DIR="$SIM_DIR" python3 "$SCRIPT_DIR/lib/graph.py" similar "$REDIS_ID" 1)
+if echo "$SIMILAR" | grep -q "\"$BUG_ID\""; then
+    log_pass "similar ranks the newly captured Redis node first"
+else
+    log_fail "similar missed the related node: $SIMILAR"
+fi
+
+log_test "Matching a prompt against node content..."
+PROMPT_HITS=$(CLAUDE_MEMORY_DIR="$SIM_DIR" python3 "$SCRIPT_DIR/lib/query.py" --command prompt \
+    --query "why are webpack builds so slow with source maps?" --format ids --limit 1)
+if [ "$PROMPT_HITS" = "$(grep -l "Webpack" "$SIM_DIR"/nodes/discoveries/*.md | xargs basename | sed 's/\.md$//')" ]; then
+    log_pass "Prompt matched the webpack discovery"
+else
+    log_fail "Prompt match wrong: $PROMPT_HITS"
+fi
+
+log_test "Vectorizing parsed bodies into a little-endian base..."
+if python3 - "$SCRIPT_DIR/lib" "$SIM_DIR" "$REDIS_ID" << 'PYEOF'
+import sys, glob, struct
+sys.path.insert(0, sys.argv[1])
+import vectors
+from graph import MemoryGraph
+
+graph = MemoryGraph(sys.argv[2])
+path = graph.get_node(sys.argv[3])["path"]
+with open(path, 'a') as f:
+    f.write("\nEviction also hits rate limiter keys\n")
+
+def no_reread(path):
+    raise AssertionError("node file read again by the vector hook")
+vectors.node_text = no_reread
+graph.apply_changes([path])
+assert "limiter" in graph.vectors.delta[sys.argv[3]][1]
+
+graph.vectors.compact()
+gen = graph.vectors.meta["generation"]
+raw = open(f"{sys.argv[2]}/vectors/postings.{gen}.doc", 'rb').read()
+slots = list(struct.unpack(f"<{len(raw) // 4}I", raw))
+assert slots and max(slots) < graph.vectors.meta["slots"], slots
+PYEOF
+then
+    log_pass "Hook used the parsed body; postings are little-endian"
+else
+    log_fail "Vector hook re-read the node or wrote native-endian postings"
+fi
+
+# ============================================
+# Test 24: Query Result Cache
+# ============================================
+
+echo ""
+echo "--- Test 24: Query Result Cache ---"
+
+QC_DIR="$TEST_DIR/querycache"
+mkdir -p "$QC_DIR"
+CLAUDE_MEMORY_DIR="$QC_DIR" python3 "$SCRIPT_DIR/lib/capture.py" discovery pattern "Feature flags are read once at boot from the flags table" > /dev/null
+
+log_test "Serving a repeated query from the cache..."
+FIRST=$(CLAUDE_MEMORY_DIR="$QC_DIR" python3 "$SCRIPT_DIR/lib/query.py" --command type --query discovery --format ids)
+# A planted output proves the second run never touched the graph
+python3 - "$QC_DIR/query-cache.json" <<'PYEOF'
+import json, sys
+path = sys.argv[1]
+data = json.load(open(path))
+data["entries"] = [[key, ["planted", None]] for key, _ in data["entries"]]
+json.dump(data, open(path, "w"))
+PYEOF
+CACHE_MTIME=$(python3 -c "import os, sys; print(os.stat(sys.argv[1]).st_mtime_ns)" "$QC_DIR/query-cache.json")
+SECOND=$(CLAUDE_MEMORY_DIR="$QC_DIR" python3 "$SCRIPT_DIR/lib/query.py" --command type --query discovery --format ids)
+CACHE_MTIME_AFTER=$(python3 -c "import os, sys; print(os.stat(sys.argv[1]).st_mtime_ns)" "$QC_DIR/query-cache.json")
+UNCACHED=$(CLAUDE_MEMORY_DIR="$QC_DIR" python3 "$SCRIPT_DIR/lib/query.py" --command type --query discovery --format ids --no-cache)
+if [ -n "$FIRST" ] && [ "$SECOND" = "planted" ] && [ "$UNCACHED" = "$FIRST" ] && \
+   [ "$CACHE_MTIME" = "$CACHE_MTIME_AFTER" ]; then
+    log_pass "Repeat served from query-cache.json without rewriting it"
+else
+    log_fail "Query cache not used: $FIRST / $SECOND / $UNCACHED"
+fi
+
+log_test "Invalidating cached results when the graph changes..."
+VERSION_BEFORE=$(CLAUDE_MEMORY_DIR="$QC_DIR" python3 "$SCRIPT_DIR/lib/graph.py" stats | python3 -c "import json, sys; print(json.load(sys.stdin)['graph_version'])")
+CLAUDE_MEMORY_DIR="$QC_DIR" python3 "$SCRIPT_DIR/lib/capture.py" discovery gotcha "Cron jobs run in UTC regardless of the server locale" > /dev/null
+VERSION_AFTER=$(CLAUDE_MEMORY_DIR="$QC_DIR" python3 "$SCRIPT_DIR/lib/graph.py" stats | python3 -c "import json, sys; print(json.load(sys.stdin)['graph_version'])")
+THIRD=$(CLAUDE_MEMORY_DIR="$QC_DIR" python3 "$SCRIPT_DIR/lib/query.py" --command type --query discovery --format ids)
+if [ "$VERSION_AFTER" -gt "$VERSION_BEFORE" ] && [ "$(echo "$THIRD" | wc -l)" = "2" ]; then
+    log_pass "Capture bumped graph_version ($VERSION_BEFORE -> $VERSION_AFTER); query re-ran"
+else
+    log_fail "Stale cached result: $THIRD (version $VERSION_BEFORE -> $VERSION_AFTER)"
+fi
+
+# ============================================
+# Test 25: Streaming Output
+# ============================================
+
+echo ""
+echo "--- Test 25: Streaming Output ---"
+
+log_test "Exporting every node as JSON Lines..."
+EXPORT=$(CLAUDE_MEMORY_DIR="$TEST_DIR/gen-a" python3 "$SCRIPT_DIR/lib/query.py" --command all --format jsonl --limit 0 --status all)
+if [ "$(echo "$EXPORT" | wc -l)" = "300" ] && \
+   echo "$EXPORT" | python3 -c "import sys, json; sys.exit(0 if all('id' in json.loads(l) for l in sys.stdin) else 1)"; then
+    log_pass "jsonl export wrote one record per node"
+else
+    log_fail "jsonl export incomplete"
+fi
+
+log_test "Streaming into a reader that stops early..."
+HEAD_ERR=$( { CLAUDE_MEMORY_DIR="$TEST_DIR/gen-a" python3 "$SCRIPT_DIR/lib/query.py" --command all --format full --limit 0 --status all --no-cache | head -1 > /dev/null; } 2>&1)
+JSON_OUT=$(CLAUDE_MEMORY_DIR="$TEST_DIR/gen-a" python3 "$SCRIPT_DIR/lib/query.py" --command all --format json --limit 0 --status all)
+if [ -z "$HEAD_ERR" ] && echo "$JSON_OUT" | python3 -c "import sys, json; sys.exit(0 if json.load(sys.stdin)['count'] == 300 else 1)"; then
+    log_pass "Closed pipe handled quietly; streamed json parses"
+else
+    log_fail "Streaming output broken: $HEAD_ERR"
+fi
+
+# ============================================
+# Test 26: Cursor Paging
+# ============================================
+
+echo ""
+echo "--- Test 26: Cursor Paging ---"
+
+log_test "Paging through every node with --after..."
+ALL_IDS=$(CLAUDE_MEMORY_DIR="$TEST_DIR/gen-a" python3 "$SCRIPT_DIR/lib/query.py" --command all --format ids --limit 0 --status all)
+PAGED=""
+CURSOR=""
+PAGES=0
+while [ "$PAGES" -lt 20 ]; do
+    AFTER=()
+    [ -n "$CURSOR" ] && AFTER=(--after "$CURSOR")
+    PAGE=$(CLAUDE_MEMORY_DIR="$TEST_DIR/gen-a" python3 "$SCRIPT_DIR/lib/query.py" --command all --format ids \
+        --limit 70 --status all "${AFTER[@]}" 2> "$TEST_DIR/cursor.err")
+    PAGED="$PAGED$PAGE"$'\n'
+    PAGES=$((PAGES + 1))
+    CURSOR=$(sed -n 's/^next_cursor: //p' "$TEST_DIR/cursor.err")
+    [ -z "$CURSOR" ] && break
+done
+if [ "$PAGES" = "5" ] && [ "$(echo "$PAGED" | grep -v '^$')" = "$ALL_IDS" ]; then
+    log_pass "5 pages of 70 covered all 300 nodes once, in order"
+else
+    log_fail "Paging gave $PAGES pages"
+fi
+
+log_test "Resuming a type query after a cursor..."
+TYPE_IDS=$(CLAUDE_MEMORY_DIR="$TEST_DIR/gen-a" python3 "$SCRIPT_DIR/lib/query.py" --command type --query decision --format ids --limit 0 --status all)
+SECOND_ID=$(echo "$TYPE_IDS" | sed -n 2p)
+RESUMED=$(CLAUDE_MEMORY_DIR="$TEST_DIR/gen-a" python3 "$SCRIPT_DIR/lib/query.py" --command type --query decision --format ids --limit 2 --status all --after "$SECOND_ID" 2>/dev/null)
+if [ -n "$SECOND_ID" ] && [ "$RESUMED" = "$(echo "$TYPE_IDS" | sed -n 3,4p)" ]; then
+    log_pass "type page starts right after the cursor"
+else
+    log_fail "type --after returned: $RESUMED"
+fi
+
+log_test "Ending a filtered page without a dangling cursor..."
+ARCHIVED=$(CLAUDE_MEMORY_DIR="$TEST_DIR/gen-a" python3 "$SCRIPT_DIR/lib/query.py" --command type --query decision --format ids --limit 0 --status archived)
+ARCHIVED_COUNT=$(echo "$ARCHIVED" | grep -c .)
+PAGE=$(CLAUDE_MEMORY_DIR="$TEST_DIR/gen-a" python3 "$SCRIPT_DIR/lib/query.py" --command type --query decision --format ids \
+    --limit "$ARCHIVED_COUNT" --status archived --no-cache 2> "$TEST_DIR/cursor.err")
+if [ "$ARCHIVED_COUNT" -gt 0 ] && [ "$PAGE" = "$ARCHIVED" ] && [ ! -s "$TEST_DIR/cursor.err" ]; then
+    log_pass "No next_cursor when only filtered-out candidates remain"
+else
+    log_fail "Filtered page: $(cat "$TEST_DIR/cursor.err")"
+fi
+
+log_test "Paging escaped IDs in the same order from the index and the store..."
+if python3 - "$SCRIPT_DIR/lib" "$TEST_DIR/escaped-ids.json" << 'PYEOF'
+import sys
+sys.path.insert(0, sys.argv[1])
+from cachefile import CacheIndex, write_cache
+
+# JSON escapes \u00e9 and \u0001 with a backslash, which sorts between "Z" and "z"
+ids = ["node-Z", "node-z", "node-\u00e9", "node-\u0001", "node-\u4e2d"]
+write_cache(sys.argv[2], {"version": "1", "nodes": {i: {"type": "t"} for i in ids}})
+index = CacheIndex.open(sys.argv[2])
+scanned = [key for key, _, _ in index.scan_sorted("nodes")]
+assert scanned == sorted(ids), scanned
+assert [key for key, _, _ in index.scan_sorted("nodes", "node-z")] == sorted(ids)[3:]
+assert all(index.get("nodes", i) == {"type": "t"} for i in ids)
+PYEOF
+then
+    log_pass "Index keys sort as decoded strings, like the loaded store"
+else
+    log_fail "Index key order differs from str order"
+fi
+
+# ============================================
+# Test 27: Visualization View Model
+# ============================================
+
+echo ""
+echo "--- Test 27: Visualization View Model ---"
+
+log_test "Building the view model against a brute-force edge scan..."
+if python3 - "$SCRIPT_DIR/lib" "$TEST_DIR/gen-a" << 'PYEOF'
+import sys
+sys.path.insert(0, sys.argv[1])
+from graph import MemoryGraph
+from viewmodel import GraphView
+
+graph = MemoryGraph(sys.argv[2])
+view = GraphView(graph)
+nodes = graph.cache["nodes"]
+edges = [(src, dst) for src in nodes for dst in nodes[src]["links_to"] if dst in nodes]
+degree = {}
+for src, dst in edges:
+    degree[src] = degree.get(src, 0) + 1
+    degree[dst] = degree.get(dst, 0) + 1
+assert view.edge_count == len(edges) > 0
+assert list(view.edges()) == edges
+assert [degree[nid] for nid in view.hubs] == sorted(degree.values(), reverse=True)[:6]
+assert set(view.outgoing(edges[0][0])) == {dst for src, dst in edges if src == edges[0][0]}
+fresh = GraphView(MemoryGraph(sys.argv[2]))  # served from the index
+for ntype, count, shown in fresh.types:
+    assert count == len(graph.get_by_type(ntype)) and shown == graph.get_by_type(ntype)[:10]
+PYEOF
+then
+    log_pass "Adjacency, edge count and hubs match a full scan"
+else
+    log_fail "View model disagrees with a full edge scan"
+fi
+
+log_test "Rendering with visualize.py..."
+VIS_OUT=$(python3 "$SCRIPT_DIR/lib/visualize.py" "$TEST_DIR/gen-a" 2>&1)
+if grep -q "Connection Map" <<< "$VIS_OUT" && grep -q "Edges:" <<< "$VIS_OUT"; then
+    log_pass "Header and connection map rendered"
+else
+    log_fail "visualize.py output: $(echo "$VIS_OUT" | head -5)"
+fi
+
+# ============================================
+# Test 28: Incremental Graph Stats
+# ============================================
+
+echo ""
+echo "--- Test 28: Incremental Graph Stats ---"
+
+log_test "Keeping the stats block in step through updates and deletes..."
+STATS_DIR="$TEST_DIR/stats-mem"
+python3 "$SCRIPT_DIR/lib/generate.py" "$STATS_DIR" --nodes 120 --seed 11 > /dev/null
+if python3 - "$SCRIPT_DIR/lib" "$STATS_DIR" << 'PYEOF'
+import sys, random
+sys.path.insert(0, sys.argv[1])
+from graph import MemoryGraph
+import graphstats
+
+rng = random.Random(5)
+graph = MemoryGraph(sys.argv[2])
+paths = {nid: graph.get_node(nid)["path"] for nid in graph.iter_node_ids()}
+ids = sorted(paths)
+deleted = []
+for step in range(40):
+    graph = MemoryGraph(sys.argv[2])
+    if step % 5 == 1:
+        deleted.append(ids[(step * 7) % len(ids)])
+        graph.delete_node(deleted[-1])
+    elif step % 5 == 3 and deleted:
+        graph.update_single_node(paths[deleted.pop(0)])
+    else:
+        path = paths[rng.choice([nid for nid in ids if nid not in deleted])]
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(f"\n[[{rng.choice(ids + ['not-a-node'])}]] #extra{step % 3}\n")
+        graph.update_single_node(path)
+
+values = lambda pairs: [value for _, value in pairs]
+graph = MemoryGraph(sys.argv[2])
+kept, full = graphstats.summary(graph.cache["stats"]), graphstats.summary(graphstats.compute(graph.store))
+for key in ("hubs", "top_tags"):
+    kept[key], full[key] = values(kept[key]), values(full[key])
+sys.exit(0 if kept == full else 1)
+PYEOF
+then
+    log_pass "Incremental stats match a full recount"
+else
+    log_fail "Incremental stats drifted from a full recount"
+fi
+
+STATS_OUT=$(CLAUDE_MEMORY_DIR="$STATS_DIR" python3 "$SCRIPT_DIR/lib/graph.py" stats)
+if echo "$STATS_OUT" | python3 -c "import json, sys; s = json.load(sys.stdin); sys.exit(0 if s['edge_count'] > 0 and s['hubs'] and sum(s['types'].values()) == s['node_count'] else 1)"; then
+    log_pass "graph.py stats reports edges, hubs and type counts from the index header"
+else
+    log_fail "graph.py stats output: $STATS_OUT"
+fi
+
+# ============================================
+# Test 29: Focused and Sampled Visualization
+# ============================================
+
+echo ""
+echo "--- Test 29: Focused and Sampled Visualization ---"
+
+log_test "Extracting ego networks and stratified samples..."
+if python3 - "$SCRIPT_DIR/lib" "$STATS_DIR" << 'PYEOF'
+import sys
+sys.path.insert(0, sys.argv[1])
+from graph import MemoryGraph
+from viewmodel import SubgraphView, ego_network, stratified_sample
+
+graph = MemoryGraph(sys.argv[2])
+center = graph.get_stats()["hubs"][0][0]
+data = graph.get_node(center)
+neighbors = {n for n in data["links_to"] + data["backlinks"] if graph.get_node(n)}
+ego = ego_network(graph, center, depth=1)
+assert ego[0] == center and set(ego) == neighbors | {center}
+assert len(ego_network(graph, center, depth=3, max_nodes=15)) == 15
+
+view = SubgraphView(graph, ego, scope="", center=center)
+assert view.hubs[0] == center and view.edge_count >= len(neighbors)
+assert all(src in ego and dst in ego for src, dst in view.edges())
+
+sample = stratified_sample(graph, 20, seed=1)
+assert len(sample) <= 20 and len(set(sample)) == len(sample)
+assert {graph.get_node(n)["type"] for n in sample} == set(graph.get_stats()["types"])
+assert sample == stratified_sample(graph, 20, seed=1)
+
+# Drawn by position from the postings, never a full type listing; the cap
+# is shared out per type before anything is dropped
+graph.get_by_type = None
+counts = graph.get_stats()["types"]
+largest = sorted(counts, key=lambda t: (-counts[t], t))
+capped = stratified_sample(graph, 20, seed=1, max_nodes=len(counts) - 1)
+assert {graph.get_node(n)["type"] for n in capped} == set(largest[:len(counts) - 1]), capped
+import random
+def check_draw():
+    members = set(graph.iter_posting("types", largest[0]))
+    draw = graph.sample_posting("types", largest[0], 5, random.Random(3))
+    assert len(draw) == len(set(draw)) == min(5, len(members)) and set(draw) <= members, draw
+assert graph._lazy
+check_draw()
+graph.cache  # The loaded store draws from its ID-ordered postings
+check_draw()
+loaded = stratified_sample(graph, 20, seed=2)
+assert {graph.get_node(n)["type"] for n in loaded} == set(counts) and len(loaded) <= 20
+PYEOF
+then
+    log_pass "Ego network, subgraph edges and sample strata are correct"
+else
+    log_fail "Subgraph extraction incorrect"
+fi
+
+log_test "Rendering --focus and --sample views..."
+HUB=$(CLAUDE_MEMORY_DIR="$STATS_DIR" python3 "$SCRIPT_DIR/lib/graph.py" stats | python3 -c "import json, sys; print(json.load(sys.stdin)['hubs'][0][0])")
+FOCUS_OUT=$(python3 "$SCRIPT_DIR/lib/visualize.py" "$STATS_DIR" --focus "$HUB" --depth 2 2>&1)
+SAMPLE_OUT=$(python3 "$SCRIPT_DIR/lib/visualize.py" "$STATS_DIR" --sample 10 2>&1)
+if grep -q "Focus: $HUB · depth 2" <<< "$FOCUS_OUT" && grep -q "Sample: .* of 120 nodes" <<< "$SAMPLE_OUT" \
+    && ! python3 "$SCRIPT_DIR/lib/visualize.py" "$STATS_DIR" --focus no-such-node > /dev/null 2>&1; then
+    log_pass "Focus and sample views render; unknown focus fails"
+else
+    log_fail "visualize.py --focus/--sample output: $(echo "$FOCUS_OUT" | head -5)"
+fi
+
+# ============================================
+# Test 30: Graph Export
+# ============================================
+
+echo ""
+echo "--- Test 30: Graph Export ---"
+
+log_test "Exporting DOT, GraphML and csv-edges..."
+EXPORT_DIR="$TEST_DIR/export"
+mkdir -p "$EXPORT_DIR"
+for fmt in dot graphml csv-edges; do
+    CLAUDE_MEMORY_DIR="$STATS_DIR" python3 "$SCRIPT_DIR/lib/graph.py" export --format "$fmt" -o "$EXPORT_DIR/graph.$fmt" 2>/dev/null
+done
+if python3 - "$SCRIPT_DIR/lib" "$STATS_DIR" "$EXPORT_DIR" << 'PYEOF'
+import csv, sys
+import xml.etree.ElementTree as ET
+sys.path.insert(0, sys.argv[1])
+from graph import MemoryGraph
+
+graph = MemoryGraph(sys.argv[2])
+stats = graph.get_stats()
+nodes, edges = stats["node_count"], stats["edge_count"]
+ns = "{http://graphml.graphdrawing.org/xmlns}"
+root = ET.parse(f"{sys.argv[3]}/graph.graphml").getroot()
+assert len(root.findall(f"{ns}graph/{ns}node")) == nodes
+assert len(root.findall(f"{ns}graph/{ns}edge")) == edges
+rows = list(csv.reader(open(f"{sys.argv[3]}/graph.csv-edges")))
+assert rows[0] == ["source", "target", "source_type", "target_type"] and len(rows) == edges + 1
+assert all(graph.get_node(src)["type"] == stype for src, _, stype, _ in rows[1:])
+dot = open(f"{sys.argv[3]}/graph.dot").read()
+assert dot.startswith("digraph memory {") and dot.count(" -> ") == edges
+PYEOF
+then
+    log_pass "All formats carry every node and edge"
+else
+    log_fail "Export output incomplete"
+fi
+
+log_test "Filtering export by type..."
+EXPORT_TYPE=$(CLAUDE_MEMORY_DIR="$STATS_DIR" python3 "$SCRIPT_DIR/lib/graph.py" stats | python3 -c "import json, sys; print(sorted(json.load(sys.stdin)['types'])[0])")
+if CLAUDE_MEMORY_DIR="$STATS_DIR" python3 "$SCRIPT_DIR/lib/graph.py" export --format csv-edges --type "$EXPORT_TYPE" 2>/dev/null \
+    | python3 -c "import csv, sys; rows = list(csv.reader(sys.stdin))[1:]; sys.exit(not all(r[2] == r[3] == sys.argv[1] for r in rows))" "$EXPORT_TYPE"; then
+    log_pass "--type keeps only edges between nodes of that type"
+else
+    log_fail "--type filter leaked other node types"
+fi
+
+# ============================================
+# Test 31: File Summaries
+# ============================================
+
+echo ""
+echo "--- Test 31: File Summaries ---"
+
+SUMMARY_SRC="$TEST_DIR/summary-src"
+SUMMARY_MEM="$TEST_DIR/summary-mem"
+mkdir -p "$SUMMARY_SRC"
+bash "$SCRIPT_DIR/init.sh" "$SUMMARY_MEM" > /dev/null
+cat > "$SUMMARY_SRC/service.py" << 'EOF'
+"""Billing service: invoices and refunds."""
+import os
+from .models import Invoice
+
+
+class Billing:
+    def charge(self, amount):
+        def _round(x):
+            return x
+        return _round(amount)
+
+    async def refund(self, invoice):
+        pass
+
+
+def main():
+    pass
+EOF
+
+log_test "Extracting Python symbols with ast (and the regex fallback)..."
+if python3 - "$SCRIPT_DIR/lib" "$SUMMARY_SRC/service.py" << 'PYEOF'
+import sys
+sys.path.insert(0, sys.argv[1])
+from summarize import generate_summary
+
+content = open(sys.argv[2]).read()
+expected = ["class Billing", "def Billing.charge", "def Billing.refund", "def main"]
+summary = generate_summary(sys.argv[2], content)
+assert summary["exports"] == expected, summary["exports"]
+assert summary["imports"] == ["os", ".models"] and summary["description"].startswith("Billing service")
+assert [s["line"] for s in summary["symbols"]] == [6, 7, 12, 16]
+broken = generate_summary("broken.py", content + "def oops(:\n")
+assert broken["exports"] == expected + ["def oops"], broken["exports"]
+PYEOF
+then
+    log_pass "Methods, async defs and imports found; nested functions skipped"
+else
+    log_fail "Python summary extraction incorrect"
+fi
+
+log_test "Finding definitions inside match cases..."
+if python3 - "$SCRIPT_DIR/lib" << 'PYEOF'
+import sys
+sys.path.insert(0, sys.argv[1])
+import summarize
+from summarize import generate_summary
+
+if summarize.MATCH_NODES:
+    content = "import sys\nmatch sys.platform:\n    case 'win32':\n        def opener():\n            pass\n    case _:\n        import shlex\n        def opener():\n            pass\n"
+    summary = generate_summary("platform.py", content)
+    assert summary["exports"] == ["def opener", "def opener"], summary["exports"]
+    assert summary["imports"] == ["sys", "shlex"], summary["imports"]
+try:
+    summarize.LineScanner()
+except TypeError:
+    pass
+else:
+    raise AssertionError("LineScanner is instantiable")
+PYEOF
+then
+    log_pass "Each case body of a match is visited"
+else
+    log_fail "Definitions inside match cases missed"
+fi
+
+log_test "Caching summaries by content hash..."
+if python3 - "$SCRIPT_DIR/lib" "$SUMMARY_SRC/service.py" "$SUMMARY_MEM" << 'PYEOF'
+import sys
+sys.path.insert(0, sys.argv[1])
+import summarize
+
+first = summarize.summarize_file(sys.argv[2], sys.argv[3])
+summarize.generate_summary = None  # A cache miss would now fail
+again = summarize.summarize_file(sys.argv[2], sys.argv[3])
+assert again == first and len(first["content_hash"]) == 40
+PYEOF
+then
+    log_pass "Unchanged content is served from the summary cache"
+else
+    log_fail "Summary cache missed on unchanged content"
+fi
+
+log_test "Filling new file-summary nodes on capture..."
+CLAUDE_MEMORY_DIR="$SUMMARY_MEM" python3 "$SCRIPT_DIR/lib/capture.py" file "$SUMMARY_SRC/service.py" > /dev/null
+SUMMARY_NODE=$(ls "$SUMMARY_MEM"/nodes/files/*.md 2>/dev/null | head -1)
+if [ -n "$SUMMARY_NODE" ] && grep -q '`def Billing.refund` (line 12)' "$SUMMARY_NODE" \
+    && grep -q "^content_hash: " "$SUMMARY_NODE" && ! grep -q "To be filled" "$SUMMARY_NODE"; then
+    log_pass "Captured node carries the extracted summary"
+else
+    log_fail "Captured file-summary node not filled"
+fi
+
+# ============================================
+# Test 32: Repository Summaries
+# ============================================
+
+echo ""
+echo "--- Test 32: Repository Summaries ---"
+
+REPO_SRC="$TEST_DIR/repo-src"
+REPO_MEM="$TEST_DIR/repo-mem"
+mkdir -p "$REPO_SRC/app" "$REPO_SRC/build" "$REPO_SRC/web"
+bash "$SCRIPT_DIR/init.sh" "$REPO_MEM" > /dev/null
+printf 'build/\n*.gen.py\n!keep.gen.py\n' > "$REPO_SRC/.gitignore"
+printf 'def handler():\n    pass\n' > "$REPO_SRC/app/api.py"
+printf 'X = 1\n' > "$REPO_SRC/app/schema.gen.py"
+printf 'X = 2\n' > "$REPO_SRC/app/keep.gen.py"
+printf 'def compiled():\n    pass\n' > "$REPO_SRC/build/out.py"
+printf "import { handler } from '../app/api';\nexport function render() {}\n" > "$REPO_SRC/web/page.ts"
+printf 'notes\n' > "$REPO_SRC/README.txt"
+
+log_test "Summarizing a repository into file-summary nodes..."
+REPO_RUN=$(CLAUDE_MEMORY_DIR="$REPO_MEM" python3 "$SCRIPT_DIR/lib/summarize.py" --repo "$REPO_SRC" --jobs 2)
+REPO_IDS=$(CLAUDE_MEMORY_DIR="$REPO_MEM" python3 "$SCRIPT_DIR/lib/graph.py" type file-summary)
+if echo "$REPO_RUN" | grep -q '"files": 3, "created": 3' && echo "$REPO_IDS" | grep -q "app-keep-gen-py" \
+    && ! echo "$REPO_IDS" | grep -q "build-out-py\|schema-gen-py"; then
+    log_pass "Source files summarized; .gitignore rules (with negation) honoured"
+else
+    log_fail "Repository scan: $REPO_RUN $REPO_IDS"
+fi
+
+log_test "Re-running --repo after one edit..."
+API_NODE=$(ls "$REPO_MEM"/nodes/files/*app-api-py.md)
+printf '\n## Notes\nHand-written note\n' >> "$API_NODE"
+printf 'def handler():\n    pass\n\n\ndef retry():\n    pass\n' > "$REPO_SRC/app/api.py"
+REPO_RUN=$(CLAUDE_MEMORY_DIR="$REPO_MEM" python3 "$SCRIPT_DIR/lib/summarize.py" --repo "$REPO_SRC")
+if echo "$REPO_RUN" | grep -q '"updated": 1, "unchanged": 2' && grep -q '`def retry` (line 5)' "$API_NODE" \
+    && grep -q "Hand-written note" "$API_NODE"; then
+    log_pass "Only the changed file is re-summarized; its notes are kept"
+else
+    log_fail "Incremental repository scan: $REPO_RUN"
+fi
+
+log_test "Re-summarizing packed file-summary nodes in place..."
+CLAUDE_MEMORY_DIR="$REPO_MEM" python3 "$SCRIPT_DIR/lib/graph.py" pack --type file-summary > /dev/null
+UNCHANGED_RUN=$(CLAUDE_MEMORY_DIR="$REPO_MEM" python3 "$SCRIPT_DIR/lib/summarize.py" --repo "$REPO_SRC")
+printf 'def handler():\n    pass\n\n\ndef backoff():\n    pass\n' > "$REPO_SRC/app/api.py"
+REPO_RUN=$(CLAUDE_MEMORY_DIR="$REPO_MEM" python3 "$SCRIPT_DIR/lib/summarize.py" --repo "$REPO_SRC")
+API_COPIES=$(find "$REPO_MEM/nodes" -name '*app-api-py.md' | wc -l)
+if echo "$UNCHANGED_RUN" | grep -q '"created": 0, "updated": 0, "unchanged": 3' \
+    && echo "$REPO_RUN" | grep -q '"created": 0, "updated": 1' && [ "$API_COPIES" -eq 1 ] \
+    && grep -q '`def backoff` (line 5)' "$API_NODE" && grep -q "Hand-written note" "$API_NODE"; then
+    log_pass "Packed nodes are matched through the graph, unpacked and updated"
+else
+    log_fail "Packed repository nodes: $UNCHANGED_RUN $REPO_RUN ($API_COPIES copies)"
+fi
+
+# ============================================
+# Test 33: Streaming Summaries of Large Files
+# ============================================
+
+echo ""
+echo "--- Test 33: Streaming Summaries of Large Files ---"
+
+log_test "Summarizing an 8MB generated file in bounded memory..."
+if python3 - "$SCRIPT_DIR/lib" "$TEST_DIR/generated.ts" << 'PYEOF'
+import sys, tracemalloc
+sys.path.insert(0, sys.argv[1])
+import summarize
+
+with open(sys.argv[2], 'w') as f:
+    f.write("// Generated API client\nimport { base } from './base';\n")
+    f.write("export function first() {}\n")
+    for i in range(150_000):
+        f.write(f"export const k{i} = {i};\n")
+    f.write("const blob = '" + "x" * 3_000_000 + "';\n")  # One 3MB line
+
+tracemalloc.start()
+summary = summarize.summarize_file(sys.argv[2])
+peak = tracemalloc.get_traced_memory()[1]
+assert peak < 4 * 1024 * 1024, peak
+assert summary["line_count"] == 150_005 and summary["truncated"]
+assert summary["exports"][:2] == ["function first", "const k0"] and summary["imports"] == ["./base"]
+assert summary["description"] == "Generated API client"
+assert len(summary["symbols"]) == summarize.MAX_SYMBOLS
+PYEOF
+then
+    log_pass "Large file hashed and scanned as a stream with a byte budget"
+else
+    log_fail "Streaming summary incorrect or unbounded"
+fi
+
+# ============================================
+# Test 34: Summary Refresh on Edit
+# ============================================
+
+echo ""
+echo "--- Test 34: Summary Refresh on Edit ---"
+
+REFRESH_SRC="$SUMMARY_SRC/refresh.py"
+printf 'import os\n\n\ndef load():\n    pass\n' > "$REFRESH_SRC"
+CLAUDE_MEMORY_DIR="$SUMMARY_MEM" python3 "$SCRIPT_DIR/lib/capture.py" file "$REFRESH_SRC" --action read > /dev/null
+REFRESH_NODE=$(ls "$SUMMARY_MEM"/nodes/files/*refresh-py.md)
+printf '\n## Notes\nKeep load() idempotent\n' >> "$REFRESH_NODE"
+
+log_test "Capturing an edit that leaves the content unchanged..."
+REFRESH_OUT=$(CLAUDE_MEMORY_DIR="$SUMMARY_MEM" python3 "$SCRIPT_DIR/lib/capture.py" file "$REFRESH_SRC" --action edit)
+if echo "$REFRESH_OUT" | grep -q '"status": "updated"' && ! echo "$REFRESH_OUT" | grep -q '"summary"'; then
+    log_pass "Unchanged content hash skips the summarizer"
+else
+    log_fail "Unchanged edit re-summarized: $REFRESH_OUT"
+fi
+
+log_test "Capturing an edit that changes the symbols..."
+printf 'import os\nimport json\n\n\ndef load():\n    pass\n\n\ndef save():\n    pass\n' > "$REFRESH_SRC"
+REFRESH_OUT=$(CLAUDE_MEMORY_DIR="$SUMMARY_MEM" python3 "$SCRIPT_DIR/lib/capture.py" file "$REFRESH_SRC" --action edit)
+if echo "$REFRESH_OUT" | grep -q '"added": \["def save"\], "removed": \[\]' \
+    && grep -q '`def save` (line 9)' "$REFRESH_NODE" && grep -q '^- `json`' "$REFRESH_NODE" \
+    && grep -q "Keep load() idempotent" "$REFRESH_NODE" && grep -q "^access_count: 3" "$REFRESH_NODE"; then
+    log_pass "Changed sections refreshed in place; symbol diff reported"
+else
+    log_fail "Edit refresh: $REFRESH_OUT"
+fi
+
+log_test "Saving the graph once per capture..."
+if python3 - "$SCRIPT_DIR/lib" "$SUMMARY_MEM" "$REFRESH_SRC" << 'PYEOF'
+import sys
+sys.path.insert(0, sys.argv[1])
+from capture import capture_file_access, capture_task, file_path_to_node_id
+from graph import MemoryGraph
+
+memory_dir, src = sys.argv[2], sys.argv[3]
+task = capture_task(memory_dir, "Tidy refresh.py", "in_progress")["node_id"]
+with open(src, "a") as f:
+    f.write("\n\ndef close():\n    pass\n")
+before = MemoryGraph(memory_dir).graph_version
+# Refreshed summary plus the file -> task and task -> file links
+assert capture_file_access(memory_dir, src, "edit")["status"] == "updated"
+graph = MemoryGraph(memory_dir)
+capture_task(memory_dir, "Tidy refresh.py", "completed")
+node_id = file_path_to_node_id(src)
+assert graph.graph_version == before + 1, (before, graph.graph_version)
+assert task in graph.get_node(node_id)["links_to"]
+assert node_id in graph.get_node(task)["links_to"]
+assert graph.find_symbol("close")
+PYEOF
+then
+    log_pass "Node, task links and summary synced in one graph.json save"
+else
+    log_fail "Capture saved graph.json more than once"
+fi
+
+# ============================================
+# Test 35: Symbol Index
+# ============================================
+
+echo ""
+echo "--- Test 35: Symbol Index ---"
+
+log_test "Looking up a method by its short name..."
+SYMBOL_OUT=$(CLAUDE_MEMORY_DIR="$SUMMARY_MEM" python3 "$SCRIPT_DIR/lib/query.py" --command symbol --query charge --no-cache)
+if echo "$SYMBOL_OUT" | grep -q "^\[def\] Billing.charge  .*service.py:7$"; then
+    log_pass "charge resolves to Billing.charge in service.py, line 7"
+else
+    log_fail "Symbol lookup: $SYMBOL_OUT"
+fi
+
+log_test "Indexing symbols added by an edit refresh..."
+SYMBOL_OUT=$(CLAUDE_MEMORY_DIR="$SUMMARY_MEM" python3 "$SCRIPT_DIR/lib/query.py" --command symbol --query save --format ids --no-cache)
+if [ "$SYMBOL_OUT" = "$(basename "$REFRESH_NODE" .md)" ]; then
+    log_pass "save is filed under the refreshed node"
+else
+    log_fail "Refreshed symbol not indexed: $SYMBOL_OUT"
+fi
+
+log_test "Dropping a deleted node's symbols..."
+if python3 - "$SCRIPT_DIR/lib" "$SUMMARY_MEM" "$REFRESH_NODE" << 'PYEOF'
+import os
+import sys
+sys.path.insert(0, sys.argv[1])
+from graph import MemoryGraph
+
+os.remove(sys.argv[3])
+graph = MemoryGraph(sys.argv[2])
+graph.apply_changes([], [os.path.basename(sys.argv[3])[:-3]])
+graph = MemoryGraph(sys.argv[2])
+assert graph.find_symbol("save") == [] and graph.find_symbol("load") == []
+assert [h["line"] for h in graph.find_symbol("Billing.refund")] == [12]
+PYEOF
+then
+    log_pass "Deleted node removed from the symbol postings"
+else
+    log_fail "Symbol postings kept a deleted node"
+fi
+
+# ============================================
+# Test 36: Import Graph
+# ============================================
+
+echo ""
+echo "--- Test 36: Import Graph ---"
+
+IMPORT_SRC="$TEST_DIR/import-src"
+IMPORT_MEM="$TEST_DIR/import-mem"
+mkdir -p "$IMPORT_SRC/app/pkg" "$IMPORT_SRC/web/lib"
+bash "$SCRIPT_DIR/init.sh" "$IMPORT_MEM" > /dev/null
+printf 'from . import util\nfrom .pkg import core\nimport os\n' > "$IMPORT_SRC/app/main.py"
+printf 'def run():\n    pass\n' > "$IMPORT_SRC/app/util.py"
+printf 'from ..util import run\n' > "$IMPORT_SRC/app/pkg/core.py"
+touch "$IMPORT_SRC/app/__init__.py" "$IMPORT_SRC/app/pkg/__init__.py"
+printf 'import { h } from "./lib/helpers";\nimport "./styles.css";\nimport React from "react";\n' > "$IMPORT_SRC/web/main.ts"
+printf 'export function h() {}\n' > "$IMPORT_SRC/web/lib/helpers.ts"
+python3 "$SCRIPT_DIR/lib/summarize.py" --repo "$IMPORT_SRC" --memory-dir "$IMPORT_MEM" > /dev/null
+
+log_test "Resolving relative imports to file-summary nodes..."
+if python3 - "$SCRIPT_DIR/lib" "$IMPORT_MEM" "$IMPORT_SRC" << 'PYEOF'
+import os
+import sys
+sys.path.insert(0, sys.argv[1])
+from capture import file_path_to_node_id
+from graph import MemoryGraph
+
+graph = MemoryGraph(sys.argv[2])
+node = lambda rel: file_path_to_node_id(os.path.join(sys.argv[3], rel))
+assert graph.get_dependents(node("app/util.py")) == sorted([node("app/main.py"), node("app/pkg/core.py")])
+assert graph.get_dependents(node("app/pkg/__init__.py")) == [node("app/main.py")]
+assert graph.get_dependents(node("web/lib/helpers.ts")) == [node("web/main.ts")]
+assert graph.get_node(node("web/main.ts"))["imports"] == [node("web/lib/helpers.ts")]
+PYEOF
+then
+    log_pass "Python and TypeScript relative imports stored as typed edges"
+else
+    log_fail "Import edges not resolved"
+fi
+
+log_test "Querying dependents by file path..."
+DEPENDENTS=$(cd "$IMPORT_SRC/web" && CLAUDE_MEMORY_DIR="$IMPORT_MEM" python3 "$SCRIPT_DIR/lib/query.py" --command dependents --query lib/helpers.ts)
+if [ "$DEPENDENTS" = "[file-summary] $IMPORT_SRC/web/main.ts" ]; then
+    log_pass "dependents resolves a relative path to its node"
+else
+    log_fail "dependents query: $DEPENDENTS"
+fi
+
+log_test "Dropping an import on edit..."
+printf 'import os\n' > "$IMPORT_SRC/app/main.py"
+CLAUDE_MEMORY_DIR="$IMPORT_MEM" python3 "$SCRIPT_DIR/lib/capture.py" file "$IMPORT_SRC/app/main.py" --action edit > /dev/null
+DEPENDENTS=$(CLAUDE_MEMORY_DIR="$IMPORT_MEM" python3 "$SCRIPT_DIR/lib/query.py" --command dependents --query "$IMPORT_SRC/app/util.py")
+if [ "$DEPENDENTS" = "[file-summary] $IMPORT_SRC/app/pkg/core.py" ]; then
+    log_pass "Edit refresh removed the stale edge"
+else
+    log_fail "Stale import edge: $DEPENDENTS"
+fi
+
 # ============================================
 # Summary
 # ============================================